@@ -1,10 +1,44 @@
 import os
 import json
 import math
+from itertools import combinations
 import numpy as np
 import pandas as pd
 from typing import List, Dict, Any, Optional
 
+# Bars per year used to annualize the Sharpe ratio (252-day convention, 24 bars/day intraday)
+PERIODS_PER_YEAR = {"1d": 252, "1h": 252 * 24}
+
+# Out-of-fold predictions shipped next to each architecture's fold models.
+# Entry i scores the bar SEQ_LEN rows into the training frame; the last entry is
+# the last bar of that frame. Bars never held out (first fold's train span) are 0.0.
+OOF_MODEL_PATH = "models/final"
+OOF_BASE_MODELS = ["lstm", "gru", "conv1d"]
+# *_oof_probs.npy tracks live re-inference (corr ~0.86 with historical_probs.csv);
+# *_oof.npy does not (~-0.05), so every OOF consumer (backtest, ablation, fidelity, drift) reads oof_probs.
+OOF_KIND = "oof_probs"
+OOF_END_DATE = "2025-09-19"   # last bar of the shipped models/final arrays, which have no training report
+TRAIN_REPORT = "train_report.json"   # written by training.train next to the fold models (oof_end_date, windows)
+
+# Trade ledger: one structured row per executed action (see simulate_trades)
+TRADE_ACTIONS = ("BUY", "SELL", "STOP_LOSS", "TAKE_PROFIT")
+BUY, SELL, STOP_LOSS, TAKE_PROFIT = range(len(TRADE_ACTIONS))
+TRADE_DTYPE = np.dtype([
+    ("date_idx", np.int64),
+    ("action", np.int8),         # index into TRADE_ACTIONS
+    ("price", np.float64),
+    ("size_asset", np.float64),
+    ("size_usd", np.float64),
+    ("drawdown", np.float64),    # NaN unless closed by STOP_LOSS / TAKE_PROFIT
+])
+
+# Trading costs per side, as fractions of the traded notional
+FEE = 0.001
+SLIPPAGE = 0.0005
+
+# Component probability columns (predict_arrays(components=True), load_oof_probabilities(components=True))
+COMPONENT_PREFIX = "prob_"
+
 
 def generate_signals(y_prob: np.ndarray, threshold: float = 0.55) -> np.ndarray:
     """Turn probabilities into binary signals (1 = buy, 0 = flat/hold)."""
@@ -13,71 +47,78 @@ def generate_signals(y_prob: np.ndarray, threshold: float = 0.55) -> np.ndarray:
 def simulate_trades(
     prices: np.ndarray,
     signals: np.ndarray,
-    fee: float = 0.001,
-    slippage: float = 0.0005,
+    fee: float = FEE,
+    slippage: float = SLIPPAGE,
     stop_loss: Optional[float] = None,
     take_profit: Optional[float] = None,
     initial_capital: float = 1000.0,
-    position_size: float = 1.0
+    position_size: float = 1.0,
+    state: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
-    Simulate trading given daily prices and signals.
+    Simulate trading given per-bar prices and signals.
 
     Notes:
-      - signals[i] indicates action at day i (use price[i] to enter/exit).
+      - signals[i] indicates action at bar i (use price[i] to enter/exit).
       - position is held until a 0 signal, stop_loss, or take_profit triggers.
       - position_size is fraction of capital allocated (1.0 = all in).
-      - returns equity curve (per-day), trades list, buy&hold curve.
+      - returns equity curve (per-day), trade ledger (TRADE_DTYPE array), buy&hold curve
+        and the run's `state`.
+      - `state` resumes a run from the state a previous call returned: prices and
+        signals then start at its first unsimulated bar (state["bars"]) and ledger
+        date_idx stay counted from the run's first bar. The last bar is only marked
+        to market, so it is not part of the returned state (a resumed run acts on it).
     """
     n = len(signals)
     if len(prices) != n:
         raise ValueError("prices and signals must have same length")
 
-    capital = float(initial_capital)
-    position = 0.0  # amount of  held (BTC)
-    entry_price = None
-    equity_curve = []
-    trades = []
+    if state is None:
+        base = 0
+        capital = float(initial_capital)
+        position = 0.0  # amount of  held (BTC)
+        entry_price = None
+    else:
+        base = state["bars"]
+        initial_capital = state["initial_capital"]
+        capital, position, entry_price = state["capital"], state["position"], state["entry_price"]
+    equity_curve = np.empty(n, dtype=float)
+    # At most two actions per bar (an entry and a risk exit), so the ledger never grows
+    ledger = np.empty(2 * n, dtype=TRADE_DTYPE)
+    k = 0
 
     # Buy-and-hold for benchmark (buy at first price with all capital)
-    if n >= 1 and not math.isnan(prices[0]) and prices[0] > 0:
+    if state is not None:
+        bh_amount = state["bh_amount"]
+        buy_and_hold = bh_amount * np.asarray(prices, dtype=float)
+    elif n >= 1 and not math.isnan(prices[0]) and prices[0] > 0:
         bh_amount = (initial_capital / (prices[0] * (1 + fee + slippage)))
         buy_and_hold = bh_amount * prices  # value each day (ignoring fees later)
     else:
         bh_amount = 0.0
         buy_and_hold = np.zeros(n)
 
-    for i in range(n - 1):
-        price_today = float(prices[i])
-        price_next = float(prices[i + 1])
+    for j in range(n - 1):
+        i = base + j
+        price_today = float(prices[j])
 
         # Enter trade (signal==1 and no open position)
-        if signals[i] == 1 and position == 0:
+        if signals[j] == 1 and position == 0:
             alloc = capital * position_size
             # BTC amount bought
             btc_bought = alloc / (price_today * (1 + fee + slippage))
             position = btc_bought
             capital -= alloc  # reduce capital by allocated funds
             entry_price = price_today
-            trades.append({
-                "date_idx": i,
-                "action": "BUY",
-                "price": price_today,
-                "size_asset": float(position),
-                "size_usd": float(alloc)
-            })
+            ledger[k] = (i, BUY, price_today, position, alloc, np.nan)
+            k += 1
 
         # Exit trade by signal==0
-        elif signals[i] == 0 and position > 0:
+        elif signals[j] == 0 and position > 0:
             proceeds = position * price_today * (1 - fee - slippage)
             capital += proceeds
-            trades.append({
-                "date_idx": i,
-                "action": "SELL",
-                "price": price_today,
-                "size_asset": float(position),
-                "size_usd": float(proceeds)
-            })
+            ledger[k] = (i, SELL, price_today, position, proceeds, np.nan)
+            k += 1
             position = 0.0
             entry_price = None
 
@@ -85,56 +126,189 @@ def simulate_trades(
         if position > 0 and entry_price is not None:
             drawdown = (price_today - entry_price) / entry_price
             if stop_loss is not None and drawdown <= -abs(stop_loss):
-                proceeds = position * price_today * (1 - fee - slippage)
-                capital += proceeds
-                trades.append({
-                    "date_idx": i,
-                    "action": "STOP_LOSS",
-                    "price": price_today,
-                    "size_asset": float(position),
-                    "size_usd": float(proceeds),
-                    "drawdown": float(drawdown)
-                })
-                position = 0.0
-                entry_price = None
+                action = STOP_LOSS
             elif take_profit is not None and drawdown >= abs(take_profit):
+                action = TAKE_PROFIT
+            else:
+                action = None
+            if action is not None:
                 proceeds = position * price_today * (1 - fee - slippage)
                 capital += proceeds
-                trades.append({
-                    "date_idx": i,
-                    "action": "TAKE_PROFIT",
-                    "price": price_today,
-                    "size_asset": float(position),
-                    "size_usd": float(proceeds),
-                    "drawdown": float(drawdown)
-                })
+                ledger[k] = (i, action, price_today, position, proceeds, drawdown)
+                k += 1
                 position = 0.0
                 entry_price = None
 
         # Compute equity at close of day i
-        equity = capital + position * price_today
-        equity_curve.append(float(equity))
+        equity_curve[j] = capital + position * price_today
 
-    # Append final day equity (using last price)
+    # Final day equity (using last price)
     if n >= 1:
-        final_price = float(prices[-1])
-        equity_curve.append(float(capital + position * final_price))
+        equity_curve[n - 1] = capital + position * float(prices[-1])
     else:
-        equity_curve = [float(initial_capital)]
+        equity_curve = np.array([float(initial_capital)])
 
-    equity_curve = np.array(equity_curve, dtype=float)
     buy_and_hold_curve = buy_and_hold if len(buy_and_hold) == len(equity_curve) else buy_and_hold[:len(equity_curve)]
+    trades = ledger[:k].copy()
+    simulated = max(n - 1, 0)
 
     return {
         "equity_curve": equity_curve,
         "buy_and_hold_curve": buy_and_hold_curve,
-        "trades": trades
+        "trades": trades,
+        "state": {
+            "bars": base + simulated,
+            "initial_capital": float(initial_capital),
+            "capital": capital,
+            "position": position,
+            "entry_price": entry_price,
+            "bh_amount": float(bh_amount),
+            "equity": accumulate_equity(None if state is None else state["equity"], equity_curve[:simulated]),
+            "trades": accumulate_trades(None if state is None else state["trades"], trades)
+        }
     }
 
-def calculate_metrics(equity_curve: np.ndarray, initial_capital: float = 1000.0) -> Dict[str, Any]:
+def accumulate_equity(acc: Optional[Dict[str, Any]], equity: np.ndarray) -> Dict[str, Any]:
+    """
+    Fold equity values into the running accumulators behind calculate_metrics:
+    per-bar return count/mean/M2 (merged with Chan's formula), last equity,
+    running peak and max drawdown. Returns a new dict; `acc` is not modified.
+    """
+    acc = dict(acc) if acc is not None else {"count": 0, "returns": 0, "mean": 0.0, "m2": 0.0,
+                                              "last": None, "peak": -math.inf, "max_dd": 0.0}
+    equity = np.asarray(equity, dtype=float)
+    if len(equity) == 0:
+        return acc
+
+    chained = equity if acc["last"] is None else np.concatenate(([acc["last"]], equity))
+    returns = np.diff(chained) / (chained[:-1] + 1e-9)
+    returns = returns[~np.isnan(returns)]
+    if len(returns):
+        n_a, n_b = acc["returns"], len(returns)
+        mean_b = float(returns.mean())
+        m2_b = float(((returns - mean_b) ** 2).sum())
+        delta = mean_b - acc["mean"]
+        acc["mean"] += delta * n_b / (n_a + n_b)
+        acc["m2"] += m2_b + delta ** 2 * n_a * n_b / (n_a + n_b)
+        acc["returns"] = n_a + n_b
+
+    running_max = np.maximum(np.maximum.accumulate(equity), acc["peak"])
+    acc["max_dd"] = max(acc["max_dd"], float(np.max(running_max - equity)))
+    acc["peak"] = float(running_max[-1])
+    acc["last"] = float(equity[-1])
+    acc["count"] += len(equity)
+    return acc
+
+def accumulated_metrics(acc: Dict[str, Any], initial_capital: float = 1000.0, periods_per_year: int = 252) -> Dict[str, Any]:
+    """calculate_metrics() from equity accumulators instead of the whole curve."""
+    if acc["count"] < 2:
+        return {
+            "final_equity": acc["last"] if acc["count"] else initial_capital,
+            "cumulative_return": 0.0,
+            "sharpe_ratio": 0.0,
+            "max_drawdown": 0.0,
+            "max_drawdown_pct": 0.0,
+            "daily_returns_mean": 0.0,
+            "daily_returns_std": 0.0
+        }
+
+    mean_r = acc["mean"] if acc["returns"] else float("nan")
+    std_r = math.sqrt(acc["m2"] / acc["returns"]) if acc["returns"] > 1 else 0.0
+    sharpe = (mean_r / (std_r + 1e-9)) * math.sqrt(periods_per_year) if std_r > 0 else 0.0
+    return {
+        "final_equity": acc["last"],
+        "cumulative_return": float(acc["last"] / initial_capital - 1.0),
+        "sharpe_ratio": sharpe,
+        "max_drawdown": acc["max_dd"],
+        "max_drawdown_pct": float(acc["max_dd"] / (acc["peak"] + 1e-9)) if acc["peak"] > 0 else 0.0,
+        "daily_returns_mean": mean_r,
+        "daily_returns_std": std_r
+    }
+
+def accumulate_trades(acc: Optional[Dict[str, Any]], ledger: np.ndarray) -> Dict[str, Any]:
+    """
+    Fold ledger rows into the running counts behind trade_stats: exits, closed
+    pairs, winners, P&L and holding-bar sums, and the entry still open (each
+    exit closes the open BUY). Returns a new dict; `acc` is not modified.
+    """
+    acc = dict(acc) if acc is not None else {"exits": 0, "closed": 0, "wins": 0, "pnl": 0.0, "holding": 0,
+                                              "open_usd": None, "open_idx": None}
+    for date_idx, action, _, _, size_usd, _ in ledger.tolist():
+        if action == BUY:
+            acc["open_usd"], acc["open_idx"] = size_usd, date_idx
+            continue
+        acc["exits"] += 1
+        if acc["open_usd"] is not None:
+            pnl = size_usd - acc["open_usd"]
+            acc["closed"] += 1
+            acc["wins"] += int(pnl > 0)
+            acc["pnl"] += pnl
+            acc["holding"] += date_idx - acc["open_idx"]
+            acc["open_usd"], acc["open_idx"] = None, None
+    return acc
+
+def accumulated_trade_stats(acc: Dict[str, Any]) -> Dict[str, Any]:
+    """trade_stats() from trade accumulators instead of the whole ledger."""
+    closed = acc["closed"]
+    return {
+        "total_trades": acc["exits"],
+        "win_rate_pct": float(acc["wins"] / closed * 100.0) if closed else None,
+        "avg_profit_per_closed_trade": float(acc["pnl"] / closed) if closed else None,
+        "avg_holding_bars": float(acc["holding"] / closed) if closed else None,
+    }
+
+def pair_trades(ledger: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Match entries with exits on a trade ledger, vectorized. Positions never
+    overlap, so the k-th exit closes the k-th BUY (an entry still open at the
+    end has no exit). Returns per closed trade: entry/exit indices, P&L in
+    USD and holding period in bars.
+    """
+    is_buy = ledger["action"] == BUY
+    entries, exits = ledger[is_buy], ledger[~is_buy]
+    m = min(len(entries), len(exits))
+    entries, exits = entries[:m], exits[:m]
+    return {
+        "entry_idx": entries["date_idx"],
+        "exit_idx": exits["date_idx"],
+        "pnl": exits["size_usd"] - entries["size_usd"],
+        "holding_bars": exits["date_idx"] - entries["date_idx"],
+    }
+
+def trade_stats(ledger: np.ndarray) -> Dict[str, Any]:
+    """Total closed trades, win rate, average P&L and average holding period of a ledger."""
+    pairs = pair_trades(ledger)
+    closed = len(pairs["pnl"])
+    return {
+        "total_trades": int(np.count_nonzero(ledger["action"] != BUY)),
+        "win_rate_pct": float(np.count_nonzero(pairs["pnl"] > 0) / closed * 100.0) if closed else None,
+        "avg_profit_per_closed_trade": float(pairs["pnl"].mean()) if closed else None,
+        "avg_holding_bars": float(pairs["holding_bars"].mean()) if closed else None,
+    }
+
+def trades_to_records(ledger: np.ndarray) -> List[Dict[str, Any]]:
+    """
+    JSON-ready trade dicts for a ledger (API boundary): date_idx, action,
+    price, size_asset, size_usd, plus drawdown for risk exits.
+    """
+    records = []
+    for date_idx, action, price, size_asset, size_usd, drawdown in ledger.tolist():
+        record = {
+            "date_idx": date_idx,
+            "action": TRADE_ACTIONS[action],
+            "price": price,
+            "size_asset": size_asset,
+            "size_usd": size_usd
+        }
+        if action in (STOP_LOSS, TAKE_PROFIT):
+            record["drawdown"] = drawdown
+        records.append(record)
+    return records
+
+def calculate_metrics(equity_curve: np.ndarray, initial_capital: float = 1000.0, periods_per_year: int = 252) -> Dict[str, Any]:
     """
     Compute standard backtest metrics:
-     - cumulative return, annualized sharpe (assume daily returns), max drawdown (abs and pct)
+     - cumulative return, annualized sharpe (per-bar returns scaled by periods_per_year), max drawdown (abs and pct)
     """
     if len(equity_curve) < 2:
         return {
@@ -151,7 +325,7 @@ def calculate_metrics(equity_curve: np.ndarray, initial_capital: float = 1000.0)
     cum_return = float(equity_curve[-1] / initial_capital - 1.0)
     mean_r = float(np.nanmean(returns))
     std_r = float(np.nanstd(returns, ddof=0)) if len(returns) > 1 else 0.0
-    sharpe = (mean_r / (std_r + 1e-9)) * math.sqrt(252) if std_r > 0 else 0.0
+    sharpe = (mean_r / (std_r + 1e-9)) * math.sqrt(periods_per_year) if std_r > 0 else 0.0
 
     # Max drawdown
     running_max = np.maximum.accumulate(equity_curve)
@@ -194,30 +368,111 @@ def save_report_json(report: Dict[str, Any], output_dir: str, filename: str = "b
         json.dump(report, f, indent=2, default=float)
     return path
 
-def backtest_from_probabilities(
+def load_train_report(model_path: str = OOF_MODEL_PATH) -> Optional[Dict[str, Any]]:
+    """The training report next to a release's fold models, or None (the shipped models/final has none)."""
+    path = os.path.join(model_path, TRAIN_REPORT)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def oof_end_date(model_path: str = OOF_MODEL_PATH) -> str:
+    """Bar the OOF arrays in `model_path` end on: the training report's oof_end_date, else OOF_END_DATE."""
+    report = load_train_report(model_path)
+    return report["oof_end_date"] if report is not None else OOF_END_DATE
+
+def load_oof_probabilities(
+    model_path: str = OOF_MODEL_PATH,
+    base_models: List[str] = OOF_BASE_MODELS,
+    kind: str = OOF_KIND,
+    end_date: Optional[str] = None,
+    components: bool = False
+) -> pd.DataFrame:
+    """
+    Build the ensemble probability series from the stored OOF arrays
+    (mean across architectures, like the live ensemble). No model is loaded.
+    The arrays end on `end_date` (default: oof_end_date(model_path)).
+    Returns a DataFrame with columns: [timestamp, probability]
+    (plus prob_<arch> per architecture with `components`).
+    """
+    arrays = []
+    for name in base_models:
+        path = os.path.join(model_path, name, f"{name}_{kind}.npy")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Missing OOF array: {path}")
+        arrays.append(np.load(path))
+
+    stacked = np.vstack(arrays)
+    report = load_train_report(model_path)
+    if report is not None and report.get("windows") not in (None, stacked.shape[1]):
+        raise ValueError(f"OOF arrays in {model_path} have {stacked.shape[1]} entries, "
+                         f"{TRAIN_REPORT} says {report['windows']}: retrain or republish the release")
+    end_date = end_date or oof_end_date(model_path)
+    covered = np.all(stacked != 0.0, axis=0)
+    timestamps = pd.date_range(end=pd.Timestamp(end_date), periods=stacked.shape[1], freq="D")
+
+    out = pd.DataFrame({
+        "timestamp": timestamps[covered],
+        "probability": stacked[:, covered].mean(axis=0)
+    })
+    if components:
+        for name, values in zip(base_models, stacked):
+            out[f"{COMPONENT_PREFIX}{name}"] = values[covered]
+    return out
+
+def align_probabilities(dates: List[Any], probs: pd.DataFrame) -> np.ndarray:
+    """Look up a [timestamp, probability] series at `dates`; NaN where it has no value."""
+    series = pd.Series(probs["probability"].to_numpy(dtype=float), index=pd.to_datetime(probs["timestamp"]))
+    return series.reindex(pd.to_datetime(pd.Index(dates))).to_numpy(dtype=float)
+
+def compare_probabilities(dates: List[Any], probs_a: pd.DataFrame, probs_b: pd.DataFrame, threshold: float = 0.27) -> Dict[str, Any]:
+    """
+    Agreement between two probability series on the dates both cover:
+    mean/max absolute difference, correlation and signal agreement at `threshold`.
+    """
+    a = align_probabilities(dates, probs_a)
+    b = align_probabilities(dates, probs_b)
+    both = ~np.isnan(a) & ~np.isnan(b)
+    if not both.any():
+        return {"overlap": 0}
+
+    a, b = a[both], b[both]
+    diff = np.abs(a - b)
+    return {
+        "overlap": int(both.sum()),
+        "mean_abs_diff": float(diff.mean()),
+        "max_abs_diff": float(diff.max()),
+        "correlation": float(np.corrcoef(a, b)[0, 1]) if len(a) > 1 else None,
+        "signal_agreement_pct": float(np.mean(generate_signals(a, threshold) == generate_signals(b, threshold)) * 100.0)
+    }
+
+
+def resolve_probabilities(
     prices: np.ndarray,
-    y_prob: np.ndarray,
+    y_prob: Optional[pd.DataFrame],
     dates: Optional[List[Any]] = None,
-    threshold: float = 0.27,
-    stop_loss: Optional[float] = 0.05,
-    take_profit: Optional[float] = 0.10,
-    initial_capital: float = 10000.0,
-    fee: float = 0.001,
-    slippage: float = 0.0005,
-    position_size: float = 1.0,
-    output_dir: str = "backtest_results",
-    return_json: bool = True
-) -> Dict[str, Any]:
+    prob_source: str = "live",
+    oof_kind: str = OOF_KIND
+):
     """
-    High-level function that:
-      - converts probabilities -> signals
-      - simulates trades
-      - calculates metrics
-      - prepares chart-ready output
-      - optionally saves a JSON report and returns the report dict
+    The (prices, probabilities, dates) series a backtest actually trades on:
+    the stored out-of-fold ensemble aligned to `dates` (prob_source="oof",
+    uncovered bars dropped) or y_prob["probability"], end-aligned with prices.
     """
     prices = np.asarray(prices, dtype=float)
-    y_prob = np.asarray(y_prob["probability"], dtype=float)
+
+    if prob_source == "oof":
+        if dates is None:
+            raise ValueError("OOF mode needs dates to align the stored probabilities")
+        aligned = align_probabilities(dates, load_oof_probabilities(kind=oof_kind))
+        covered = ~np.isnan(aligned)
+        if not covered.any():
+            raise ValueError("No out-of-fold predictions cover the requested dates")
+        prices = prices[covered]
+        y_prob = aligned[covered]
+        dates = [d for d, c in zip(dates, covered) if c]
+    else:
+        y_prob = np.asarray(y_prob["probability"], dtype=float)
 
     if len(prices) != len(y_prob):
         # Allow y_prob length to be len(prices) or len(prices)-?; simplest is to align from the end
@@ -227,6 +482,35 @@ def backtest_from_probabilities(
         if dates is not None:
             dates = dates[-min_len:]
 
+    return prices, y_prob, dates
+
+def simulate_from_probabilities(
+    prices: np.ndarray,
+    y_prob: Optional[pd.DataFrame],
+    dates: Optional[List[Any]] = None,
+    threshold: float = 0.27,
+    stop_loss: Optional[float] = 0.05,
+    take_profit: Optional[float] = 0.10,
+    initial_capital: float = 10000.0,
+    fee: float = FEE,
+    slippage: float = SLIPPAGE,
+    position_size: float = 1.0,
+    interval: str = "1d",
+    prob_source: str = "live",
+    oof_kind: str = OOF_KIND
+) -> Dict[str, Any]:
+    """
+    Array-level core of backtest_from_probabilities:
+      - (prob_source="oof") replaces y_prob with the stored out-of-fold ensemble,
+        aligned to `dates` and trimmed to the bars it covers
+      - converts probabilities -> signals
+      - simulates trades
+      - calculates metrics
+    Returns config, metrics, raw stats, the trade ledger and the equity/buy&hold
+    curves as arrays, with per-bar `dates`, but no per-point chart or trade dicts.
+    """
+    prices, y_prob, dates = resolve_probabilities(prices, y_prob, dates, prob_source=prob_source, oof_kind=oof_kind)
+
     signals = generate_signals(y_prob, threshold=threshold)
 
     sim = simulate_trades(
@@ -244,38 +528,20 @@ def backtest_from_probabilities(
     bh_curve = sim["buy_and_hold_curve"]
     trades = sim["trades"]
 
-    metrics = calculate_metrics(equity_curve, initial_capital=initial_capital)
-
-    # extra trade stats: total trades, win rate (approx using SELL vs BUY P&L)
-    total_trades = sum(1 for t in trades if t["action"] in ("SELL", "TAKE_PROFIT", "STOP_LOSS"))
-    # approximate win-rate: compute P&L for each closed pair (BUY/SELL)
-    wins = 0
-    profits = []
-    stack = []
-    for t in trades:
-        if t["action"] == "BUY":
-            stack.append(t)
-        else:
-            if stack:
-                buy = stack.pop(0)
-                sell = t
-                pnl = sell["size_usd"] - buy["size_usd"]
-                profits.append(float(pnl))
-                if pnl > 0:
-                    wins += 1
-    win_rate = (wins / len(profits) * 100.0) if len(profits) else None
-    avg_profit = float(np.mean(profits)) if len(profits) else None
-
-    # Prepare chart data (dates optional)
+    metrics = calculate_metrics(equity_curve, initial_capital=initial_capital,
+                                periods_per_year=PERIODS_PER_YEAR[interval])
+
+    # Closed-trade stats, vectorized over the ledger
+    stats = trade_stats(trades)
+
+    # Dates (optional)
     if dates is None:
         # generate simple date indices if none provided
         dates_out = list(range(len(equity_curve)))
     else:
         dates_out = [str(d) for d in dates[-len(equity_curve):]]
 
-    equity_chart = prepare_chart_data(dates_out, equity_curve, bh_curve)
-
-    report = {
+    return {
         "config": {
             "threshold": threshold,
             "stop_loss": stop_loss,
@@ -283,7 +549,9 @@ def backtest_from_probabilities(
             "initial_capital": initial_capital,
             "fee": fee,
             "slippage": slippage,
-            "position_size": position_size
+            "position_size": position_size,
+            "interval": interval,
+            "prob_source": prob_source
         },
         "metrics": {
             "final_equity": metrics["final_equity"],
@@ -291,11 +559,14 @@ def backtest_from_probabilities(
             "sharpe_ratio": metrics["sharpe_ratio"],
             "max_drawdown": metrics["max_drawdown"],
             "max_drawdown_pct": metrics["max_drawdown_pct"],
-            "total_trades": total_trades,
-            "win_rate_pct": win_rate,
-            "avg_profit_per_closed_trade": avg_profit
+            "total_trades": stats["total_trades"],
+            "win_rate_pct": stats["win_rate_pct"],
+            "avg_profit_per_closed_trade": stats["avg_profit_per_closed_trade"],
+            "avg_holding_bars": stats["avg_holding_bars"]
         },
-        "equity_curve": equity_chart,
+        "equity_curve": equity_curve,
+        "buy_and_hold_curve": bh_curve,
+        "dates": dates_out,
         "trades": trades,
         "raw": {
             "prices_length": int(len(prices)),
@@ -305,8 +576,233 @@ def backtest_from_probabilities(
         }
     }
 
+def backtest_from_probabilities(
+    prices: np.ndarray,
+    y_prob: Optional[pd.DataFrame],
+    dates: Optional[List[Any]] = None,
+    threshold: float = 0.27,
+    stop_loss: Optional[float] = 0.05,
+    take_profit: Optional[float] = 0.10,
+    initial_capital: float = 10000.0,
+    fee: float = FEE,
+    slippage: float = SLIPPAGE,
+    position_size: float = 1.0,
+    output_dir: str = "backtest_results",
+    return_json: bool = True,
+    interval: str = "1d",
+    prob_source: str = "live",
+    oof_kind: str = OOF_KIND
+) -> Dict[str, Any]:
+    """
+    High-level function that:
+      - runs simulate_from_probabilities (signals, trades, metrics)
+      - prepares chart-ready output
+      - optionally saves a JSON report and returns the report dict
+    `trades` stays a TRADE_DTYPE ledger; trades_to_records() turns it into dicts.
+    """
+    sim = simulate_from_probabilities(
+        prices=prices,
+        y_prob=y_prob,
+        dates=dates,
+        threshold=threshold,
+        stop_loss=stop_loss,
+        take_profit=take_profit,
+        initial_capital=initial_capital,
+        fee=fee,
+        slippage=slippage,
+        position_size=position_size,
+        interval=interval,
+        prob_source=prob_source,
+        oof_kind=oof_kind
+    )
+
+    equity_chart = prepare_chart_data(sim["dates"], sim["equity_curve"], sim["buy_and_hold_curve"])
+
+    report = {
+        "config": sim["config"],
+        "metrics": sim["metrics"],
+        "equity_curve": equity_chart,
+        "trades": sim["trades"],
+        "raw": sim["raw"]
+    }
+
     if return_json:
-        saved = save_report_json(report, output_dir=output_dir)
+        saved = save_report_json({**report, "trades": trades_to_records(report["trades"])}, output_dir=output_dir)
         report["report_path"] = saved
 
-    return report
\ No newline at end of file
+    return report
+
+def incremental_backtest(
+    prices: np.ndarray,
+    y_prob: np.ndarray,
+    dates: List[Any],
+    checkpoint: Optional[Dict[str, Any]] = None,
+    threshold: float = 0.27,
+    stop_loss: Optional[float] = 0.05,
+    take_profit: Optional[float] = 0.10,
+    initial_capital: float = 10000.0,
+    fee: float = FEE,
+    slippage: float = SLIPPAGE,
+    position_size: float = 1.0,
+    interval: str = "1d"
+):
+    """
+    backtest_from_probabilities(return_json=False) for a run that only grows
+    at the end. `checkpoint` is what a previous call over the same config and
+    start returned; `prices`, `y_prob` (array) and `dates` then start at its
+    first unsimulated bar (checkpoint["state"]["bars"]), so simulation and
+    metrics cost O(new bars). Without a checkpoint they cover the whole run.
+    Returns (report, checkpoint for the next call).
+    """
+    prices = np.asarray(prices, dtype=float)
+    y_prob = np.asarray(y_prob, dtype=float)
+    dates = [str(d) for d in dates]
+    if len(prices) == 0 or len(prices) != len(y_prob):
+        raise ValueError("prices and y_prob must be non-empty and of the same length")
+    state = checkpoint["state"] if checkpoint is not None else None
+
+    sim = simulate_trades(
+        prices=prices,
+        signals=generate_signals(y_prob, threshold=threshold),
+        fee=fee,
+        slippage=slippage,
+        stop_loss=stop_loss,
+        take_profit=take_profit,
+        initial_capital=initial_capital,
+        position_size=position_size,
+        state=state
+    )
+    state = sim["state"]
+    initial_capital = state["initial_capital"]
+    simulated = len(prices) - 1  # the last bar is marked to market only; the next call acts on it
+
+    # Whole-run series: checkpointed bars + this call's bars
+    prior = checkpoint or {"equity": np.empty(0), "buy_and_hold": np.empty(0), "dates": [],
+                           "trades": np.empty(0, dtype=TRADE_DTYPE), "probs": None}
+    equity = np.concatenate((prior["equity"], sim["equity_curve"]))
+    buy_and_hold = np.concatenate((prior["buy_and_hold"], sim["buy_and_hold_curve"]))
+    trades = np.concatenate((prior["trades"], sim["trades"]))
+    probs = _accumulate_probs(prior["probs"], y_prob[:simulated])
+    final_probs = _accumulate_probs(probs, y_prob[simulated:])
+
+    metrics = accumulated_metrics(accumulate_equity(state["equity"], sim["equity_curve"][simulated:]),
+                                  initial_capital=initial_capital, periods_per_year=PERIODS_PER_YEAR[interval])
+    stats = accumulated_trade_stats(state["trades"])
+
+    report = {
+        "config": {
+            "threshold": threshold,
+            "stop_loss": stop_loss,
+            "take_profit": take_profit,
+            "initial_capital": initial_capital,
+            "fee": fee,
+            "slippage": slippage,
+            "position_size": position_size,
+            "interval": interval,
+            "prob_source": "live"
+        },
+        "metrics": {
+            "final_equity": metrics["final_equity"],
+            "cumulative_return": metrics["cumulative_return"],
+            "sharpe_ratio": metrics["sharpe_ratio"],
+            "max_drawdown": metrics["max_drawdown"],
+            "max_drawdown_pct": metrics["max_drawdown_pct"],
+            **stats
+        },
+        "equity_curve": prepare_chart_data(prior["dates"] + dates, equity, buy_and_hold),
+        "trades": trades,
+        "raw": {
+            "prices_length": int(len(equity)),
+            "probs_min": final_probs["min"],
+            "probs_max": final_probs["max"],
+            "probs_mean": final_probs["sum"] / final_probs["count"]
+        },
+        "incremental": {"resumed_bars": int(len(prior["equity"])), "simulated_bars": int(len(prices))}
+    }
+
+    checkpoint = {
+        "state": state,
+        "equity": equity[:-1],
+        "buy_and_hold": buy_and_hold[:-1],
+        "dates": (prior["dates"] + dates)[:-1],
+        "trades": trades,
+        "probs": probs,
+        "next_date": dates[-1],  # first unsimulated bar: where the next call starts
+        # Last simulated bar, checked against the snapshot when the next call resumes
+        "last_date": dates[-2] if simulated else prior.get("last_date"),
+        "last_close": float(prices[-2]) if simulated else prior.get("last_close")
+    }
+    return report, checkpoint
+
+def _accumulate_probs(acc: Optional[Dict[str, float]], probs: np.ndarray) -> Optional[Dict[str, float]]:
+    if len(probs) == 0:
+        return acc
+    chunk = {"min": float(np.min(probs)), "max": float(np.max(probs)), "sum": float(np.sum(probs)), "count": len(probs)}
+    if acc is None:
+        return chunk
+    return {"min": min(acc["min"], chunk["min"]), "max": max(acc["max"], chunk["max"]),
+            "sum": acc["sum"] + chunk["sum"], "count": acc["count"] + chunk["count"]}
+
+def sub_ensembles(architectures: List[str]) -> List[List[str]]:
+    """Every non-empty subset of `architectures`, largest first (the full ensemble leads)."""
+    return [list(c) for r in range(len(architectures), 0, -1) for c in combinations(architectures, r)]
+
+def ablation_from_probabilities(
+    prices: np.ndarray,
+    y_prob: pd.DataFrame,
+    dates: List[Any],
+    threshold: float = 0.27,
+    folds: bool = True,
+    **kwargs
+) -> List[Dict[str, Any]]:
+    """
+    Score ensemble components side by side on the same bars, from one
+    probability frame with per-component columns (predict_arrays or
+    load_oof_probabilities with components=True):
+      - every sub-ensemble of architectures (mean of their prob_<arch> columns),
+        from the full ensemble down to each architecture alone
+      - with `folds`, every single fold model (prob_<arch>_fold<k>, live only)
+    The frame is aligned to `dates` by timestamp. kwargs go to
+    simulate_from_probabilities. Returns one row per candidate with its
+    metrics and its agreement with the full ensemble.
+    """
+    aligned = y_prob.set_index(pd.to_datetime(y_prob["timestamp"])).reindex(pd.to_datetime(pd.Index(dates)))
+    covered = aligned["probability"].notna().to_numpy()
+    if not covered.any():
+        raise ValueError("No component probabilities cover the requested dates")
+    aligned = aligned[covered]
+    prices = np.asarray(prices, dtype=float)[covered]
+    dates = [d for d, c in zip(dates, covered) if c]
+
+    columns = [c for c in aligned.columns if c.startswith(COMPONENT_PREFIX)]
+    architectures = [c[len(COMPONENT_PREFIX):] for c in columns if "_fold" not in c]
+    if not architectures:
+        raise ValueError("Probabilities have no per-architecture columns")
+
+    candidates = []
+    for members in sub_ensembles(architectures):
+        probs = aligned[[f"{COMPONENT_PREFIX}{a}" for a in members]].to_numpy(dtype=float).mean(axis=1)
+        kind = "ensemble" if len(members) == len(architectures) else "architecture" if len(members) == 1 else "sub_ensemble"
+        candidates.append(("+".join(members), kind, members, probs))
+    if folds:
+        for col in columns:
+            if "_fold" in col:
+                name = col[len(COMPONENT_PREFIX):]
+                candidates.append((name, "fold", [name.split("_fold")[0]], aligned[col].to_numpy(dtype=float)))
+
+    full_signals = generate_signals(candidates[0][3], threshold)
+    rows = []
+    for name, kind, members, probs in candidates:
+        sim = simulate_from_probabilities(prices, pd.DataFrame({"probability": probs}), dates=dates,
+                                          threshold=threshold, **kwargs)
+        rows.append({
+            "name": name,
+            "kind": kind,
+            "members": members,
+            "metrics": sim["metrics"],
+            "probs_mean": float(np.mean(probs)),
+            "buy_signal_pct": float(np.mean(generate_signals(probs, threshold)) * 100.0),
+            "signal_agreement_pct": float(np.mean(generate_signals(probs, threshold) == full_signals) * 100.0),
+            "mean_abs_diff": float(np.mean(np.abs(probs - candidates[0][3])))
+        })
+    return rows
@@ -0,0 +1,126 @@
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+
+from backtest.backtest import TRADE_DTYPE
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+CHECKPOINT_DIR = "data/checkpoints"
+KEEP_CHECKPOINTS = 256   # newest checkpoint files kept; older (config, start) pairs start over with a full run
+
+
+class CheckpointStore:
+    """
+    Incremental backtest checkpoints on disk, one file per (config, start bar,
+    model release): the simulator state plus the processed equity / buy&hold
+    curves, dates and trade ledger, so the next request only simulates (and
+    scores) bars added since. Each checkpoint records the feature snapshot
+    version it was scored on and is only resumed on that snapshot. Files are
+    written atomically and shared by all API workers.
+    """
+
+    def __init__(self, checkpoint_dir=CHECKPOINT_DIR, keep=KEEP_CHECKPOINTS):
+        self.checkpoint_dir = checkpoint_dir
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    # --------------------------
+    # Keys
+    # --------------------------
+    @staticmethod
+    def key(**config):
+        """Stable key for a backtest config (threshold, SL/TP, capital, fees, interval, start bar, model version, ...)."""
+        payload = json.dumps({k: config[k] for k in sorted(config)}, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+    def _path(self, key):
+        return os.path.join(self.checkpoint_dir, f"{key}.npz")
+
+    # --------------------------
+    # Load / validate
+    # --------------------------
+    def load(self, key, snap, first):
+        """
+        (checkpoint, status) for `key` against `snap`: status is "hit", "miss"
+        (none stored) or "stale" (stored but no longer fits; checkpoint None).
+        `first` is the snapshot row of the run's first bar; a checkpoint fits
+        when it was scored on the same snapshot version (any pipeline run,
+        e.g. the daily scaler refit, starts over) and its last processed bar
+        sits at the same row with the same date and close.
+        """
+        checkpoint = self._read(key)
+        if checkpoint is None:
+            return None, "miss"
+
+        last = first + checkpoint["state"]["bars"] - 1
+        if checkpoint.get("snapshot") != snap.version or last < first or last >= len(snap) - 1 \
+                or snap.dates(last, last + 1)[0] != checkpoint["last_date"] \
+                or not np.isclose(float(snap.close[last]), checkpoint["last_close"]):
+            return None, "stale"
+        return checkpoint, "hit"
+
+    def _read(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                return {
+                    **meta,
+                    "equity": data["equity"],
+                    "buy_and_hold": data["buy_and_hold"],
+                    "dates": data["dates"].tolist(),
+                    "trades": data["trades"].astype(TRADE_DTYPE)
+                }
+        except (OSError, ValueError, KeyError):
+            print(f"[CheckpointStore] Unreadable checkpoint {path}, ignoring it")
+            return None
+
+    # --------------------------
+    # Save
+    # --------------------------
+    def save(self, key, checkpoint, force=False):
+        """
+        Persist `checkpoint` under `key` unless the stored one already covers
+        more bars (a request with an earlier end date). `force` replaces it
+        anyway (the stored one no longer fits the data).
+        """
+        path = self._path(key)
+        if not force:
+            stored = self._read(key)
+            if stored is not None and stored["state"]["bars"] >= checkpoint["state"]["bars"]:
+                return False
+
+        meta = {k: checkpoint[k] for k in ("state", "probs", "next_date", "last_date", "last_close", "snapshot")}
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                meta=np.array(json.dumps(meta)),
+                equity=np.asarray(checkpoint["equity"], dtype=float),
+                buy_and_hold=np.asarray(checkpoint["buy_and_hold"], dtype=float),
+                dates=np.array(checkpoint["dates"], dtype=str),
+                trades=checkpoint["trades"]
+            )
+        os.replace(tmp, path)
+        self._prune()
+        return True
+
+    def _prune(self):
+        """Drop the least recently written checkpoints beyond `keep`."""
+        with self._lock:
+            files = [os.path.join(self.checkpoint_dir, f) for f in os.listdir(self.checkpoint_dir) if f.endswith(".npz")]
+            if len(files) <= self.keep:
+                return
+            files.sort(key=os.path.getmtime, reverse=True)
+            for path in files[self.keep:]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import asyncio
+import pandas as pd
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+HEARTBEAT_SEC = 15          # idle interval before a heartbeat is sent
+SUBSCRIBER_QUEUE = 8        # pending events per listener; oldest dropped when full
+HISTORY_FILE = "data/predictions/historical_probs.csv"
+
+
+# ==============================
+# SIGNAL FEED
+# ==============================
+class SignalFeed:
+    """
+    Fan-out of the latest scored bar to SSE / WebSocket listeners.
+
+    Protocol: a `snapshot` event with the current state on subscribe, then one
+    `signal` event per newly scored bar, and `heartbeat` events while idle.
+    Each listener is an asyncio.Queue on the API event loop, so thousands of
+    listeners cost no threads. publish() is safe to call from worker threads.
+    """
+
+    def __init__(self, heartbeat=HEARTBEAT_SEC, queue_size=SUBSCRIBER_QUEUE):
+        self.heartbeat = heartbeat
+        self.queue_size = queue_size
+        self.latest = None          # last published payload
+        self.seq = 0
+        self.subscribers = set()
+        self.loop = None
+
+    # --------------------------
+    # Lifecycle
+    # --------------------------
+    def bind(self, loop):
+        """Attach to the server event loop (called on startup)."""
+        self.loop = loop
+
+    def seed_from_history(self, path=HISTORY_FILE):
+        """Use the last stored probability as the initial snapshot."""
+        if self.latest is not None or not os.path.exists(path):
+            return
+        history = pd.read_csv(path)
+        if history.empty:
+            return
+        last = history.iloc[-1]
+        self.latest = {
+            "seq": 0,
+            "bar": str(last["timestamp"]),
+            "probability": round(float(last["probability"]), 4),
+            "close": float(last["close"]),
+            "source": "history",
+            "published_at": None
+        }
+
+    # --------------------------
+    # Publish
+    # --------------------------
+    def publish(self, payload):
+        """
+        Publish a scored bar ({bar, probability, ...}). Re-scores of the same bar
+        with the same probability are ignored. Returns True if an event was sent.
+        """
+        if self.latest is not None and self.latest.get("bar") == payload.get("bar") \
+                and self.latest.get("probability") == payload.get("probability"):
+            return False
+
+        self.seq += 1
+        event = dict(payload, seq=self.seq, published_at=time.time())
+        self.latest = event
+
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._fanout, event)
+        return True
+
+    def _fanout(self, event):
+        for queue in list(self.subscribers):
+            if queue.full():
+                queue.get_nowait()  # slow listener: drop its oldest pending event
+            queue.put_nowait(event)
+
+    # --------------------------
+    # Subscribe
+    # --------------------------
+    async def events(self):
+        """Async iterator of (event, data): snapshot, then signal/heartbeat."""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        try:
+            yield "snapshot", self.latest
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=self.heartbeat)
+                    yield "signal", event
+                except asyncio.TimeoutError:
+                    yield "heartbeat", {"ts": time.time(), "seq": self.seq}
+        finally:
+            self.subscribers.discard(queue)
+
+    async def sse(self):
+        """events() encoded as Server-Sent Events."""
+        async for event, data in self.events():
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    def stats(self):
+        return {"listeners": len(self.subscribers), "seq": self.seq, "latest": self.latest}
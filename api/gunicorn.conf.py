@@ -0,0 +1,17 @@
+# Multi-worker serving: gunicorn -c gunicorn.conf.py main:app
+#
+# Each worker imports the app itself (no preload_app): the master never
+# imports TensorFlow or runs the pipeline, and nothing TensorFlow-related
+# crosses a fork. The memory-mapped feature snapshots are the same files in
+# every worker, so they are still shared through the page cache.
+#
+# Per-process state is not shared between workers: background jobs (POST
+# /jobs/backtest is refused with WEB_CONCURRENCY > 1), request coalescing,
+# admission limits, drift histograms and signal feed subscribers.
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("WORKER_TIMEOUT", "300"))   # first request in a worker loads the ensemble
+graceful_timeout = 30
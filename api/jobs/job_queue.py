@@ -0,0 +1,151 @@
+import os
+import time
+import uuid
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))            # concurrent jobs
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "32"))   # queued + running before submits are refused
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))   # seconds a finished job is kept
+
+
+class JobQueueFull(Exception):
+    """Raised when the queue already holds JOB_MAX_PENDING unfinished jobs."""
+
+
+# ==============================
+# JOB
+# ==============================
+class Job:
+    """State of one submitted job. Mutated only by the worker running it."""
+
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = "queued"  # queued -> running -> done | failed
+        self.progress = 0.0
+        self.stage = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def update(self, progress, stage=None):
+        """Progress callback handed to the job function (0.0 - 1.0)."""
+        self.progress = round(min(max(float(progress), 0.0), 1.0), 4)
+        if stage is not None:
+            self.stage = stage
+
+    def to_dict(self):
+        duration = None
+        if self.started_at is not None:
+            duration = (self.finished_at or time.time()) - self.started_at
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "stage": self.stage,
+            "params": self.params,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_sec": round(duration, 3) if duration is not None else None,
+            "error": self.error,
+            "expires_at": self.finished_at + JOB_RESULT_TTL if self.finished else None
+        }
+
+
+# ==============================
+# JOB QUEUE
+# ==============================
+class JobQueue:
+    """
+    In-process job runner: a bounded thread pool fed by a local queue.
+    Finished jobs (and their results) are kept for `result_ttl` seconds.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, max_pending=JOB_MAX_PENDING, result_ttl=JOB_RESULT_TTL):
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self.jobs = {}  # { job_id: Job }
+        self._lock = threading.Lock()
+
+    # --------------------------
+    # Submit
+    # --------------------------
+    def submit(self, kind, fn, params):
+        """
+        Queue fn(params, progress) and return the Job immediately.
+        `progress(fraction, stage)` may be called by fn to report progress.
+        """
+        with self._lock:
+            self._purge()
+            pending = sum(1 for j in self.jobs.values() if not j.finished)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} jobs pending (limit {self.max_pending})")
+
+            job = Job(kind, params)
+            self.jobs[job.id] = job
+
+        self.executor.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        job.status = "running"
+        job.stage = "started"
+        job.started_at = time.time()
+        try:
+            job.result = fn(job.params, job.update)
+            job.update(1.0, "done")
+            job.status = "done"
+        except Exception as e:
+            print(f"[JobQueue] Job {job.id} failed:", traceback.format_exc())
+            job.error = str(e)
+            job.stage = "failed"
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+
+    # --------------------------
+    # Lookup / retention
+    # --------------------------
+    def get(self, job_id):
+        """Return the Job, or None if unknown or expired."""
+        with self._lock:
+            self._purge()
+            return self.jobs.get(job_id)
+
+    def _purge(self):
+        """Drop finished jobs older than result_ttl (caller holds the lock)."""
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished and now - job.finished_at > self.result_ttl
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            self._purge()
+            counts = {}
+            for job in self.jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {
+                "workers": self.executor._max_workers,
+                "max_pending": self.max_pending,
+                "result_ttl": self.result_ttl,
+                "jobs": counts
+            }
@@ -0,0 +1,173 @@
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+from serving.report import percentile
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+API_BASE = "http://localhost:8000"
+TELEGRAM_BASE = "http://127.0.0.1:8081"
+FIRST_USER_ID = 100000
+BOT_COMMANDS = [("/signal", 0.7), ("/backtest", 0.3)]    # mix after each user's /start
+BOT_REPLY_TIMEOUT = 120
+SHED_STATUS = (429, 503)
+
+
+# ==============================
+# RESULTS
+# ==============================
+class Results:
+    """Per-endpoint latencies and outcomes, shared by all simulated clients."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)   # {endpoint: [(seconds, status), ...]}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, status):
+        with self._lock:
+            self.samples[endpoint].append((seconds, status))
+
+    def summary(self, elapsed):
+        rows = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            ok = [s for s, status in samples if status == 200]
+            shed = sum(1 for _, status in samples if status in SHED_STATUS)
+            errors = len(samples) - len(ok)
+            rows[endpoint] = {
+                "requests": len(samples),
+                "rps": round(len(samples) / elapsed, 2),
+                "p50_ms": round(percentile(ok, 50) * 1000, 1) if ok else None,
+                "p95_ms": round(percentile(ok, 95) * 1000, 1) if ok else None,
+                "p99_ms": round(percentile(ok, 99) * 1000, 1) if ok else None,
+                "errors": errors,
+                "shed": shed,
+                "error_rate_pct": round(errors / len(samples) * 100, 2) if samples else 0.0
+            }
+        return rows
+
+
+def timed_get(results, endpoint, url, stream=False, timeout=300):
+    """GET `url` (reading the whole body, line by line for streams) and record it under `endpoint`."""
+    started = time.perf_counter()
+    status = 0
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as r:
+            status = r.status
+            if stream:
+                for line in r:
+                    if b'"event": "error"' in line:
+                        status = 500
+            else:
+                r.read()
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    results.record(endpoint, time.perf_counter() - started, status)
+    return status
+
+
+def _post(url, params, timeout):
+    data = urllib.parse.urlencode(params).encode()
+    try:
+        with urllib.request.urlopen(url, data=data, timeout=timeout) as r:
+            return r.status, json.load(r)
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+# ==============================
+# SIMULATED CLIENTS
+# ==============================
+def bot_user(user_id, results, args, stop):
+    """One Telegram user: /start, then commands from BOT_COMMANDS with exponential think time."""
+    commands, weights = zip(*BOT_COMMANDS)
+    command = "/start"
+    while not stop.is_set():
+        started = time.perf_counter()
+        status, sent = _post(f"{args.telegram}/_inject", {"chat_id": user_id, "text": command}, 10)
+        if status == 200:
+            status, reply = _post(f"{args.telegram}/_await",
+                                  {"chat_id": user_id, "after": sent["after"], "timeout": BOT_REPLY_TIMEOUT},
+                                  BOT_REPLY_TIMEOUT + 5)
+            if status == 200 and reply["text"].startswith("⚠️"):
+                status = 502  # bot answered with an API error
+        results.record(f"bot {command}", time.perf_counter() - started, status)
+
+        command = random.choices(commands, weights)[0]
+        stop.wait(random.expovariate(1 / args.think_sec))
+
+
+def dashboard_session(results, args, stop):
+    """One Streamlit session: signal card, then a streamed backtest with random parameters."""
+    while not stop.is_set():
+        threshold = round(random.uniform(0.2, 0.4), 2)
+        timed_get(results, "GET /health", f"{args.api}/health")
+        timed_get(results, "GET /signal/latest", f"{args.api}/signal/latest")
+        timed_get(results, "GET /predict", f"{args.api}/predict?" + urllib.parse.urlencode(
+            {"threshold": threshold, "sl": 0.05, "tp": 0.30}))
+        start = random.choice(["2018-01-01", "2020-01-01", "2022-01-01", "2024-01-01"])
+        timed_get(results, "GET /backtest/stream", f"{args.api}/backtest/stream?" + urllib.parse.urlencode(
+            {"start_date": start, "threshold": threshold, "sl": random.choice([0.03, 0.05, 0.1]),
+             "tp": random.choice([0.1, 0.2, 0.3]), "initial_capital": 1000}), stream=True)
+        stop.wait(random.expovariate(1 / args.think_sec))
+
+
+def run(args):
+    results = Results()
+    stop = threading.Event()
+    threads = [threading.Thread(target=bot_user, args=(FIRST_USER_ID + i, results, args, stop), daemon=True)
+               for i in range(args.users)]
+    threads += [threading.Thread(target=dashboard_session, args=(results, args, stop), daemon=True)
+                for _ in range(args.sessions)]
+
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+        time.sleep(args.ramp_sec / max(len(threads), 1))
+    stop.wait(max(args.duration - args.ramp_sec, 0))
+    stop.set()
+    for t in threads:
+        t.join(timeout=BOT_REPLY_TIMEOUT)
+    return results.summary(time.perf_counter() - started), time.perf_counter() - started
+
+
+def print_report(rows, elapsed, args):
+    print(f"\nusers={args.users}  sessions={args.sessions}  duration={elapsed:.1f}s")
+    print(f"{'endpoint':<22} {'reqs':>6} {'rps':>7} {'p50_ms':>9} {'p95_ms':>9} {'p99_ms':>9} {'errors':>7} {'shed':>5} {'err%':>6}")
+    for endpoint, r in rows.items():
+        print(f"{endpoint:<22} {r['requests']:>6} {r['rps']:>7} {str(r['p50_ms']):>9} {str(r['p95_ms']):>9} "
+              f"{str(r['p99_ms']):>9} {r['errors']:>7} {r['shed']:>5} {r['error_rate_pct']:>6}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate bot users and dashboard sessions against the API.")
+    parser.add_argument("--api", default=API_BASE)
+    parser.add_argument("--telegram", default=TELEGRAM_BASE, help="fake Bot API the bot is pointed at")
+    parser.add_argument("--users", type=int, default=20, help="simulated Telegram users (0 = no bot traffic)")
+    parser.add_argument("--sessions", type=int, default=4, help="simulated dashboard sessions")
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--ramp-sec", type=float, default=5)
+    parser.add_argument("--think-sec", type=float, default=2.0, help="mean pause between a client's actions")
+    parser.add_argument("--json", default=None, help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    rows, elapsed = run(args)
+    print_report(rows, elapsed, args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"users": args.users, "sessions": args.sessions, "elapsed_sec": round(elapsed, 2),
+                       "endpoints": rows}, f, indent=2)
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import sys
+import json
+import time
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+HOST = "127.0.0.1"
+PORT = 8081
+BOT_ID = 1000
+MAX_POLL_SEC = 30
+
+
+# ==============================
+# FAKE BOT API STATE
+# ==============================
+class FakeTelegram:
+    """
+    In-memory stand-in for the Telegram Bot API. The bot long-polls
+    getUpdates and answers with sendMessage exactly as against the real API.
+    The load driver injects user commands as updates (inject()) and waits for
+    the bot's reply to that chat (await_reply()). Optional flood control
+    answers sendMessage with 429 retry_after beyond `flood_rate` messages/s.
+    """
+
+    def __init__(self, flood_rate=None):
+        self.flood_rate = flood_rate
+        self.updates = []          # pending updates for getUpdates
+        self.next_update_id = 1
+        self.next_message_id = 1
+        self.replies = {}          # {chat_id: [(seq, sent_at, text), ...]}
+        self.seq = 0
+        self.sent = 0
+        self.flood_waits = 0
+        self.polls = 0             # getUpdates calls (the bot is connected once this is > 0)
+        self._window = []          # sendMessage timestamps in the last second
+        self._cond = threading.Condition()
+
+    # --------------------------
+    # Driver side
+    # --------------------------
+    def inject(self, chat_id, text):
+        """Queue a private-chat message from `chat_id`; returns the reply sequence to wait past."""
+        with self._cond:
+            update_id = self.next_update_id
+            self.next_update_id += 1
+            message = {
+                "message_id": self._message_id(),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {"id": chat_id, "is_bot": False, "first_name": f"user{chat_id}"},
+                "text": text
+            }
+            if text.startswith("/"):
+                message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+            self.updates.append({"update_id": update_id, "message": message})
+            self._cond.notify_all()
+            return self.seq
+
+    def await_reply(self, chat_id, after, timeout):
+        """First message sent to `chat_id` with sequence > `after`, or None on timeout."""
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                for seq, sent_at, text in self.replies.get(chat_id, []):
+                    if seq > after:
+                        return {"seq": seq, "sent_at": sent_at, "text": text}
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def stats(self):
+        with self._cond:
+            return {"sent": self.sent, "flood_waits": self.flood_waits, "pending_updates": len(self.updates),
+                    "chats": len(self.replies), "polls": self.polls}
+
+    # --------------------------
+    # Bot API methods
+    # --------------------------
+    def _message_id(self):
+        message_id = self.next_message_id
+        self.next_message_id += 1
+        return message_id
+
+    def get_updates(self, offset, timeout):
+        deadline = time.time() + min(timeout, MAX_POLL_SEC)
+        with self._cond:
+            self.polls += 1
+            if offset:
+                self.updates = [u for u in self.updates if u["update_id"] >= offset]
+            while not self.updates and time.time() < deadline:
+                self._cond.wait(deadline - time.time())
+            return list(self.updates)
+
+    def send_message(self, chat_id, text):
+        now = time.time()
+        with self._cond:
+            if self.flood_rate:
+                self._window = [t for t in self._window if now - t < 1.0]
+                if len(self._window) >= self.flood_rate:
+                    self.flood_waits += 1
+                    return None
+                self._window.append(now)
+            self.seq += 1
+            self.sent += 1
+            self.replies.setdefault(chat_id, []).append((self.seq, now, text))
+            if len(self.replies[chat_id]) > 100:
+                del self.replies[chat_id][:-100]
+            self._cond.notify_all()
+            return {
+                "message_id": self._message_id(),
+                "date": int(now),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {"id": BOT_ID, "is_bot": True, "first_name": "ChaseBTC"},
+                "text": text
+            }
+
+
+# ==============================
+# HTTP SERVER
+# ==============================
+def _params(handler):
+    """Bot API parameters from the query string and a form or JSON body."""
+    params = {k: v[0] for k, v in parse_qs(urlparse(handler.path).query).items()}
+    length = int(handler.headers.get("Content-Length") or 0)
+    body = handler.rfile.read(length) if length else b""
+    if body:
+        if "application/json" in (handler.headers.get("Content-Type") or ""):
+            params.update(json.loads(body))
+        else:
+            params.update({k: v[0] for k, v in parse_qs(body.decode()).items()})
+    for key, value in params.items():
+        if isinstance(value, str):
+            try:
+                params[key] = json.loads(value)
+            except ValueError:
+                pass
+    return params
+
+
+def make_handler(tg):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, payload, status=200):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self.do_POST()
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            params = _params(self)
+
+            # Driver control endpoints
+            if path == "/_inject":
+                return self._reply({"after": tg.inject(int(params["chat_id"]), str(params["text"]))})
+            if path == "/_await":
+                reply = tg.await_reply(int(params["chat_id"]), int(params["after"]), float(params.get("timeout", 60)))
+                return self._reply(reply or {"timeout": True}, 200 if reply else 504)
+            if path == "/_stats":
+                return self._reply(tg.stats())
+
+            # Bot API: /bot<token>/<method>
+            method = path.rsplit("/", 1)[-1]
+            if method == "getMe":
+                return self._reply({"ok": True, "result": {"id": BOT_ID, "is_bot": True, "first_name": "ChaseBTC",
+                                                           "username": "chasebtc_fake_bot", "can_join_groups": False,
+                                                           "can_read_all_group_messages": False,
+                                                           "supports_inline_queries": False}})
+            if method == "getUpdates":
+                updates = tg.get_updates(int(params.get("offset") or 0), float(params.get("timeout") or 0))
+                return self._reply({"ok": True, "result": updates})
+            if method == "sendMessage":
+                message = tg.send_message(int(params["chat_id"]), str(params.get("text", "")))
+                if message is None:
+                    return self._reply({"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1",
+                                        "parameters": {"retry_after": 1}}, 429)
+                return self._reply({"ok": True, "result": message})
+            # deleteWebhook, setMyCommands, answerCallbackQuery, ...
+            return self._reply({"ok": True, "result": True})
+
+    return Handler
+
+
+def serve(tg, host=HOST, port=PORT):
+    """Start the fake Bot API on a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), make_handler(tg))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-telegram", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline stand-in for the Telegram Bot API.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--flood-rate", type=float, default=None, help="sendMessage/s before answering 429")
+    args = parser.parse_args()
+
+    serve(FakeTelegram(flood_rate=args.flood_rate), args.host, args.port)
+    print(f"[FakeTelegram] Bot API on http://{args.host}:{args.port}/bot<token>/<method>")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+from loadtest import driver
+from loadtest.fake_telegram import FakeTelegram, serve
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BOT_DIR = os.path.join(os.path.dirname(API_DIR), "bot")
+API_PORT = 8090
+TELEGRAM_PORT = 8091
+READY_TIMEOUT = 600   # pipeline run + model load before the first precompute completes
+IGNORE = shutil.ignore_patterns("__pycache__", "backtest_results", "loadtest", "*.db", "*.db-*")
+
+
+def _get_json(url, timeout=5):
+    with urllib.request.urlopen(url, timeout=timeout) as r:
+        return json.load(r)
+
+
+def wait_for(check, timeout, what):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if check():
+                return
+        except Exception:
+            pass
+        time.sleep(1)
+    raise TimeoutError(f"Timed out waiting for {what}")
+
+
+def scratch_copy(workdir):
+    """Copy api/ and bot/ so the replayed pipeline run doesn't touch the real data files."""
+    shutil.copytree(API_DIR, os.path.join(workdir, "api"), ignore=IGNORE)
+    shutil.copytree(BOT_DIR, os.path.join(workdir, "bot"), ignore=IGNORE)
+    return os.path.join(workdir, "api"), os.path.join(workdir, "bot")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline end-to-end load test: API (replayed market data) + bot (fake Telegram) + driver.")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--ramp-sec", type=float, default=5)
+    parser.add_argument("--think-sec", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=1, help="API worker processes (WEB_CONCURRENCY)")
+    parser.add_argument("--flood-rate", type=float, default=None, help="fake Telegram sendMessage/s limit")
+    parser.add_argument("--json", default=None)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directory and logs")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="chasebtc-loadtest-")
+    api_dir, bot_dir = scratch_copy(workdir)
+    api_url = f"http://127.0.0.1:{API_PORT}"
+    telegram_url = f"http://127.0.0.1:{TELEGRAM_PORT}"
+    env = {**os.environ, "MARKET_DATA_SOURCE": "replay", "PYTHONUNBUFFERED": "1"}
+    processes = []
+
+    try:
+        # 1. Fake Telegram (in-process)
+        tg = FakeTelegram(flood_rate=args.flood_rate)
+        serve(tg, port=TELEGRAM_PORT)
+
+        # 2. API on replayed bars
+        print(f"[LoadTest] Starting API ({args.workers} worker(s)) in {api_dir}")
+        api_log = open(os.path.join(workdir, "api.log"), "w")
+        processes.append(subprocess.Popen(
+            ["gunicorn", "-c", "gunicorn.conf.py", "main:app"], cwd=api_dir, stdout=api_log, stderr=subprocess.STDOUT,
+            env={**env, "PORT": str(API_PORT), "WEB_CONCURRENCY": str(args.workers)}))
+        wait_for(lambda: _get_json(f"{api_url}/scheduler/status").get("last_success"), READY_TIMEOUT,
+                 "the first bar-close precompute")
+
+        # 3. Bot against the fake Bot API and the local API
+        if args.users:
+            print("[LoadTest] Starting bot against the fake Telegram API")
+            bot_log = open(os.path.join(workdir, "bot.log"), "w")
+            processes.append(subprocess.Popen(
+                [sys.executable, "bot.py"], cwd=bot_dir, stdout=bot_log, stderr=subprocess.STDOUT,
+                env={**env, "TELEGRAM_TOKEN": "1000:loadtest", "TELEGRAM_BASE_URL": f"{telegram_url}/bot",
+                     "API_BASE": api_url, "BOT_DB": os.path.join(workdir, "bot.db")}))
+            wait_for(lambda: tg.polls > 0, 60, "the bot to poll for updates")
+
+        # 4. Drive
+        print(f"[LoadTest] Driving {args.users} bot user(s) and {args.sessions} dashboard session(s) "
+              f"for {args.duration:.0f}s")
+        rows = driver.main([
+            "--api", api_url, "--telegram", telegram_url, "--users", str(args.users),
+            "--sessions", str(args.sessions), "--duration", str(args.duration), "--ramp-sec", str(args.ramp_sec),
+            "--think-sec", str(args.think_sec)] + (["--json", args.json] if args.json else []))
+
+        print(f"\nfake telegram: {tg.stats()}")
+        print(f"admission: {json.dumps(_get_json(f'{api_url}/admission')['lanes'])}")
+        return rows
+
+    finally:
+        for p in processes:
+            p.terminate()
+        for p in processes:
+            try:
+                p.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                p.kill()
+        if args.keep:
+            print(f"[LoadTest] Logs and scratch copy kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
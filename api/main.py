@@ -1,27 +1,202 @@
-from fastapi import FastAPI, Query
-from pydantic import BaseModel
+from fastapi import FastAPI, Query, HTTPException, WebSocket, WebSocketDisconnect, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import List, Literal, Dict, Any, Optional
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import datetime
 import traceback
+import asyncio
+import time
 import os
+from urllib.parse import parse_qs
+import anyio
 
-from prediction.prediction import PredictionEngine
+from prediction.prediction import MODEL_PATHS, TOP_FEATURES, FIDELITY_PROFILES, DEFAULT_PROFILE
+from prediction.fidelity import load_report as load_fidelity_report
+from prediction.registry import ModelRegistry
+from prediction.batcher import InferenceBatcher
 from pipeline.data_pipeline import (
     fetch_raw_data,
-    build_features
+    build_features,
+    features_path,
+    run_pipeline
 )
-from backtest.backtest import backtest_from_probabilities
+from pipeline.features import bars, min_history_days
+from backtest.backtest import (
+    backtest_from_probabilities,
+    simulate_from_probabilities,
+    resolve_probabilities,
+    load_oof_probabilities,
+    compare_probabilities,
+    ablation_from_probabilities,
+    incremental_backtest,
+    save_report_json,
+    trades_to_records,
+    FEE,
+    SLIPPAGE,
+    PERIODS_PER_YEAR
+)
+from backtest.checkpoints import CheckpointStore
+from store.feature_store import FeatureStore
+from store.signal_history import SignalHistory
+from streaming.stream import STREAM_CHUNK, MEDIA_TYPES, encode_event, iter_backtest_events
+from jobs.job_queue import JobQueue, JobQueueFull
+from feed.signal_feed import SignalFeed
+from scheduler.precompute import PrecomputeScheduler
+from serving.workers import WorkerStats, STATS_FLUSH_SEC, acquire_leader, preload_snapshots
+from monitoring.drift import DriftMonitor
+from serving.admission import AdmissionController, AdmissionMiddleware
+from serving.coalescing import RequestCoalescer, CoalescingMiddleware, normalized_query
 
 # router = APIRouter()
 # Load recent features
-features_path = "data/features/features_labeled.parquet"
-FEATURES_FILE = Path(features_path)
+FEATURES_FILE = Path(features_path(labeled=True))
+Interval = Literal["1d", "1h"]
+Fidelity = Literal[tuple(FIDELITY_PROFILES)]
+FIDELITY_DESCRIPTION = "Fold models to run: full ensemble or a reduced profile (see /fidelity)"
+
+# Memory-mapped feature/price snapshots, one store per bar interval
+FEATURE_STORES = {}
+
+def get_feature_store(interval: str) -> FeatureStore:
+    if interval not in FEATURE_STORES:
+        FEATURE_STORES[interval] = FeatureStore(interval=interval)
+    return FEATURE_STORES[interval]
+
+# Versioned ensembles, hot-swapped when models/manifest*.json changes
+MODEL_REGISTRIES = {}
+
+def get_model_registry(interval: str) -> ModelRegistry:
+    if interval not in MODEL_REGISTRIES:
+        manifest_name = "manifest.json" if interval == "1d" else f"manifest_{interval}.json"
+        MODEL_REGISTRIES[interval] = ModelRegistry(manifest_name=manifest_name, default_path=MODEL_PATHS[interval])
+    return MODEL_REGISTRIES[interval]
+
+def model_release(interval: str):
+    """The active release for `interval`; a 404 (not a 500) when its ensemble was never trained."""
+    try:
+        return get_model_registry(interval).acquire()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=(
+            f"No trained {interval} models ({e}). Train them first: python -m training.train "
+            f"--labels {features_path(interval, labeled=True)} --out {MODEL_PATHS[interval]}"))
+
+# Live-vs-training drift of daily probabilities and features (reference: stored OOF outputs)
+drift_monitor = DriftMonitor(get_feature_store("1d"), TOP_FEATURES)
+
+# Micro-batching in front of each registry: concurrent single-window requests share one ensemble pass
+BATCHERS = {}
+
+def get_batcher(interval: str) -> InferenceBatcher:
+    if interval not in BATCHERS:
+        BATCHERS[interval] = InferenceBatcher(get_model_registry(interval))
+    return BATCHERS[interval]
 
 # --- FastAPI Init ---
 app = FastAPI(title="Chase BTC API", version="1.0")
 
+# --- Background jobs (local thread pool, no external broker) ---
+# Job state lives in this process: with several workers a poll could land on a
+# worker that never saw the job, so jobs are only accepted with a single worker.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+job_queue = JobQueue()
+
+# --- Live signal feed (SSE / WebSocket) ---
+signal_feed = SignalFeed()
+
+# --- Bar-close precompute (features, probabilities, signal) ---
+PRECOMPUTE_ENABLED = os.getenv("PRECOMPUTE_ENABLED", "1") == "1"
+precompute = PrecomputeScheduler(run_pipeline, get_feature_store("1d"), get_model_registry("1d"), feed=signal_feed,
+                                 monitor=drift_monitor)
+get_model_registry("1d").on_swap(precompute.invalidate)
+
+# --- Multi-worker serving (see gunicorn.conf.py) ---
+worker_stats = WorkerStats()
+
+async def flush_worker_stats():
+    while True:
+        worker_stats.flush()
+        await asyncio.sleep(STATS_FLUSH_SEC)
+
+# --- Admission control (per-lane concurrency limits, bounded queues, load shedding) ---
+def classify_request(path: str, query: str) -> Optional[str]:
+    """Lane for a request; None = priority lane (health checks, cached reads)."""
+    if path in ("/backtest", "/backtest/stream", "/backtest/series"):
+        return "backtest"
+    if path == "/signal/history":
+        # History lookups are cheap; dates missing from it may need an ensemble pass
+        fallback = parse_qs(query).get("fallback", ["true"])[0].lower() in ("1", "true", "yes", "on")
+        return "predict" if fallback else None
+    if path == "/predict":
+        # Served from the precompute unless fresh, hourly or not computed yet
+        params = parse_qs(query)
+        fresh = params.get("fresh", ["false"])[0].lower() in ("1", "true", "yes", "on")
+        if fresh or params.get("interval", ["1d"])[0] != "1d" or precompute.latest is None:
+            return "predict"
+    return None
+
+admission = AdmissionController(classify_request)
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
+# --- Request coalescing (identical in-flight /predict and /backtest requests share one computation) ---
+def coalesce_key(path: str, query: str):
+    """Normalized parameters of an expensive /predict or /backtest request; None = never coalesced."""
+    endpoints = {"/predict": predict, "/backtest": run_backtest}
+    if path not in endpoints or classify_request(path, query) is None:
+        return None
+    return normalized_query(query, endpoints[path])
+
+coalescer = RequestCoalescer(coalesce_key)
+app.add_middleware(CoalescingMiddleware, coalescer=coalescer)  # outermost: followers never take a lane slot
+
+@app.on_event("startup")
+async def start_signal_feed():
+    worker_stats.reset()
+    # Enough sync-endpoint threads that the limited lanes can't use them all up
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, admission.thread_budget())
+    signal_feed.bind(asyncio.get_running_loop())
+    signal_feed.seed_from_history()
+    get_model_registry("1d").start()
+    if PRECOMPUTE_ENABLED:
+        # One worker runs the bar-close job (pipeline first); the others follow its history file
+        worker_stats.leader = acquire_leader()
+        precompute.start(run_now=True, leader=worker_stats.leader)
+    elif acquire_leader():
+        # No scheduler: one worker refreshes the features once at startup
+        worker_stats.leader = True
+        asyncio.get_running_loop().run_in_executor(None, run_pipeline)
+    # Map the feature snapshot up front; every worker maps the same files, shared through the page cache
+    asyncio.get_running_loop().run_in_executor(None, preload_snapshots, [get_feature_store("1d")])
+    asyncio.get_running_loop().create_task(flush_worker_stats())
+    asyncio.get_running_loop().run_in_executor(None, seed_drift_monitor)
+
+def seed_drift_monitor():
+    try:
+        drift_monitor.seed_from_history()
+    except Exception:
+        print("[DriftMonitor] Seeding failed:", traceback.format_exc())
+
+@app.on_event("shutdown")
+def stop_worker_stats():
+    worker_stats.remove()
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    """Per-worker latency by route (time to response headers for streams)."""
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        worker_stats.record(route.path if route is not None else "unmatched",
+                            time.perf_counter() - started, status_code)
+
 # --- Response Schemas ---
 class PredictResponse(BaseModel):
     timestamp: str
@@ -31,6 +206,7 @@ class PredictResponse(BaseModel):
     stop_loss: float
     take_profit: float
     model_version: str
+    fidelity: str = DEFAULT_PROFILE
 
 class ErrorResponse(BaseModel):
     error: str
@@ -43,6 +219,7 @@ class Metrics(BaseModel):
     total_trades: int
     win_rate_pct: Optional[float] = None
     avg_profit_per_closed_trade: Optional[float] = None
+    avg_holding_bars: Optional[float] = None
 
 class EquityPoint(BaseModel):
     date: str
@@ -55,6 +232,119 @@ class BacktestResponse(BaseModel):
     equity_curve: List[EquityPoint]
     trades: List[Dict[str, Any]]  # each trade can have variable keys like date_idx, action, price, size_asset, drawdown
     raws: Dict[str, Any]
+    comparison: Optional[Dict[str, Any]] = None
+    ablation: Optional[List[Dict[str, Any]]] = None
+    incremental: Optional[Dict[str, Any]] = None
+
+def format_metrics(bt_results: Dict[str, Any]) -> Dict[str, Any]:
+    """Map backtest_from_probabilities metrics onto the API's Metrics schema."""
+    return {
+        "sharpe": bt_results["metrics"]["sharpe_ratio"],
+        "max_drawdown": bt_results["metrics"]["max_drawdown_pct"],
+        "cumulative_return": bt_results["metrics"]["cumulative_return"],
+        "final_equity": bt_results["metrics"]["final_equity"],
+        "total_trades": bt_results["metrics"]["total_trades"],
+        "win_rate_pct": bt_results["metrics"]["win_rate_pct"],
+        "avg_profit_per_closed_trade": bt_results["metrics"]["avg_profit_per_closed_trade"],
+        "avg_holding_bars": bt_results["metrics"]["avg_holding_bars"],
+    }
+
+def load_backtest_window(start_date: str, end_date: str, interval: str, mode: str = "live"):
+    """
+    Resolve a backtest request to (snapshot, lo, hi) rows of the memory-mapped
+    feature store. Raises FileNotFoundError/ValueError with a client-facing message.
+    """
+    if mode == "oof" and interval != "1d":
+        raise ValueError("Out-of-fold probabilities are only available for daily bars.")
+
+    # Load cached features (memory-mapped snapshot, refreshed when the manifest changes)
+    try:
+        snap = get_feature_store(interval).snapshot()
+    except FileNotFoundError:
+        raise FileNotFoundError("Features file not found. Please run /update first.")
+
+    # Apply date filter (binary search on the sorted timestamp index)
+    lo, hi = snap.range(start_date or None, end_date or None)
+    if hi == lo:
+        raise ValueError("No data available for the given date range.")
+    return snap, lo, hi
+
+def live_probabilities(snap, lo: int, hi: int, interval: str, progress=None, components: bool = False,
+                       fidelity: str = DEFAULT_PROFILE) -> pd.DataFrame:
+    """Run the active ensemble release (the fold models of `fidelity`) over rows [lo, hi) of a feature snapshot."""
+    engine = model_release(interval).engine
+    return engine.predict_arrays(snap.features[lo:hi], snap.timestamps[lo:hi], snap.close[lo:hi], progress=progress,
+                                 components=components, profile=fidelity)
+
+# Per-(config, start bar, release) backtest checkpoints: daily reruns only score and simulate new bars
+backtest_checkpoints = CheckpointStore()
+
+def incremental_live_backtest(snap, lo: int, hi: int, interval: str, fidelity: str, **config) -> Optional[Dict[str, Any]]:
+    """
+    Live-mode backtest over rows [lo, hi) resumed from its checkpoint: only
+    bars after the checkpoint's cursor are scored and simulated. Falls back
+    to a full run (and re-checkpoints) when there is no checkpoint, it was
+    scored on another feature snapshot, the last checkpointed bar's date or
+    close changed or the range ends before the cursor. The report file is
+    only written when the checkpoint advanced. Returns None if the range is
+    too short for one sequence (the caller's full path reports the error).
+    """
+    release = model_release(interval)
+    engine = release.engine
+    first = lo + engine.seq_len   # snapshot row of the run's first bar (first scored window)
+    if hi <= first:
+        return None
+
+    key = backtest_checkpoints.key(start=snap.dates(lo, lo + 1)[0], interval=interval, fidelity=fidelity,
+                                   model_version=release.version, fee=FEE, slippage=SLIPPAGE, **config)
+    checkpoint, status = backtest_checkpoints.load(key, snap, first)
+    cursor = first if checkpoint is None else first + checkpoint["state"]["bars"]
+    if cursor >= hi:
+        checkpoint, cursor, status = None, first, "ends_before_checkpoint"
+
+    probs = engine.predict_arrays(snap.features[cursor - engine.seq_len:hi], snap.timestamps[cursor - engine.seq_len:hi],
+                                  snap.close[cursor - engine.seq_len:hi], profile=fidelity)
+    report, checkpoint = incremental_backtest(
+        prices=snap.close[cursor:hi],
+        y_prob=probs["probability"].to_numpy(),
+        dates=snap.dates(cursor, hi),
+        checkpoint=checkpoint,
+        interval=interval,
+        **config
+    )
+    checkpoint["snapshot"] = snap.version
+    report["incremental"]["checkpoint"] = status
+    if backtest_checkpoints.save(key, checkpoint, force=status == "stale"):
+        report["report_path"] = save_report_json({**report, "trades": trades_to_records(report["trades"])},
+                                                 output_dir="backtest_results")
+    return report
+
+def format_backtest_response(bt_results: Dict[str, Any], include_trades: bool = True) -> Dict[str, Any]:
+    """Shape a backtest_from_probabilities report like BacktestResponse (trade dicts only if requested)."""
+    return {
+        "metrics": format_metrics(bt_results),
+        "equity_curve": bt_results["equity_curve"],
+        "trades": trades_to_records(bt_results["trades"]) if include_trades else [],
+        "raws": bt_results.get("raws", {}),
+    }
+
+class BacktestJobRequest(BaseModel):
+    start_date: str = "2015-01-01"
+    end_date: str = Field(default_factory=lambda: datetime.datetime.today().strftime("%Y-%m-%d"))
+    threshold: float = 0.27
+    sl: float = 0.05
+    tp: float = 0.3
+    initial_capital: float = 1000.0
+    position_size: float = 1.0
+    interval: Literal["1d", "1h"] = "1d"
+    mode: Literal["live", "oof"] = "live"
+    fidelity: Fidelity = DEFAULT_PROFILE
+
+class JobSubmitted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+    result_url: str
 
 # --- Home Endpoint ---
 @app.get("/", response_model=dict)
@@ -72,34 +362,54 @@ def predict(
     threshold: float = Query(0.27, description="BUY signal threshold"),
     sl: float = Query(0.05, description="Stop loss percentage (e.g., 0.05 = 5%)"),
     tp: float = Query(0.30, description="Take profit percentage (e.g., 0.10 = 10%)"),
-    days_back: int = Query(60, description="How many days of BTC data to fetch")
+    days_back: Optional[int] = Query(None, description="How many days of BTC data to fetch (default: the model features' minimum lookback)"),
+    interval: Interval = Query("1d", description="Bar interval (1d or 1h)"),
+    fresh: bool = Query(False, description="Ignore the precomputed bar-close signal and score live data"),
+    fidelity: Fidelity = Query(DEFAULT_PROFILE, description=FIDELITY_DESCRIPTION)
 ):
     """
     Predict BTC trading signal using live market data.
     Dynamically returns action, confidence, SL/TP suggestions, and timestamp.
+    Daily signals are served from the bar-close precompute when available.
+    The precompute scores the full ensemble over the default lookback, so a
+    reduced `fidelity` or an explicit `days_back` is scored live instead.
     """
-    try:
-        engine = PredictionEngine()
-        engine.load_models()
+    cached = fidelity == DEFAULT_PROFILE and days_back is None
+    if interval == "1d" and not fresh and cached and precompute.latest is not None:
+        prob = precompute.latest["probability"]
+        return PredictResponse(
+            timestamp=datetime.datetime.utcnow().isoformat(),
+            signal=precompute.engine.generate_signal(prob, threshold),
+            probability=round(float(prob), 4),
+            confidence=round(min((prob / 0.7) * 100, 100.0), 2),
+            stop_loss=round(-sl, 4),
+            take_profit=round(tp, 4),
+            model_version=precompute.latest["model_version"],
+            fidelity=DEFAULT_PROFILE
+        )
 
+    engine = model_release(interval).engine
+    try:
         # Load recent features
         # features_path = "data/features/features_labeled.parquet"
         # if not os.path.exists(features_path):
         #     raise FileNotFoundError(f"Feature file not found: {features_path}")
 
-        df = fetch_raw_data(days_back)
-        df = build_features(df)
+        # Only the model's features, over just enough history for one sequence
+        history_days = min_history_days(TOP_FEATURES, engine.seq_len, interval)
+        df = fetch_raw_data(days_back or history_days, interval=interval)
+        df = build_features(df.tail(bars(history_days, interval)), interval=interval, features=TOP_FEATURES)
 
-        # Live prediction
+        # Live prediction (batched with concurrent requests; reports the release that scored it)
         seq = engine.prepare_sequence(df)
-        prob = engine.predict_single_sequence(seq)
+        probs, model_version = get_batcher(interval).predict(seq, profile=fidelity)
+        prob = float(probs[0])
         # scale probability to confidence (0–70% → 0–100%)
         adjusted_confidence = min((prob / 0.7) * 100, 100.0)
         signal = engine.generate_signal(prob, threshold)
 
         print(f"Live Signal -> Action: {signal}, Probability: {prob:.4f}")
 
-
         # 6. Build response
         return PredictResponse(
             timestamp=datetime.datetime.utcnow().isoformat(),
@@ -108,7 +418,8 @@ def predict(
             confidence=round(adjusted_confidence, 2),
             stop_loss=round(-sl, 4),
             take_profit=round(tp, 4),
-            model_version="v1.0"
+            model_version=model_version,
+            fidelity=fidelity
         )
 
     except Exception as e:
@@ -125,56 +436,459 @@ def run_backtest(
     sl: float = Query(0.05, description="Stop loss %"),
     tp: float = Query(0.3, description="Take profit %"),
     initial_capital: float = Query(1000.0, description="Starting portfolio value"),
-    position_size: float = Query(1.0, description="Percentage of capital allocation per signal 0 - 1")
+    position_size: float = Query(1.0, description="Percentage of capital allocation per signal 0 - 1"),
+    interval: Interval = Query("1d", description="Bar interval (1d or 1h)"),
+    mode: Literal["live", "oof"] = Query("live", description="live = re-run the ensemble, oof = stored out-of-fold probabilities"),
+    compare: bool = Query(False, description="In oof mode, also run live inference and report the differences"),
+    ablation: bool = Query(False, description="Also score each architecture, sub-ensemble and (live mode) fold model side by side"),
+    include_trades: bool = Query(True, description="Return the per-trade list (metrics are computed either way)"),
+    fidelity: Fidelity = Query(DEFAULT_PROFILE, description=FIDELITY_DESCRIPTION),
+    incremental: bool = Query(True, description="Live mode: resume from this config's checkpoint (same model release and feature snapshot) and only score/simulate new bars")
 ):
-    # 1. Load cached features
-    if not FEATURES_FILE.exists():
-        return {"error": "Features file not found. Please run /update first."}
-
-    df = pd.read_parquet(FEATURES_FILE)
-    df.reset_index(inplace=True)  # Ensure timestamp is a column
+    # 1. Resolve the date range on the cached feature store
+    try:
+        snap, lo, hi = load_backtest_window(start_date, end_date, interval, mode)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # Apply date filter
-    if start_date:
-        df = df[df["timestamp"] >= start_date]
-    if end_date:
-        df = df[df["timestamp"] <= end_date]
+    # Checkpointed path: same report, O(new bars) when the run was computed before
+    if mode == "live" and incremental and not ablation:
+        bt_results = incremental_live_backtest(snap, lo, hi, interval, fidelity, threshold=threshold, stop_loss=sl,
+                                               take_profit=tp, initial_capital=initial_capital,
+                                               position_size=position_size)
+        if bt_results is not None:
+            response = format_backtest_response(bt_results, include_trades=include_trades)
+            response["incremental"] = bt_results["incremental"]
+            return response
 
-    if df.empty:
-        return {"error": "No data available for the given date range."}
+    prices = snap.close[lo:hi]
+    dates = snap.dates(lo, hi)
 
-    prices = df["close"].values
-    dates = df["timestamp"].astype(str).tolist()
+    # 2. Predict probabilities with cached ensemble (skipped entirely in oof mode)
+    # (with ablation, the same pass also returns per-architecture / per-fold columns)
+    probs = None
+    if mode == "live" or compare:
+        probs = live_probabilities(snap, lo, hi, interval, components=ablation and mode == "live", fidelity=fidelity)
 
-    # 2. Predict probabilities with cached ensemble
-    engine = PredictionEngine()
-    probs = engine.predict_dataframe(df)
     # 3. Run backtest
-    bt_results = backtest_from_probabilities(
+    bt_kwargs = dict(
         prices=prices,
-        y_prob=probs,
         dates=dates,
         threshold=threshold,
         stop_loss=sl,
         take_profit=tp,
         initial_capital=initial_capital,
-        position_size=position_size
+        position_size=position_size,
+        interval=interval
     )
+    try:
+        bt_results = backtest_from_probabilities(y_prob=probs, prob_source=mode, **bt_kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     # 4. Format response
-    response = {
-        "metrics": {
-            "sharpe": bt_results["metrics"]["sharpe_ratio"],
-            "max_drawdown": bt_results["metrics"]["max_drawdown_pct"],
-            "cumulative_return": bt_results["metrics"]["cumulative_return"],
-            "final_equity": bt_results["metrics"]["final_equity"],
-            "total_trades": bt_results["metrics"]["total_trades"],
-            "win_rate_pct": bt_results["metrics"]["win_rate_pct"],
-            "avg_profit_per_closed_trade": bt_results["metrics"]["avg_profit_per_closed_trade"],
-        },
-        "equity_curve": bt_results["equity_curve"],
-        "trades": bt_results.get("trades", []),
-        "raws": bt_results.get("raws", {}),
+    response = format_backtest_response(bt_results, include_trades=include_trades)
+
+    if mode == "oof" and compare:
+        live_results = backtest_from_probabilities(y_prob=probs, return_json=False, **bt_kwargs)
+        response["comparison"] = {
+            "probabilities": compare_probabilities(dates, load_oof_probabilities(), probs, threshold=threshold),
+            "live_metrics": format_metrics(live_results),
+        }
+
+    if ablation:
+        components = probs if mode == "live" else load_oof_probabilities(components=True)
+        rows = ablation_from_probabilities(y_prob=components, **bt_kwargs)
+        response["ablation"] = [{**row, "metrics": format_metrics(row)} for row in rows]
+
+    return response
+
+# --- /backtest/stream Endpoint ---
+@app.get("/backtest/stream")
+def stream_backtest(
+    start_date: str = Query("2015-01-01", description="Backtest start date (YYYY-MM-DD)"),
+    end_date: str = Query(datetime.datetime.today().strftime("%Y-%m-%d"), description="Backtest end date (YYYY-MM-DD)"),
+    threshold: float = Query(0.27, description="Decision threshold for BUY/HOLD"),
+    sl: float = Query(0.05, description="Stop loss %"),
+    tp: float = Query(0.3, description="Take profit %"),
+    initial_capital: float = Query(1000.0, description="Starting portfolio value"),
+    position_size: float = Query(1.0, description="Percentage of capital allocation per signal 0 - 1"),
+    interval: Interval = Query("1d", description="Bar interval (1d or 1h)"),
+    mode: Literal["live", "oof"] = Query("live", description="live = re-run the ensemble, oof = stored out-of-fold probabilities"),
+    format: Literal["ndjson", "sse"] = Query("ndjson", description="ndjson lines or Server-Sent Events"),
+    chunk_size: int = Query(STREAM_CHUNK, ge=1, le=10000, description="Equity points / trades per event"),
+    fidelity: Fidelity = Query(DEFAULT_PROFILE, description=FIDELITY_DESCRIPTION)
+):
+    """
+    Same backtest as /backtest, streamed as events:
+    meta -> metrics -> equity chunks -> trades chunks -> end (or error).
+    """
+    if mode == "live":
+        model_release(interval)  # missing models: a 404 before the stream starts, not an error event
+    def events():
+        try:
+            snap, lo, hi = load_backtest_window(start_date, end_date, interval, mode)
+            dates = snap.dates(lo, hi)
+            yield encode_event("meta", {"rows": hi - lo, "start": dates[0], "end": dates[-1], "mode": mode}, format)
+
+            probs = live_probabilities(snap, lo, hi, interval, fidelity=fidelity) if mode == "live" else None
+            sim = simulate_from_probabilities(
+                prices=snap.close[lo:hi],
+                y_prob=probs,
+                dates=dates,
+                threshold=threshold,
+                stop_loss=sl,
+                take_profit=tp,
+                initial_capital=initial_capital,
+                position_size=position_size,
+                interval=interval,
+                prob_source=mode
+            )
+            for event, data in iter_backtest_events(sim, format_metrics(sim), chunk_size):
+                yield encode_event(event, data, format)
+        except Exception as e:
+            print("Backtest Stream Error:", traceback.format_exc())
+            yield encode_event("error", {"error": str(e)}, format)
+
+    return StreamingResponse(events(), media_type=MEDIA_TYPES[format])
+
+
+# --- /backtest/series Endpoint ---
+@app.get("/backtest/series")
+def backtest_series(
+    start_date: str = Query("2015-01-01", description="Series start date (YYYY-MM-DD)"),
+    end_date: str = Query(datetime.datetime.today().strftime("%Y-%m-%d"), description="Series end date (YYYY-MM-DD)"),
+    interval: Interval = Query("1d", description="Bar interval (1d or 1h)"),
+    mode: Literal["live", "oof"] = Query("live", description="live = re-run the ensemble, oof = stored out-of-fold probabilities"),
+    fidelity: Fidelity = Query(DEFAULT_PROFILE, description=FIDELITY_DESCRIPTION)
+):
+    """
+    The per-bar close prices and ensemble probabilities a backtest over this
+    range trades on, plus the cost model, so a client can re-run the trade
+    simulation itself when only threshold / SL / TP / sizing / capital change.
+    """
+    try:
+        snap, lo, hi = load_backtest_window(start_date, end_date, interval, mode)
+        probs = live_probabilities(snap, lo, hi, interval, fidelity=fidelity) if mode == "live" else None
+        prices, y_prob, dates = resolve_probabilities(snap.close[lo:hi], probs, snap.dates(lo, hi), prob_source=mode)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "interval": interval,
+        "mode": mode,
+        "fee": FEE,
+        "slippage": SLIPPAGE,
+        "periods_per_year": PERIODS_PER_YEAR[interval],
+        "dates": [str(d) for d in dates],
+        "close": [float(p) for p in prices],
+        "probability": [float(p) for p in y_prob]
+    }
+
+
+# --- Background backtest jobs ---
+def backtest_job(params: Dict[str, Any], progress) -> Dict[str, Any]:
+    """Job body for POST /jobs/backtest; reports progress through the stages."""
+    progress(0.02, "loading features")
+    snap, lo, hi = load_backtest_window(params["start_date"], params["end_date"], params["interval"], params["mode"])
+
+    probs = None
+    if params["mode"] == "live":
+        progress(0.05, "inference")
+        probs = live_probabilities(snap, lo, hi, params["interval"], fidelity=params["fidelity"],
+                                   progress=lambda f: progress(0.05 + 0.85 * f, "inference"))
+
+    progress(0.9, "simulating")
+    bt_results = backtest_from_probabilities(
+        prices=snap.close[lo:hi],
+        y_prob=probs,
+        dates=snap.dates(lo, hi),
+        threshold=params["threshold"],
+        stop_loss=params["sl"],
+        take_profit=params["tp"],
+        initial_capital=params["initial_capital"],
+        position_size=params["position_size"],
+        interval=params["interval"],
+        prob_source=params["mode"],
+        return_json=False
+    )
+    return format_backtest_response(bt_results)
+
+@app.post("/jobs/backtest", response_model=JobSubmitted, status_code=202)
+def submit_backtest_job(request: BacktestJobRequest):
+    """Queue a backtest and return its job id immediately."""
+    if WEB_CONCURRENCY > 1:
+        raise HTTPException(status_code=409, detail="Background jobs need a single API worker (WEB_CONCURRENCY=1); "
+                                                    "use /backtest/stream with several workers")
+    if request.mode == "live":
+        model_release(request.interval)  # fail now with a 404, not later inside the job
+    try:
+        job = job_queue.submit("backtest", backtest_job, request.model_dump())
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+
+    return JobSubmitted(
+        job_id=job.id,
+        status=job.status,
+        status_url=f"/jobs/{job.id}",
+        result_url=f"/jobs/{job.id}/result"
+    )
+
+@app.get("/jobs")
+def jobs_stats():
+    return job_queue.stats()
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job id")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/result", response_model=BacktestResponse)
+def job_result(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job id")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    if not job.finished:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status} ({job.progress:.0%})",
+                            headers={"Retry-After": "5"})
+    return job.result
+
+
+# --- Live signal feed ---
+@app.get("/signal/latest")
+def signal_latest():
+    """Current feed snapshot (the last scored bar), without subscribing."""
+    return {"snapshot": signal_feed.latest, "listeners": len(signal_feed.subscribers)}
+
+# Point-in-time lookups over the precompute's probability history (scored at each bar's close)
+signal_history = SignalHistory(precompute.history_file)
+MAX_SIGNAL_DATES = 5000
+
+def score_bars_at(dates: np.ndarray):
+    """
+    Score the daily bars at `dates` the way the precompute does (window ending
+    at the bar), in one batched ensemble pass. Returns (probability, close,
+    scored mask, model version); dates without a bar or enough history stay NaN.
+    """
+    probs, closes = np.full(len(dates), np.nan), np.full(len(dates), np.nan)
+    snap = get_feature_store("1d").snapshot()
+    release = get_model_registry("1d").acquire()
+    seq_len = release.engine.seq_len
+
+    rows = np.searchsorted(snap.timestamps, dates, side="left")
+    scored = (rows < len(snap)) & (rows >= seq_len - 1)
+    scored[scored] = snap.timestamps[rows[scored]] == dates[scored]
+    if scored.any():
+        unique_rows, inverse = np.unique(rows[scored], return_inverse=True)
+        windows = np.lib.stride_tricks.sliding_window_view(snap.features, seq_len, axis=0).transpose(0, 2, 1)
+        X = np.ascontiguousarray(windows[unique_rows - (seq_len - 1)], dtype=np.float32)
+        probs[scored] = release.engine.predict_batch(X)[inverse]
+        closes[scored] = snap.close[unique_rows][inverse]
+    return probs, closes, scored, release.version
+
+@app.get("/signal/history")
+def signal_at_dates(
+    dates: Optional[str] = Query(None, description="Comma-separated dates (YYYY-MM-DD)"),
+    start_date: Optional[str] = Query(None, description="Range start (YYYY-MM-DD), instead of `dates`"),
+    end_date: Optional[str] = Query(None, description="Range end (YYYY-MM-DD, inclusive)"),
+    threshold: float = Query(0.27, description="BUY signal threshold"),
+    fallback: bool = Query(True, description="Score dates missing from the history (one batched ensemble pass)")
+):
+    """
+    Daily signal as of past dates: the probability each bar was scored with at
+    its close, looked up in the precompute's history by binary search. Dates
+    the history doesn't cover are scored from the feature store in one batch.
+    """
+    # 1. Requested dates: an explicit list, or every bar in the range
+    try:
+        if dates:
+            requested = pd.to_datetime([d.strip() for d in dates.split(",") if d.strip()]).normalize()
+        elif start_date or end_date:
+            calendar = signal_history.between(start_date, end_date)
+            try:
+                snap = get_feature_store("1d").snapshot()
+                lo, hi = snap.range(start_date, end_date)
+                calendar = np.union1d(calendar, snap.timestamps[lo:hi])
+            except FileNotFoundError:
+                pass
+            requested = pd.DatetimeIndex(calendar)
+        else:
+            raise ValueError("Pass `dates` or a `start_date` / `end_date` range.")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(requested) > MAX_SIGNAL_DATES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SIGNAL_DATES} dates per request.")
+    requested = requested.values.astype("datetime64[ns]")
+
+    # 2. History (one binary search for the whole batch)
+    probs, closes, found = signal_history.lookup(requested)
+    source = np.where(found, "history", "missing").astype(object)
+
+    # 3. Batched inference for the rest
+    model_version = None
+    missing = np.flatnonzero(~found)
+    if fallback and len(missing):
+        try:
+            scored_probs, scored_closes, scored, model_version = score_bars_at(requested[missing])
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        idx = missing[scored]
+        probs[idx], closes[idx], source[idx] = scored_probs[scored], scored_closes[scored], "inference"
+
+    engine = get_model_registry("1d").engine
+    rows = [
+        {
+            "date": str(pd.Timestamp(date).date()),
+            "probability": None if np.isnan(prob) else round(float(prob), 4),
+            "signal": None if np.isnan(prob) else engine.generate_signal(prob, threshold),
+            "close": None if np.isnan(close) else float(close),
+            "source": src
+        }
+        for date, prob, close, src in zip(requested, probs, closes, source)
+    ]
+    return {
+        "threshold": threshold,
+        "counts": {name: int(np.sum(source == name)) for name in ("history", "inference", "missing")},
+        "inference_model_version": model_version,
+        "rows": rows
     }
 
-    return response
\ No newline at end of file
+@app.get("/signal/stream")
+async def signal_stream():
+    """
+    Server-Sent Events: `snapshot` on connect, `signal` per newly scored bar,
+    `heartbeat` while idle. Payloads carry the probability; clients apply their own threshold.
+    """
+    return StreamingResponse(
+        signal_feed.sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/ws/signal")
+async def signal_websocket(websocket: WebSocket):
+    """Same protocol as /signal/stream, as JSON messages {event, data}."""
+    await websocket.accept()
+    try:
+        async for event, data in signal_feed.events():
+            await websocket.send_json({"event": event, "data": data})
+    except WebSocketDisconnect:
+        pass
+
+
+# --- Precompute scheduler ---
+@app.get("/scheduler/status")
+def scheduler_status():
+    """Last precompute run: state, timings, attempts, error and the latest scored bar."""
+    return precompute.status()
+
+@app.post("/scheduler/run", status_code=202)
+def scheduler_run():
+    """Trigger a precompute run now (in the background)."""
+    if not PRECOMPUTE_ENABLED:
+        raise HTTPException(status_code=409, detail="Precompute scheduler is disabled")
+    precompute.trigger()
+    return {"status": "triggered"}
+
+
+# --- Model releases ---
+@app.get("/models")
+def models_status():
+    """Active model release per interval, recent swaps and the last load error."""
+    return {interval: registry.status() for interval, registry in MODEL_REGISTRIES.items()}
+
+@app.post("/models/reload")
+def models_reload(interval: Interval = Query("1d", description="Bar interval (1d or 1h)")):
+    """Re-read the manifest now; loads, warms and swaps in a new version if it changed."""
+    registry = get_model_registry(interval)
+    try:
+        swapped = registry.check_for_update()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"swapped": swapped, **registry.status()}
+
+
+# --- Inference batching ---
+@app.get("/inference/stats")
+def inference_stats():
+    """Micro-batcher metrics per interval: batch fill, requests per batch, queueing delay, inference time."""
+    return {interval: batcher.stats() for interval, batcher in BATCHERS.items()}
+
+
+# --- Inference fidelity ---
+@app.get("/fidelity")
+def fidelity_profiles(interval: Interval = Query("1d", description="Bar interval (1d or 1h)")):
+    """
+    Fidelity profiles of the active release (architectures, fold numbers,
+    model count) with their measured accuracy cost and latency saving from
+    the release's fidelity report (`python -m prediction.fidelity`), if any.
+    """
+    release = model_release(interval)
+    profiles = {}
+    for name in FIDELITY_PROFILES:
+        try:
+            profiles[name] = release.engine.profile_summary(name)
+        except ValueError as e:
+            profiles[name] = {"error": str(e)}  # e.g. an architecture this release doesn't ship
+
+    report = load_fidelity_report(release.path)
+    if report is not None:
+        for name, measured in report["profiles"].items():
+            if name in profiles:
+                profiles[name].update({k: measured[k] for k in ("oof", "live", "latency")})
+    return {
+        "model_version": release.version,
+        "default": DEFAULT_PROFILE,
+        "profiles": profiles,
+        "report_generated_at": report["generated_at"] if report is not None else None
+    }
+
+
+# --- Admission control ---
+@app.get("/admission")
+def admission_stats():
+    """Per-lane limits, running and queued requests, shed counts (429 / 503) and the current Retry-After."""
+    return {"worker": os.getpid(), "lanes": admission.stats()}
+
+@app.get("/coalescing")
+def coalescing_stats():
+    """Per-route single-flight counts: requests, leaders that computed, followers that shared a leader's response."""
+    return {"worker": os.getpid(), "routes": coalescer.stats()}
+
+
+# --- Drift monitoring ---
+@app.get("/drift")
+def drift_report():
+    """
+    PSI / KS drift of live daily probabilities, per-architecture probabilities,
+    architecture disagreement and input features against their training-time
+    (out-of-fold) distributions. Scores are read from fixed-size streaming
+    histograms kept by this worker.
+    """
+    try:
+        return drift_monitor.report()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Drift reference unavailable: {e}")
+
+
+# --- Serving workers ---
+@app.get("/workers")
+def workers_report():
+    """Memory (RSS/PSS/USS) and per-route latency of every API worker process."""
+    workers = worker_stats.collect()
+    return {
+        "served_by": os.getpid(),
+        "workers": workers,
+        "total_pss_mb": round(sum((w["memory"] or {}).get("pss_mb", 0) for w in workers), 1),
+        "total_rss_mb": round(sum((w["memory"] or {}).get("rss_mb", 0) for w in workers), 1)
+    }
@@ -0,0 +1,228 @@
+import os
+import time
+import threading
+import numpy as np
+import pandas as pd
+
+from backtest.backtest import OOF_MODEL_PATH, OOF_BASE_MODELS, OOF_KIND, oof_end_date
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+HISTORY_FILE = "data/predictions/historical_probs.csv"
+DRIFT_BINS = int(os.getenv("DRIFT_BINS", "10"))                 # reference-quantile bins per metric
+DRIFT_HALF_LIFE = float(os.getenv("DRIFT_HALF_LIFE", "365"))    # observations; 0 = no decay
+DRIFT_MIN_OBS = int(os.getenv("DRIFT_MIN_OBS", "30"))           # fewer live points -> status "insufficient"
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+EPS = 1e-6
+
+
+# ==============================
+# STREAMING HISTOGRAM
+# ==============================
+class StreamingHistogram:
+    """
+    Fixed-bin histogram updated in O(batch) with constant memory. Bins are
+    the reference distribution's quantiles (open-ended at both sides), so
+    each bin holds ~1/bins of the reference mass. Live counts decay
+    exponentially (half-life in observations) so the histogram follows
+    recent behaviour rather than everything since startup.
+    """
+
+    def __init__(self, reference, bins=DRIFT_BINS, half_life=DRIFT_HALF_LIFE):
+        reference = np.asarray(reference, dtype=np.float64)
+        reference = reference[np.isfinite(reference)]
+        inner = np.unique(np.quantile(reference, np.linspace(0, 1, bins + 1)[1:-1]))
+        self.edges = inner                                   # len(edges) + 1 bins
+        self.reference = self._counts(reference)
+        self.reference_n = len(reference)
+        self.counts = np.zeros(len(inner) + 1)
+        self.decay = 0.5 ** (1 / half_life) if half_life > 0 else 1.0
+        self.n = 0               # observations seen
+        self.last_value = None
+
+    def _counts(self, values):
+        return np.bincount(np.searchsorted(self.edges, values, side="right"),
+                           minlength=len(self.edges) + 1).astype(np.float64)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        self.counts *= self.decay ** len(values)
+        self.counts += self._counts(values)
+        self.n += len(values)
+        self.last_value = float(values[-1])
+
+    # --------------------------
+    # Drift scores
+    # --------------------------
+    def scores(self):
+        """PSI and (binned) KS distance of the live histogram against the reference."""
+        if self.counts.sum() == 0:
+            return {"psi": None, "ks": None}
+        p = self.counts / self.counts.sum()
+        q = self.reference / self.reference.sum()
+        p_s, q_s = np.clip(p, EPS, None), np.clip(q, EPS, None)
+        psi = float(np.sum((p_s - q_s) * np.log(p_s / q_s)))
+        ks = float(np.max(np.abs(np.cumsum(p) - np.cumsum(q))))
+        return {"psi": round(psi, 4), "ks": round(ks, 4)}
+
+    def to_dict(self):
+        scores = self.scores()
+        psi = scores["psi"]
+        if psi is None:
+            status = None
+        elif self.n < DRIFT_MIN_OBS:
+            status = "insufficient"
+        else:
+            status = "ok" if psi < PSI_WARN else "warn" if psi < PSI_ALERT else "alert"
+        return {
+            **scores,
+            "status": status,
+            "observations": self.n,
+            "effective_n": round(float(self.counts.sum()), 1),
+            "reference_n": self.reference_n,
+            "last_value": self.last_value
+        }
+
+
+# ==============================
+# DRIFT MONITOR
+# ==============================
+class DriftMonitor:
+    """
+    Live-vs-training drift of ensemble probabilities, per-architecture
+    probabilities, architecture disagreement (std across architectures) and
+    input feature values at the scored bar.
+
+    References: the stored out-of-fold probabilities (training-time model
+    outputs) and the feature store rows up to the OOF end date. Each live bar
+    is observed once, when the precompute scores it (or, in follower
+    workers, when it appears in the history file); report() reads the
+    fixed-size histograms, so scoring never rescans history.
+    """
+
+    def __init__(self, feature_store=None, feature_cols=None, model_path=OOF_MODEL_PATH,
+                 base_models=OOF_BASE_MODELS, kind=OOF_KIND, end_date=None):
+        self.feature_store = feature_store
+        self.feature_cols = list(feature_cols or [])
+        self.model_path = model_path
+        self.base_models = base_models
+        self.kind = kind
+        self.end_date = pd.Timestamp(end_date or oof_end_date(model_path))
+        self.histograms = None
+        self.observed_until = self.end_date   # newest bar observed so far
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._history_lock = threading.Lock()
+
+    # --------------------------
+    # Reference
+    # --------------------------
+    def _build(self):
+        arrays = {}
+        for name in self.base_models:
+            arrays[name] = np.load(os.path.join(self.model_path, name, f"{name}_{self.kind}.npy"))
+        stacked = np.vstack(list(arrays.values()))
+        covered = np.all(stacked != 0.0, axis=0)  # 0.0 = bar never held out
+
+        histograms = {
+            "probability": StreamingHistogram(stacked[:, covered].mean(axis=0)),
+            "disagreement": StreamingHistogram(stacked[:, covered].std(axis=0)),
+        }
+        for name, values in arrays.items():
+            histograms[f"arch:{name}"] = StreamingHistogram(values[covered])
+
+        if self.feature_store is not None and self.feature_cols:
+            snap = self.feature_store.snapshot()
+            _, hi = snap.range(None, self.end_date)
+            cols = [snap.feature_cols.index(c) for c in self.feature_cols]
+            for col, name in zip(cols, self.feature_cols):
+                histograms[f"feature:{name}"] = StreamingHistogram(snap.features[:hi, col])
+        return histograms
+
+    def _ensure(self):
+        if self.histograms is None:
+            with self._lock:
+                if self.histograms is None:
+                    self.histograms = self._build()
+        return self.histograms
+
+    # --------------------------
+    # Observe
+    # --------------------------
+    def observe(self, probs, arch_probs=None, features=None, until=None):
+        """
+        Record live predictions: ensemble probabilities (n,), optional
+        {architecture: (n,)} and the feature rows of the scored bars (n, k).
+        `until` is the newest of those bars; history rows up to it are not
+        observed again by seed_from_history().
+        """
+        histograms = self._ensure()
+        with self._lock:
+            if until is not None:
+                self.observed_until = max(self.observed_until, pd.Timestamp(until))
+            histograms["probability"].update(probs)
+            known = [np.asarray(arch_probs[name]) for name in self.base_models if name in (arch_probs or {})]
+            if len(known) > 1:  # a distilled student has no architectures to disagree
+                histograms["disagreement"].update(np.vstack(known).std(axis=0))
+            for name, values in (arch_probs or {}).items():
+                if f"arch:{name}" in histograms:
+                    histograms[f"arch:{name}"].update(values)
+            if features is not None:
+                features = np.atleast_2d(np.asarray(features, dtype=np.float64))
+                for i, name in enumerate(self.feature_cols):
+                    histograms[f"feature:{name}"].update(features[:, i])
+
+    def seed_from_history(self, path=HISTORY_FILE):
+        """
+        Observe the stored predictions for bars after the newest one observed
+        so far (at first, after the OOF end date) with their feature rows
+        from the store. Run at startup, so a restarted worker reports drift
+        straight away, and by follower workers whenever the precompute
+        leader appends bars.
+        """
+        if not os.path.exists(path):
+            return
+        with self._history_lock:  # startup seeding and the follower thread must not both observe a bar
+            history = pd.read_csv(path)
+            timestamps = pd.to_datetime(history["timestamp"])
+            history = history[(timestamps > self.observed_until).to_numpy()]
+            if history.empty:
+                return
+            until = timestamps.max()
+
+            features = None
+            if self.feature_store is not None and self.feature_cols:
+                snap = self.feature_store.snapshot()
+                stamps = pd.to_datetime(history["timestamp"]).to_numpy(dtype="datetime64[ns]")
+                rows = np.clip(np.searchsorted(snap.timestamps, stamps), 0, len(snap) - 1)
+                found = snap.timestamps[rows] == stamps
+                cols = [snap.feature_cols.index(c) for c in self.feature_cols]
+                features = np.asarray(snap.features[rows[found]][:, cols], dtype=np.float64)
+                self.observe(history["probability"].to_numpy()[~found])
+                history = history[found]
+            self.observe(history["probability"].to_numpy(), features=features, until=until)
+        print(f"[DriftMonitor] Observed {len(history)} bar(s) from {path}")
+
+    # --------------------------
+    # Report
+    # --------------------------
+    def report(self):
+        histograms = self._ensure()
+        with self._lock:
+            metrics = {name: h.to_dict() for name, h in histograms.items()}
+        scored = [m for m in metrics.values() if m["status"] in ("ok", "warn", "alert")]
+        worst = max(scored, key=lambda m: m["psi"], default=None)
+        return {
+            "reference": {"kind": self.kind, "end_date": str(self.end_date.date()), "model_path": self.model_path},
+            "thresholds": {"psi_warn": PSI_WARN, "psi_alert": PSI_ALERT, "min_observations": DRIFT_MIN_OBS},
+            "half_life": DRIFT_HALF_LIFE,
+            "pid": os.getpid(),
+            "uptime_sec": round(time.time() - self.started_at, 1),
+            "status": worst["status"] if worst else None,
+            "metrics": metrics
+        }
@@ -8,6 +8,8 @@ import yfinance as yf
 import pickle
 from pathlib import Path
 
+from pipeline.features import BARS_PER_DAY, PIPELINE_FEATURES, bars, compute, scaled_features
+
 # ============================
 # CONFIG
 # ============================
@@ -22,6 +24,27 @@ SEQ_LEN = 20          # sequence length for models
 LOOK_AHEAD = 3        # days to look ahead for target
 THRESHOLD = 0.01      # 1% threshold for labeling
 
+INTERVAL = "1d"       # default bar interval (BARS_PER_DAY lives with the feature registry)
+INTRADAY_MAX_DAYS = 729   # Yahoo only serves intraday bars for the trailing ~730 days
+FEATURE_DTYPE = "float32" # storage dtype for engineered features (close stays float64)
+MARKET_DATA_SOURCE = os.getenv("MARKET_DATA_SOURCE", "yahoo")    # "replay" = bundled raw CSVs, no network
+REPLAY_SHIFT = os.getenv("MARKET_REPLAY_SHIFT", "1") == "1"      # move replayed bars so the last one is today
+
+def interval_suffix(interval: str = INTERVAL) -> str:
+    """File name suffix for an interval ("" for daily so existing paths are unchanged)."""
+    if interval not in BARS_PER_DAY:
+        raise ValueError(f"Unsupported interval: {interval}. Choose from {list(BARS_PER_DAY)}")
+    return "" if interval == "1d" else f"_{interval}"
+
+def features_path(interval: str = INTERVAL, labeled: bool = False) -> str:
+    """Path of the (labeled) feature parquet for a bar interval."""
+    name = "features_labeled" if labeled else "features"
+    return os.path.join(FEATURES_DIR, f"{name}{interval_suffix(interval)}.parquet")
+
+def manifest_path(interval: str = INTERVAL) -> str:
+    """Path of the feature manifest for a bar interval."""
+    return os.path.join(FEATURES_DIR, f"manifest{interval_suffix(interval)}.json")
+
 # Ensure directories exist
 os.makedirs(FEATURES_DIR, exist_ok=True)
 os.makedirs(RAW_DATA_DIR, exist_ok=True)
@@ -29,14 +52,20 @@ os.makedirs(RAW_DATA_DIR, exist_ok=True)
 # ============================
 # 1. FETCH RAW DATA
 # ============================
-def fetch_raw_data(days_back: int = 730, start_date: datetime | None = None) -> pd.DataFrame:
+def fetch_raw_data(days_back: int = 730, start_date: datetime | None = None, interval: str = INTERVAL) -> pd.DataFrame:
     """
     Fetch BTC-USD historical data from Yahoo Finance.
+    Intraday intervals are clamped to what Yahoo serves and merged with the
+    previously saved raw file, so the local history keeps growing past that window.
+    With MARKET_DATA_SOURCE=replay, bars come from the bundled raw CSVs instead (offline).
     """
     end_date = datetime.today()
+    if MARKET_DATA_SOURCE == "replay":
+        return replay_raw_data(start_date or end_date - timedelta(days=days_back), end_date, interval)
+    suffix = interval_suffix(interval)
 
     today_str = datetime.today().strftime("%Y-%m-%d")
-    raw_path = Path(RAW_DATA_DIR) / f"btc_raw_{today_str}.csv"
+    raw_path = Path(RAW_DATA_DIR) / f"btc_raw{suffix}_{today_str}.csv"
 
     if raw_path.exists():
         print(f"[INFO] Loading BTC-USD data from local file: {raw_path}")
@@ -49,7 +78,11 @@ def fetch_raw_data(days_back: int = 730, start_date: datetime | None = None) ->
             start_date = end_date - timedelta(days=days_back)
             print(f"[INFO] Fetching BTC-USD data from {start_date.date()} to {end_date.date()}")
 
-        df = yf.download("BTC-USD", start=start_date, end=end_date, interval="1d")
+        if interval != "1d" and (start_date is None or (end_date - start_date).days > INTRADAY_MAX_DAYS):
+            start_date = end_date - timedelta(days=INTRADAY_MAX_DAYS)
+            print(f"[WARN] {interval} bars are limited to {INTRADAY_MAX_DAYS} days, fetching from {start_date.date()}")
+
+        df = yf.download("BTC-USD", start=start_date, end=end_date, interval=interval)
         df.reset_index(inplace=True)
 
         # Flatten MultiIndex if present
@@ -59,6 +92,7 @@ def fetch_raw_data(days_back: int = 730, start_date: datetime | None = None) ->
         # Rename columns
         df.rename(columns={
             "Date": "timestamp",
+            "Datetime": "timestamp",
             "Open": "open",
             "High": "high",
             "Low": "low",
@@ -66,12 +100,51 @@ def fetch_raw_data(days_back: int = 730, start_date: datetime | None = None) ->
             "Volume": "volume"
         }, inplace=True)
 
+        if interval != "1d":
+            # Intraday timestamps come back tz-aware; store them as naive UTC
+            df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True).dt.tz_localize(None)
+            df = _merge_previous_raw(df, suffix, raw_path)
+
         # Save raw copy
-        raw_path = os.path.join(RAW_DATA_DIR, f"btc_raw_{datetime.today().date()}.csv")
+        raw_path = os.path.join(RAW_DATA_DIR, f"btc_raw{suffix}_{datetime.today().date()}.csv")
         df.to_csv(raw_path, index=False)
 
     return df
 
+def replay_raw_data(start_date: datetime, end_date: datetime, interval: str = INTERVAL) -> pd.DataFrame:
+    """
+    Offline stand-in for the Yahoo download: the newest bundled raw CSV of the
+    interval, shifted by whole bars so its last bar falls on `end_date` (unless
+    MARKET_REPLAY_SHIFT=0), then cut to [start_date, end_date]. Nothing is written.
+    """
+    suffix = interval_suffix(interval)
+    files = sorted(Path(RAW_DATA_DIR).glob(f"btc_raw{suffix}_*.csv"))
+    if not files:
+        raise FileNotFoundError(f"No raw {interval} CSV in {RAW_DATA_DIR} to replay")
+
+    df = pd.read_csv(files[-1], parse_dates=["timestamp"])
+    if REPLAY_SHIFT:
+        bar = pd.Timedelta(days=1) if interval == "1d" else pd.Timedelta(hours=24 // BARS_PER_DAY[interval])
+        shift = (pd.Timestamp(end_date).floor(bar) - df["timestamp"].iloc[-1]) // bar
+        df["timestamp"] = df["timestamp"] + shift * bar
+
+    df = df[(df["timestamp"] >= pd.Timestamp(start_date).normalize()) & (df["timestamp"] <= pd.Timestamp(end_date))]
+    print(f"[INFO] Replaying {len(df)} {interval} bars from {files[-1]}")
+    return df.reset_index(drop=True)
+
+def _merge_previous_raw(df: pd.DataFrame, suffix: str, raw_path: Path) -> pd.DataFrame:
+    """Prepend bars from the most recent earlier raw file of the same interval."""
+    previous = sorted(p for p in Path(RAW_DATA_DIR).glob(f"btc_raw{suffix}_*.csv") if p != raw_path)
+    if not previous:
+        return df
+
+    print(f"[INFO] Merging with previous raw file: {previous[-1]}")
+    old = pd.read_csv(previous[-1], parse_dates=["timestamp"])
+    merged = pd.concat([old, df], ignore_index=True)
+    merged.drop_duplicates(subset=["timestamp"], keep="last", inplace=True)
+    merged.sort_values("timestamp", inplace=True)
+    return merged.reset_index(drop=True)
+
 # ============================
 # 2. CLEAN DATA
 # ============================
@@ -90,36 +163,29 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
 # ============================
 # 3. FEATURE ENGINEERING
 # ============================
-def build_features(df: pd.DataFrame) -> pd.DataFrame:
+def build_features(df: pd.DataFrame, interval: str = INTERVAL, features: list = PIPELINE_FEATURES) -> pd.DataFrame:
     """
     Generate ML features.
+    Only `features` and the registry entries they depend on are computed
+    (see pipeline/features.py). Windows are defined in days and converted to
+    bars, so e.g. volatility_10d spans 240 bars on hourly data.
     """
-    df_feat = df.copy()
-
-    # Daily returns
-    df_feat['log_return'] = np.log(df_feat['close'] / df_feat['close'].shift(1))
-
-    # Rolling volatility
-    df_feat['volatility_10d'] = df_feat['log_return'].rolling(window=10).std()
-    df_feat['volatility_21d'] = df_feat['log_return'].rolling(window=21).std()
-
-    # Rolling returns
-    df_feat['return_3d'] = df_feat['close'].pct_change(3)
-    df_feat['return_14d'] = df_feat['close'].pct_change(14)
+    return compute(df, features, interval)
 
-    # Bollinger Bands (lower)
-    rolling_mean = df_feat['close'].rolling(window=20).mean()
-    rolling_std = df_feat['close'].rolling(window=20).std()
-    df_feat['bollinger_down'] = rolling_mean - (2 * rolling_std)
-
-    df_feat.dropna(inplace=True)
-    return df_feat
+def downcast_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Store engineered/OHLV columns as float32 to halve the footprint of long
+    (intraday) histories. `close` keeps float64 since P&L is computed from it.
+    """
+    cols = [c for c in df.select_dtypes("float64").columns if c != "close"]
+    df[cols] = df[cols].astype(FEATURE_DTYPE)
+    return df
 
 # ============================
 # 4. SCALE FEATURES
 # ============================
 def scale_features(df: pd.DataFrame, scaler: StandardScaler = None):
-    feature_cols = ['volatility_10d', 'volatility_21d', 'return_3d', 'return_14d', 'bollinger_down']
+    feature_cols = scaled_features()
     X = df[feature_cols].values
 
     if scaler is None:
@@ -135,7 +201,8 @@ def scale_features(df: pd.DataFrame, scaler: StandardScaler = None):
 # ============================
 # 5. GENERATE LABELS
 # ============================
-def generate_labels(df: pd.DataFrame, look_ahead: int = LOOK_AHEAD, threshold: float = THRESHOLD):
+def generate_labels(df: pd.DataFrame, look_ahead: int = LOOK_AHEAD, threshold: float = THRESHOLD, interval: str = INTERVAL):
+    look_ahead = bars(look_ahead, interval)
     future_close = df['close'].shift(-look_ahead)
     df['target'] = (future_close > df['close'] * (1 + threshold)).astype(int)
     df.dropna(inplace=True)
@@ -144,46 +211,51 @@ def generate_labels(df: pd.DataFrame, look_ahead: int = LOOK_AHEAD, threshold: f
 # ============================
 # 6. SAVE MANIFEST
 # ============================
-def update_manifest(latest_timestamp: str, version: str = "v1.0"):
+def update_manifest(latest_timestamp: str, version: str = "v1.0", interval: str = INTERVAL):
     manifest = {
         "last_updated": latest_timestamp,
         "feature_version": version,
         "updated_at": datetime.utcnow().isoformat()
     }
-    with open(MANIFEST_FILE, 'w') as f:
+    if interval != "1d":
+        manifest["interval"] = interval
+    with open(manifest_path(interval), 'w') as f:
         json.dump(manifest, f, indent=4)
 
 # ============================
 # 7. RUN FULL PIPELINE
 # ============================
-def run_pipeline(start_date: datetime = datetime(2015, 1, 1), force: bool = False):
-    print("[PIPELINE] Starting data pipeline...")
+def run_pipeline(start_date: datetime = datetime(2015, 1, 1), force: bool = False, interval: str = INTERVAL):
+    print(f"[PIPELINE] Starting data pipeline ({interval})...")
+    suffix = interval_suffix(interval)
 
     # Step 1: Fetch
-    df_raw = fetch_raw_data(start_date=start_date)
+    df_raw = fetch_raw_data(start_date=start_date, interval=interval)
 
     # Step 2: Clean
     df_clean = clean_data(df_raw)
 
     # Step 3: Features
-    df_features = build_features(df_clean)
+    df_features = build_features(df_clean, interval=interval)
 
     # Step 4: Scale
     df_scaled, scaler = scale_features(df_features)
-    with open(SCALER_FILE, 'wb') as f:
+    df_scaled = downcast_features(df_scaled)
+    with open(os.path.join(FEATURES_DIR, f"scaler{suffix}.pkl"), 'wb') as f:
         pickle.dump(scaler, f)
 
     # Save features without labels
-    df_scaled.to_parquet(FEATURES_FILE)
+    df_scaled.to_parquet(features_path(interval))
 
     # Step 5: Labels
-    df_labeled = generate_labels(df_scaled)
-    df_labeled.to_parquet(LABELED_FILE)
+    df_labeled = generate_labels(df_scaled, interval=interval)
+    df_labeled.to_parquet(features_path(interval, labeled=True))
 
     # Step 6: Manifest
     latest_ts = str(df_labeled.index[-1])
-    update_manifest(latest_ts)
+    update_manifest(latest_ts, interval=interval)
 
     print(f"[PIPELINE] Completed successfully. Latest date: {latest_ts}")
 
-run_pipeline()
\ No newline at end of file
+if __name__ == "__main__":
+    run_pipeline()
\ No newline at end of file
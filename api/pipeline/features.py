@@ -0,0 +1,183 @@
+import numpy as np
+
+# ============================
+# CONFIG
+# ============================
+BARS_PER_DAY = {"1d": 1, "1h": 24}
+RAW_COLUMNS = {"open", "high", "low", "close", "volume"}
+
+# Features the deployed models consume, in model input order
+MODEL_FEATURES = [
+    "volatility_21d",
+    "volatility_10d",
+    "return_14d",
+    "return_3d",
+    "bollinger_down",
+]
+
+# Columns written to the feature parquet (order preserved for existing readers)
+PIPELINE_FEATURES = [
+    "log_return",
+    "volatility_10d",
+    "volatility_21d",
+    "return_3d",
+    "return_14d",
+    "bollinger_down",
+]
+
+
+# ============================
+# REGISTRY
+# ============================
+class Feature:
+    """
+    One derived column: the columns it reads, the history its own operation
+    needs (a rolling `window` or a `shift` in days, converted to bars per
+    interval, or a fixed `bar_shift`) and the function computing it.
+    """
+
+    def __init__(self, name, inputs, fn, window=0, shift=0, bar_shift=0, scaled=False):
+        self.name = name
+        self.inputs = list(inputs)
+        self.fn = fn
+        self.window = window        # rolling(n): n - 1 earlier rows
+        self.shift = shift          # shift(n) / pct_change(n): n earlier rows
+        self.bar_shift = bar_shift  # same, in bars whatever the interval
+        self.scaled = scaled        # standardized by the pipeline scaler
+
+    def own_lookback(self, interval):
+        return self.bar_shift + bars(self.shift, interval) + max(bars(self.window, interval) - 1, 0)
+
+
+REGISTRY = {}
+
+
+def feature(name, inputs, window=0, shift=0, bar_shift=0, scaled=False):
+    """Decorator registering fn(df, interval) -> Series under `name`."""
+    def register(fn):
+        REGISTRY[name] = Feature(name, inputs, fn, window, shift, bar_shift, scaled)
+        return fn
+    return register
+
+
+def bars(days, interval="1d"):
+    """Convert a window expressed in days into a number of bars."""
+    return days * BARS_PER_DAY[interval]
+
+
+# ============================
+# FEATURES
+# ============================
+# Bar returns (one bar back, whatever the interval)
+@feature("log_return", inputs=["close"], bar_shift=1)
+def _log_return(df, interval):
+    return np.log(df["close"] / df["close"].shift(1))
+
+
+# Rolling volatility
+@feature("volatility_10d", inputs=["log_return"], window=10, scaled=True)
+def _volatility_10d(df, interval):
+    return df["log_return"].rolling(window=bars(10, interval)).std()
+
+
+@feature("volatility_21d", inputs=["log_return"], window=21, scaled=True)
+def _volatility_21d(df, interval):
+    return df["log_return"].rolling(window=bars(21, interval)).std()
+
+
+# Rolling returns
+@feature("return_3d", inputs=["close"], shift=3, scaled=True)
+def _return_3d(df, interval):
+    return df["close"].pct_change(bars(3, interval))
+
+
+@feature("return_14d", inputs=["close"], shift=14, scaled=True)
+def _return_14d(df, interval):
+    return df["close"].pct_change(bars(14, interval))
+
+
+# Bollinger Bands (lower), from shared 20-day close mean/std
+@feature("close_mean_20d", inputs=["close"], window=20)
+def _close_mean_20d(df, interval):
+    return df["close"].rolling(window=bars(20, interval)).mean()
+
+
+@feature("close_std_20d", inputs=["close"], window=20)
+def _close_std_20d(df, interval):
+    return df["close"].rolling(window=bars(20, interval)).std()
+
+
+@feature("bollinger_down", inputs=["close_mean_20d", "close_std_20d"], scaled=True)
+def _bollinger_down(df, interval):
+    return df["close_mean_20d"] - (2 * df["close_std_20d"])
+
+
+def scaled_features():
+    """Columns standardized by the pipeline scaler, in registration (= scaler) order."""
+    return [f.name for f in REGISTRY.values() if f.scaled]
+
+
+# ============================
+# PLANNER
+# ============================
+def plan(targets):
+    """
+    Topologically ordered features needed for `targets`. Shared inputs
+    (log_return, the 20-day close mean/std) appear once.
+    """
+    order, seen = [], set()
+
+    def visit(name, path=()):
+        if name in seen or name in RAW_COLUMNS:
+            return
+        if name not in REGISTRY:
+            raise KeyError(f"Unknown feature: {name}")
+        if name in path:
+            raise ValueError(f"Feature cycle: {' -> '.join(path + (name,))}")
+        for dep in REGISTRY[name].inputs:
+            visit(dep, path + (name,))
+        seen.add(name)
+        order.append(name)
+
+    for name in targets:
+        visit(name)
+    return order
+
+
+def lookback(targets, interval="1d"):
+    """Bars of history needed before a row for all `targets` to be defined there."""
+    memo = {}
+
+    def need(name):
+        if name in RAW_COLUMNS:
+            return 0
+        if name not in memo:
+            f = REGISTRY[name]
+            memo[name] = f.own_lookback(interval) + max((need(dep) for dep in f.inputs), default=0)
+        return memo[name]
+
+    return max((need(name) for name in targets), default=0)
+
+
+def min_history_days(targets, seq_len, interval="1d", margin_days=2):
+    """
+    Calendar days of raw bars to fetch so the last `seq_len` rows of `targets`
+    are all defined (plus a small margin for a missing/partial latest bar).
+    """
+    rows = lookback(targets, interval) + seq_len
+    return -(-rows // BARS_PER_DAY[interval]) + margin_days
+
+
+def compute(df, targets, interval="1d"):
+    """
+    Add `targets` (and only what they need) to a copy of `df`. Intermediates
+    are dropped again, as are rows with undefined values (warm-up rows).
+    """
+    out = df.copy()
+    steps = plan(targets)
+    for name in steps:
+        out[name] = REGISTRY[name].fn(out, interval)
+
+    out.drop(columns=[name for name in steps if name not in targets], inplace=True)
+    out.dropna(inplace=True)
+    return out
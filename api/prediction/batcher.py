@@ -0,0 +1,162 @@
+import os
+import time
+import queue
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import Future
+import numpy as np
+
+from prediction.prediction import DEFAULT_PROFILE
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+MAX_BATCH = int(os.getenv("INFER_MAX_BATCH", "64"))          # windows per ensemble pass
+MAX_WAIT_MS = float(os.getenv("INFER_MAX_WAIT_MS", "5"))     # how long the first request waits for company
+METRICS_WINDOW = 1024                                        # recent batches kept for percentiles
+
+
+class _Request:
+    def __init__(self, X, profile):
+        self.X = X
+        self.profile = profile
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+# ==============================
+# INFERENCE BATCHER
+# ==============================
+class InferenceBatcher:
+    """
+    Coalesces concurrent inference requests into one ensemble pass.
+
+    Callers submit windows shaped (seq_len, n_features) or (k, seq_len, n_features)
+    and block on the result. A single scheduler thread takes the first pending
+    request, keeps collecting until `max_batch` windows or `max_wait_ms` have
+    passed, stacks them into one tensor, runs the registry's active release
+    once and hands each caller its slice. A request larger than `max_batch`
+    runs on its own. Only requests for the same fidelity profile share a
+    batch.
+    """
+
+    def __init__(self, registry, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.registry = registry
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._pending = None      # request taken from the queue that didn't fit the last batch
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # metrics
+        self.batches = 0
+        self.requests = 0
+        self.windows = 0
+        self.fill = deque(maxlen=METRICS_WINDOW)          # windows per batch / max_batch
+        self.queue_delay = deque(maxlen=METRICS_WINDOW)   # seconds a request waited before its batch ran
+        self.infer_time = deque(maxlen=METRICS_WINDOW)    # seconds per ensemble pass
+
+    # --------------------------
+    # Submit
+    # --------------------------
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="inference-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, X, profile=DEFAULT_PROFILE):
+        """Queue windows for inference; returns a Future of (probabilities, model_version)."""
+        self.start()
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 2:
+            X = X[np.newaxis]
+        request = _Request(X, profile)
+        self._queue.put(request)
+        return request.future
+
+    def predict(self, X, timeout=None, profile=DEFAULT_PROFILE):
+        """Blocking submit(): ensemble probabilities for X and the version that produced them."""
+        return self.submit(X, profile=profile).result(timeout=timeout)
+
+    # --------------------------
+    # Scheduler loop
+    # --------------------------
+    def _next(self, timeout=None):
+        if self._pending is not None:
+            request, self._pending = self._pending, None
+            return request
+        return self._queue.get(timeout=timeout)
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or the wait expires."""
+        batch = [self._next()]
+        size = len(batch[0].X)
+        deadline = time.perf_counter() + self.max_wait
+
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._next(timeout=remaining)
+            except queue.Empty:
+                break
+            if size + len(request.X) > self.max_batch or request.profile != batch[0].profile:
+                self._pending = request  # goes first in the next batch
+                break
+            batch.append(request)
+            size += len(request.X)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                release = self.registry.acquire()
+                X = batch[0].X if len(batch) == 1 else np.concatenate([r.X for r in batch])
+                profile = batch[0].profile
+                probs = release.engine.predict_batch(X, batch_size=max(len(X), 1), profile=profile)
+            except Exception as e:
+                print("[InferenceBatcher] Batch failed:", traceback.format_exc())
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            finished = time.perf_counter()
+            offset = 0
+            for request in batch:
+                n = len(request.X)
+                request.future.set_result((probs[offset:offset + n], release.version))
+                offset += n
+                self.queue_delay.append(started - request.enqueued)
+
+            self.batches += 1
+            self.requests += len(batch)
+            self.windows += len(X)
+            self.fill.append(min(len(X) / self.max_batch, 1.0))
+            self.infer_time.append(finished - started)
+
+    # --------------------------
+    # Metrics
+    # --------------------------
+    def stats(self):
+        def pct(values, q, scale=1.0):
+            return round(float(np.percentile(np.asarray(values) * scale, q)), 3) if values else None
+
+        fill, delay, infer = list(self.fill), list(self.queue_delay), list(self.infer_time)
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "requests": self.requests,
+            "windows": self.windows,
+            "queued": self._queue.qsize(),
+            "requests_per_batch": round(self.requests / self.batches, 2) if self.batches else None,
+            "batch_fill_mean": round(float(np.mean(fill)), 4) if fill else None,
+            "queue_delay_ms": {"p50": pct(delay, 50, 1000), "p95": pct(delay, 95, 1000), "p99": pct(delay, 99, 1000)},
+            "inference_ms": {"p50": pct(infer, 50, 1000), "p95": pct(infer, 95, 1000), "p99": pct(infer, 99, 1000)}
+        }
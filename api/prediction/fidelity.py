@@ -0,0 +1,218 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+
+from prediction.prediction import PredictionEngine, FIDELITY_PROFILES, DEFAULT_PROFILE, MODEL_PATH, THRESHOLD, TOP_FEATURES
+from backtest.backtest import load_oof_probabilities, align_probabilities, oof_end_date, COMPONENT_PREFIX
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+REPORT_NAME = "fidelity_report.json"                          # written next to the release's fold models
+LABELED_FILE = "data/features/features_labeled.parquet"       # features + `target` (pipeline output)
+LATENCY_REPEATS = 20      # single-window passes timed per profile (median reported)
+BULK_WINDOWS = 1024       # windows per timed bulk pass (backtest-style inference)
+
+
+# ==============================
+# AGREEMENT METRICS
+# ==============================
+def agreement(probs, reference, labels, threshold=THRESHOLD):
+    """
+    How a profile's probabilities compare with the full ensemble's on the
+    same bars: AUC of each against realised labels, the AUC gap, the share of
+    bars whose BUY/HOLD signal flips at `threshold` and the mean absolute
+    probability difference.
+    """
+    probs, reference, labels = np.asarray(probs), np.asarray(reference), np.asarray(labels)
+    auc = float(roc_auc_score(labels, probs))
+    auc_full = float(roc_auc_score(labels, reference))
+    return {
+        "bars": int(len(labels)),
+        "auc": round(auc, 4),
+        "auc_full": round(auc_full, 4),
+        "auc_delta": round(auc - auc_full, 4),
+        "flip_rate_pct": round(float(np.mean((probs > threshold) != (reference > threshold)) * 100.0), 3),
+        "mean_abs_diff": round(float(np.mean(np.abs(probs - reference))), 5)
+    }
+
+
+def load_labels(labeled_file=LABELED_FILE):
+    """The labeled feature frame (features, close, target) with a datetime `timestamp` column."""
+    df = pd.read_parquet(labeled_file)
+    if "timestamp" not in df.columns:
+        df = df.reset_index()
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
+
+
+# ==============================
+# OOF (stored arrays, out-of-sample)
+# ==============================
+def oof_section(labels_df, model_path=MODEL_PATH, threshold=THRESHOLD):
+    """
+    Profile vs full ensemble on the stored OOF arrays. Every bar there is
+    out-of-sample, but each holds a single fold's prediction, so only
+    architecture-level profiles (all folds) can be rebuilt from them.
+    """
+    oof = load_oof_probabilities(model_path, components=True)
+    labels = align_probabilities(oof["timestamp"], labels_df.rename(columns={"target": "probability"}))
+    known = ~np.isnan(labels)
+    oof, labels = oof[known], labels[known].astype(int)
+
+    out = {}
+    for profile, spec in FIDELITY_PROFILES.items():
+        if spec["last_folds"] is not None:
+            out[profile] = None  # fold subsets are measured on the live pass only
+            continue
+        architectures = spec["architectures"] or [c[len(COMPONENT_PREFIX):] for c in oof.columns
+                                                  if c.startswith(COMPONENT_PREFIX)]
+        probs = oof[[f"{COMPONENT_PREFIX}{name}" for name in architectures]].to_numpy().mean(axis=1)
+        out[profile] = agreement(probs, oof["probability"].to_numpy(), labels, threshold)
+    return out
+
+
+# ==============================
+# LIVE (one components pass over the labeled history)
+# ==============================
+def profile_probabilities(components, selection):
+    """Rebuild a profile's ensemble from prob_<arch>_fold<k> columns: folds averaged per architecture, then architectures."""
+    arch_probs = [components[[f"{COMPONENT_PREFIX}{name}_fold{k}" for k in folds]].to_numpy().mean(axis=1)
+                  for name, folds in selection.items()]
+    return np.mean(arch_probs, axis=0)
+
+
+def live_section(engine, labels_df, end_date, threshold=THRESHOLD):
+    """
+    Profile vs full ensemble from a single inference pass that returns every
+    fold model's column. Bars run up to `end_date` (labels are known); most
+    of them were in some fold's training data, so read the AUCs as in-sample
+    and the flip rate / probability gap as the fidelity cost.
+    """
+    df = labels_df[labels_df["timestamp"] <= pd.Timestamp(end_date)]
+    components = engine.predict_arrays(df[TOP_FEATURES].values, df["timestamp"].values, df["close"].values,
+                                       components=True)
+    labels = df["target"].to_numpy()[engine.seq_len:].astype(int)
+    reference = components["probability"].to_numpy()
+
+    return {profile: agreement(profile_probabilities(components, engine.profile_summary(profile)["architectures"]),
+                               reference, labels, threshold)
+            for profile in FIDELITY_PROFILES}
+
+
+# ==============================
+# LATENCY
+# ==============================
+def time_passes(engine, profile=DEFAULT_PROFILE, repeats=LATENCY_REPEATS, bulk_windows=BULK_WINDOWS):
+    """Median single-window pass and one bulk pass (ms per 1k windows) of `engine` under `profile`, after a warm-up."""
+    n_features = len(TOP_FEATURES)
+    single = np.random.default_rng(0).normal(size=(1, engine.seq_len, n_features)).astype(np.float32)
+    bulk = np.random.default_rng(1).normal(size=(bulk_windows, engine.seq_len, n_features)).astype(np.float32)
+
+    engine.predict_batch(single, batch_size=1, profile=profile)  # warm-up
+    engine.predict_batch(bulk, profile=profile)
+
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        engine.predict_batch(single, batch_size=1, profile=profile)
+        samples.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    engine.predict_batch(bulk, profile=profile)
+    bulk_sec = time.perf_counter() - started
+
+    return {"single_ms": round(float(np.median(samples)) * 1000, 2),
+            "bulk_ms_per_1k": round(bulk_sec * 1000 * 1000 / bulk_windows, 1)}
+
+
+def add_savings(timings, baseline):
+    """Annotate each timing with its saving (%) against `baseline`'s."""
+    for t in timings.values():
+        t["single_saving_pct"] = round((1 - t["single_ms"] / baseline["single_ms"]) * 100, 1)
+        t["bulk_saving_pct"] = round((1 - t["bulk_ms_per_1k"] / baseline["bulk_ms_per_1k"]) * 100, 1)
+    return timings
+
+
+def measure_latency(engine, repeats=LATENCY_REPEATS, bulk_windows=BULK_WINDOWS):
+    """Median single-window and bulk pass time per profile, and the saving against the full ensemble."""
+    timings = {profile: time_passes(engine, profile, repeats, bulk_windows) for profile in FIDELITY_PROFILES}
+    return add_savings(timings, timings[DEFAULT_PROFILE])
+
+
+# ==============================
+# REPORT
+# ==============================
+def build_report(model_path=MODEL_PATH, labeled_file=LABELED_FILE, threshold=THRESHOLD, live=True):
+    engine = PredictionEngine(model_path=model_path)
+    labels_df = load_labels(labeled_file)
+
+    oof = oof_section(labels_df, model_path, threshold)
+    live_rows = live_section(engine, labels_df, oof_end_date(model_path), threshold=threshold) if live else {}
+    latency = measure_latency(engine) if live else {}
+
+    profiles = {}
+    for profile in FIDELITY_PROFILES:
+        profiles[profile] = {
+            **(engine.profile_summary(profile) if live else {}),
+            "oof": oof.get(profile),
+            "live": live_rows.get(profile),
+            "latency": latency.get(profile)
+        }
+    return {
+        "model_path": model_path,
+        "generated_at": pd.Timestamp.utcnow().isoformat(),
+        "threshold": threshold,
+        "profiles": profiles
+    }
+
+
+def load_report(model_path=MODEL_PATH):
+    """A release's saved fidelity report, or None if it was never measured."""
+    path = os.path.join(model_path, REPORT_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def print_report(report):
+    def fmt(value):
+        return "-" if value is None else str(value)
+
+    print(f"\n{report['model_path']}  threshold={report['threshold']}")
+    print(f"{'profile':<8} {'models':>6} {'oof_auc':>8} {'oof_dAUC':>9} {'oof_flip%':>10} "
+          f"{'live_dAUC':>10} {'live_flip%':>11} {'single_ms':>10} {'saving%':>8} {'bulk_ms/1k':>11} {'saving%':>8}")
+    for profile, row in report["profiles"].items():
+        oof, live, latency = row["oof"] or {}, row["live"] or {}, row["latency"] or {}
+        print(f"{profile:<8} {fmt(row.get('models')):>6} {fmt(oof.get('auc')):>8} {fmt(oof.get('auc_delta')):>9} "
+              f"{fmt(oof.get('flip_rate_pct')):>10} {fmt(live.get('auc_delta')):>10} {fmt(live.get('flip_rate_pct')):>11} "
+              f"{fmt(latency.get('single_ms')):>10} {fmt(latency.get('single_saving_pct')):>8} "
+              f"{fmt(latency.get('bulk_ms_per_1k')):>11} {fmt(latency.get('bulk_saving_pct')):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Accuracy cost (AUC, signal flips vs the full ensemble) and latency saving of each fidelity profile.")
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    parser.add_argument("--labels", default=LABELED_FILE)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--oof-only", action="store_true", help="stored OOF arrays only: no model is loaded")
+    parser.add_argument("--out", default=None, help=f"report path (default: <model-path>/{REPORT_NAME})")
+    args = parser.parse_args()
+
+    report = build_report(args.model_path, args.labels, args.threshold, live=not args.oof_only)
+    print_report(report)
+
+    out = args.out or os.path.join(args.model_path, REPORT_NAME)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,22 +3,37 @@ import numpy as np
 import pandas as pd
 from tensorflow.keras.models import load_model #type: ignore
 
+from pipeline.features import MODEL_FEATURES
+
 # ==============================
 # CONFIG CONSTANTS
 # ==============================
 MODEL_PATH = "models/final"
+MODEL_PATHS = {"1d": MODEL_PATH, "1h": "models/final_1h"}  # one ensemble per bar interval
+ARCHITECTURES = ["lstm", "gru", "conv1d"]  # ensemble members, <model_path>/<arch>/<arch>_fold<k>.h5
+STUDENT_ARCH = "student"                   # distilled single model, <model_path>/student/student_fold1.h5
+STUDENT_PATH = "models/student"
 SEQ_LEN = 20
+INFERENCE_CHUNK = 4096  # windows materialized per inference step (bounds peak memory)
 
-TOP_FEATURES = [
-    "volatility_21d",
-    "volatility_10d",
-    "return_14d",
-    "return_3d",
-    "bollinger_down",
-]
+TOP_FEATURES = MODEL_FEATURES  # model input order, declared with the feature registry
 
 THRESHOLD = 0.27  # Buy signal threshold
 
+# Fidelity profiles: which fold models an inference pass runs. `architectures`
+# None = all, `last_folds` None = every fold (else the N most recent, i.e. the
+# folds trained on the most history). Reduced profiles trade accuracy for
+# latency; `python -m prediction.fidelity` measures both.
+FIDELITY_PROFILES = {
+    "full": {"architectures": None, "last_folds": None},      # 3 x 7 = 21 models
+    "last3": {"architectures": None, "last_folds": 3},        # 9 models
+    "last1": {"architectures": None, "last_folds": 1},        # 3 models
+    "lstm": {"architectures": ["lstm"], "last_folds": None},  # 7 models each
+    "gru": {"architectures": ["gru"], "last_folds": None},
+    "conv1d": {"architectures": ["conv1d"], "last_folds": None},
+}
+DEFAULT_PROFILE = "full"
+
 
 # ==============================
 # PREDICTION ENGINE
@@ -27,13 +42,30 @@ class PredictionEngine:
     """
     Handles loading models, caching them, preparing sequences,
     and generating live/historical predictions using ensemble logic.
+    A model path holding only a `student` folder (see training/distill.py)
+    is served the same way, as a one-architecture, one-fold "ensemble".
     """
 
-    def __init__(self, model_path=MODEL_PATH, seq_len=SEQ_LEN):
+    def __init__(self, model_path=MODEL_PATH, seq_len=SEQ_LEN, interval=None):
+        if interval is not None:
+            model_path = MODEL_PATHS[interval]
         self.model_path = model_path
         self.seq_len = seq_len
         self.models_cache = {}  # { "lstm": [fold1_model, fold2_model, ...], ... }
-        self.base_models = ["lstm", "gru", "conv1d"]
+        self.base_models = self._architectures()
+
+    def _architectures(self):
+        """Ensemble members, or the distilled student when the path holds only that."""
+        def present(name):
+            return os.path.isdir(os.path.join(self.model_path, name))
+
+        if present(STUDENT_ARCH) and not any(present(name) for name in ARCHITECTURES):
+            return [STUDENT_ARCH]
+        return list(ARCHITECTURES)
+
+    @property
+    def backend(self):
+        return "student" if self.base_models == [STUDENT_ARCH] else "ensemble"
 
     # --------------------------
     # Load and cache models
@@ -61,6 +93,38 @@ class PredictionEngine:
 
         print(f"[PredictionEngine] Loaded models for: {list(self.models_cache.keys())}")
 
+    # --------------------------
+    # Fidelity profiles
+    # --------------------------
+    def select_models(self, profile=DEFAULT_PROFILE):
+        """
+        Fold models a fidelity profile runs: {architecture: [(fold_number, model), ...]}.
+        Fold numbers are 1-based in file order, as in the prob_<arch>_fold<k> columns.
+        """
+        if profile not in FIDELITY_PROFILES:
+            raise ValueError(f"Unknown fidelity profile: {profile} (choose from {', '.join(FIDELITY_PROFILES)})")
+        if not self.models_cache:
+            self.load_models()
+
+        spec = FIDELITY_PROFILES[profile]
+        selected = {}
+        for model_name in spec["architectures"] or self.models_cache:
+            if model_name not in self.models_cache:
+                raise ValueError(f"Fidelity profile {profile} needs missing architecture: {model_name}")
+            folds = list(enumerate(self.models_cache[model_name], start=1))
+            if spec["last_folds"]:
+                folds = folds[-spec["last_folds"]:]
+            selected[model_name] = folds
+        return selected
+
+    def profile_summary(self, profile=DEFAULT_PROFILE):
+        """Architectures and fold numbers a profile runs, and its model count."""
+        selected = self.select_models(profile)
+        return {
+            "architectures": {name: [k for k, _ in folds] for name, folds in selected.items()},
+            "models": sum(len(folds) for folds in selected.values())
+        }
+
     # --------------------------
     # Prepare sequence for live prediction
     # --------------------------
@@ -83,72 +147,134 @@ class PredictionEngine:
         Run ensemble prediction for a single prepared sequence.
         Returns a float probability between 0 and 1.
         """
-        if not self.models_cache:
-            self.load_models()
+        return float(self.predict_batch(seq)[0])
 
-        all_model_probs = []
+    # --------------------------
+    # Predict a batch of sequences
+    # --------------------------
+    def predict_batch(self, X, batch_size=64, on_model=None, return_arch=False, return_folds=False,
+                      profile=DEFAULT_PROFILE):
+        """
+        Ensemble probabilities for a batch of windows shaped (n, seq_len, n_features):
+        average folds per architecture, then average architectures, over the
+        fold models of the fidelity `profile`.
+        `on_model()` is called after each fold model pass. With `return_arch`,
+        also returns {architecture: fold-averaged probabilities}; with
+        `return_folds`, also {architecture: (n_folds, n) fold probabilities}.
+        """
+        arch_probs = {}
+        fold_probs = {}
 
-        for model_name, fold_models in self.models_cache.items():
-            fold_preds = [model.predict(seq, verbose=0).flatten() for model in fold_models]
-            model_avg = np.mean(fold_preds, axis=0)  # Average folds of this architecture
-            all_model_probs.append(model_avg)
+        for model_name, folds in self.select_models(profile).items():
+            fold_preds = []
+            for _, model in folds:
+                fold_preds.append(model.predict(X, batch_size=batch_size, verbose=0).flatten())
+                if on_model is not None:
+                    on_model()
+
+            fold_probs[model_name] = np.stack(fold_preds)
+            arch_probs[model_name] = fold_probs[model_name].mean(axis=0)  # Average folds of this architecture
 
         # Final ensemble average across base models
-        final_prob = float(np.mean(all_model_probs))
-        return final_prob
+        probs = np.mean(list(arch_probs.values()), axis=0)
+        if not (return_arch or return_folds):
+            return probs
+        return (probs,) + ((arch_probs,) if return_arch else ()) + ((fold_probs,) if return_folds else ())
 
     # --------------------------
     # Predict historical dataframe
     # --------------------------
-    def predict_dataframe(self, df, feature_cols=TOP_FEATURES, batch_size=64):
+    def predict_dataframe(self, df, feature_cols=TOP_FEATURES, batch_size=64, chunk_size=INFERENCE_CHUNK,
+                          components=False, profile=DEFAULT_PROFILE):
         """
         Generate rolling predictions for an entire feature DataFrame using bulk inference.
-        Returns a DataFrame with columns: [timestamp, close, probability].
+        Returns a DataFrame with columns: [timestamp, close, probability]
+        (plus per-architecture and per-fold columns with `components`).
         """
         if len(df) < self.seq_len:
             raise ValueError("Data too short for sequence generation")
 
-        if not self.models_cache:
-            self.load_models()
+        return self.predict_arrays(
+            df[feature_cols].values,
+            df.timestamp.values,
+            df.close.values,
+            batch_size=batch_size,
+            chunk_size=chunk_size,
+            components=components,
+            profile=profile
+        )
+
+    # --------------------------
+    # Predict historical arrays
+    # --------------------------
+    def predict_arrays(self, values, timestamps, closes, batch_size=64, chunk_size=INFERENCE_CHUNK, progress=None,
+                       components=False, profile=DEFAULT_PROFILE):
+        """
+        Same as predict_dataframe, but over aligned arrays (e.g. memory-mapped
+        feature store slices). Windows are strided views over `values` and only
+        `chunk_size` of them are materialized at a time, so memory stays flat
+        for long (intraday) histories. `progress(fraction)` is called after each fold model pass.
+
+        With `components`, the same pass also returns each architecture's
+        probability (`prob_<arch>`) and each fold model's (`prob_<arch>_fold<k>`),
+        for the models in the fidelity `profile`.
+        """
+        if len(values) < self.seq_len:
+            raise ValueError("Data too short for sequence generation")
+
+        selected = self.select_models(profile)
 
         # ----------------------
-        # 1. Build all sequences
+        # 1. Window view (no copy)
         # ----------------------
-        values = df[feature_cols].values
+        values = np.asarray(values, dtype=np.float32)
         num_samples = len(values) - self.seq_len
 
-        X = np.zeros((num_samples, self.seq_len, len(feature_cols)))
-        for i in range(num_samples):
-            X[i] = values[i:i + self.seq_len]
-
-        timestamps = df.iloc[self.seq_len:].timestamp.values
-        closes = df.iloc[self.seq_len:].close.values
+        # (n - seq_len + 1, n_features, seq_len) -> (n - seq_len + 1, seq_len, n_features)
+        windows = np.lib.stride_tricks.sliding_window_view(values, self.seq_len, axis=0).transpose(0, 2, 1)
 
         # ----------------------
-        # 2. Bulk predict
+        # 2. Chunked bulk predict
         # ----------------------
-        all_model_probs = []
-
-        for model_name, fold_models in self.models_cache.items():
-            fold_preds = []
-            for model in fold_models:
-                preds = model.predict(X, batch_size=batch_size, verbose=0).flatten()
-                fold_preds.append(preds)
+        final_probs = np.zeros(num_samples, dtype=np.float32)
+        fold_cols = {}
+        if components:
+            for model_name, folds in selected.items():
+                fold_cols[model_name] = np.zeros((len(folds), num_samples), dtype=np.float32)
+        total_steps = -(-num_samples // chunk_size) * sum(len(folds) for folds in selected.values())
+        done_steps = 0
 
-            model_avg = np.mean(fold_preds, axis=0)  # Average across folds
-            all_model_probs.append(model_avg)
+        def on_model():
+            nonlocal done_steps
+            done_steps += 1
+            if progress is not None:
+                progress(done_steps / total_steps)
 
-        # Final ensemble average across architectures
-        final_probs = np.mean(all_model_probs, axis=0)
+        for start in range(0, num_samples, chunk_size):
+            end = min(start + chunk_size, num_samples)
+            X = np.ascontiguousarray(windows[start:end])
+            if components:
+                final_probs[start:end], folds = self.predict_batch(X, batch_size=batch_size, on_model=on_model,
+                                                                   return_folds=True, profile=profile)
+                for model_name, preds in folds.items():
+                    fold_cols[model_name][:, start:end] = preds
+            else:
+                final_probs[start:end] = self.predict_batch(X, batch_size=batch_size, on_model=on_model,
+                                                            profile=profile)
 
         # ----------------------
         # 3. Return DataFrame
         # ----------------------
-        return pd.DataFrame({
-            "timestamp": timestamps,
-            "close": closes,
+        out = pd.DataFrame({
+            "timestamp": np.asarray(timestamps)[self.seq_len:],
+            "close": np.asarray(closes)[self.seq_len:],
             "probability": final_probs
         })
+        for model_name, preds in fold_cols.items():
+            out[f"prob_{model_name}"] = preds.mean(axis=0)
+            for (k, _), fold in zip(selected[model_name], preds):
+                out[f"prob_{model_name}_fold{k}"] = fold
+        return out
 
         # --------------------------
         # Generate trading signal
@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import time
+import shutil
+import threading
+import traceback
+import numpy as np
+
+from prediction.prediction import PredictionEngine, MODEL_PATH, SEQ_LEN, TOP_FEATURES
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+MODELS_DIR = "models"
+MANIFEST_NAME = "manifest.json"
+RELEASES_DIR = "releases"          # models/releases/<version>/{lstm,gru,conv1d}/
+DEFAULT_VERSION = "v1.0"           # used when no manifest exists (models/final)
+MODEL_POLL_SEC = int(os.getenv("MODEL_POLL_SEC", "30"))
+
+
+# ==============================
+# RELEASE
+# ==============================
+class Release:
+    """A loaded, warmed ensemble and the version it was loaded from."""
+
+    def __init__(self, version, path, engine):
+        self.version = version
+        self.path = path
+        self.engine = engine
+        self.loaded_at = time.time()
+
+    def to_dict(self):
+        return {"version": self.version, "path": self.path, "backend": self.engine.backend, "loaded_at": self.loaded_at}
+
+
+# ==============================
+# MODEL REGISTRY
+# ==============================
+class ModelRegistry:
+    """
+    Serves the ensemble named by models/manifest.json and hot-swaps it when
+    the manifest's `current` version changes. The new release is loaded and
+    warmed next to the old one, then swapped in with a single reference
+    assignment: requests that already hold the old Release finish on it.
+    Listeners registered with on_swap() are called after every swap so
+    version-keyed caches can be invalidated.
+
+    Manifest layout:
+        {"current": "v1.1", "versions": {"v1.0": {"path": "final"}, "v1.1": {"path": "releases/v1.1"}}}
+    """
+
+    def __init__(self, models_dir=MODELS_DIR, manifest_name=MANIFEST_NAME, default_path=MODEL_PATH,
+                 seq_len=SEQ_LEN, feature_cols=TOP_FEATURES, poll_sec=MODEL_POLL_SEC):
+        self.models_dir = models_dir
+        self.manifest_file = os.path.join(models_dir, manifest_name)
+        self.default_path = default_path
+        self.seq_len = seq_len
+        self.feature_cols = feature_cols
+        self.poll_sec = poll_sec
+        self._active = None
+        self._manifest_mtime = None
+        self._load_lock = threading.Lock()
+        self._listeners = []
+        self._thread = None
+        self.last_error = None
+        self.swaps = []  # [{from, to, at, load_sec}]
+
+    # --------------------------
+    # Manifest
+    # --------------------------
+    def read_manifest(self):
+        """Return (version, model_path) currently named by the manifest."""
+        if not os.path.exists(self.manifest_file):
+            return DEFAULT_VERSION, self.default_path
+
+        with open(self.manifest_file) as f:
+            manifest = json.load(f)
+        version = manifest["current"]
+        entry = manifest.get("versions", {}).get(version, {})
+        path = entry.get("path", os.path.join(RELEASES_DIR, version))
+        return version, os.path.join(self.models_dir, path)
+
+    # --------------------------
+    # Access
+    # --------------------------
+    def acquire(self):
+        """The active Release. Hold on to it for the duration of a request."""
+        release = self._active
+        if release is None:
+            self.check_for_update()
+            release = self._active
+        return release
+
+    @property
+    def engine(self):
+        return self.acquire().engine
+
+    @property
+    def version(self):
+        return self.acquire().version
+
+    def on_swap(self, fn):
+        """Register fn(old_version, new_version), called after each swap."""
+        self._listeners.append(fn)
+
+    # --------------------------
+    # Load / swap
+    # --------------------------
+    def _load(self, version, path):
+        started = time.time()
+        engine = PredictionEngine(model_path=path, seq_len=self.seq_len)
+        engine.load_models()
+
+        # Warm-up: build every model's predict function before taking traffic
+        engine.predict_batch(np.zeros((1, self.seq_len, len(self.feature_cols)), dtype=np.float32))
+        print(f"[ModelRegistry] Loaded and warmed {version} from {path} in {time.time() - started:.1f}s")
+        return Release(version, path, engine), time.time() - started
+
+    def check_for_update(self):
+        """Load and swap in the manifest's version if it differs from the active one."""
+        with self._load_lock:
+            try:
+                mtime = os.path.getmtime(self.manifest_file) if os.path.exists(self.manifest_file) else None
+                if self._active is not None and mtime == self._manifest_mtime:
+                    return False
+
+                version, path = self.read_manifest()
+                self._manifest_mtime = mtime
+                if self._active is not None and self._active.version == version:
+                    return False
+
+                release, load_sec = self._load(version, path)
+                old = self._active
+                self._active = release  # atomic swap; in-flight requests keep `old`
+                self.last_error = None
+            except Exception as e:
+                print("[ModelRegistry] Update failed, keeping current release:", traceback.format_exc())
+                self.last_error = str(e)
+                if self._active is None:
+                    raise
+                return False
+
+        old_version = old.version if old is not None else None
+        self.swaps.append({"from": old_version, "to": version, "at": time.time(), "load_sec": round(load_sec, 3)})
+        for fn in self._listeners:
+            try:
+                fn(old_version, version)
+            except Exception:
+                print("[ModelRegistry] Swap listener failed:", traceback.format_exc())
+        return True
+
+    # --------------------------
+    # Background watcher
+    # --------------------------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+            self._thread.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_sec)
+            try:
+                self.check_for_update()
+            except Exception:
+                pass  # already logged; retry on next poll
+
+    def status(self):
+        active = self._active
+        return {
+            "active": active.to_dict() if active is not None else None,
+            "manifest": self.manifest_file,
+            "swaps": self.swaps[-10:],
+            "last_error": self.last_error
+        }
+
+
+# ==============================
+# PUBLISH A RELEASE
+# ==============================
+def publish_release(src_dir, version, models_dir=MODELS_DIR, manifest_name=MANIFEST_NAME):
+    """
+    Copy a trained ensemble (src_dir/{lstm,gru,conv1d}/...) to
+    models/releases/<version> and make it current. The manifest is replaced
+    atomically, so running registries pick it up on their next poll.
+    """
+    target = os.path.join(models_dir, RELEASES_DIR, version)
+    if os.path.exists(target):
+        raise FileExistsError(f"Release already exists: {target}")
+    shutil.copytree(src_dir, target)
+
+    manifest_file = os.path.join(models_dir, manifest_name)
+    manifest = {"current": DEFAULT_VERSION, "versions": {DEFAULT_VERSION: {"path": "final"}}}
+    if os.path.exists(manifest_file):
+        with open(manifest_file) as f:
+            manifest = json.load(f)
+
+    manifest["versions"][version] = {"path": os.path.join(RELEASES_DIR, version), "published_at": time.time()}
+    manifest["current"] = version
+
+    tmp = f"{manifest_file}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(tmp, manifest_file)
+    print(f"[ModelRegistry] Published {version} -> {target}")
+    return target
+
+
+if __name__ == "__main__":
+    # python -m prediction.registry <trained_models_dir> <version>
+    publish_release(sys.argv[1], sys.argv[2])
@@ -0,0 +1,271 @@
+import os
+import time
+import threading
+import traceback
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+CLOSE_OFFSET_MIN = int(os.getenv("PRECOMPUTE_OFFSET_MIN", "10"))   # minutes after the 00:00 UTC daily close
+MAX_ATTEMPTS = int(os.getenv("PRECOMPUTE_MAX_ATTEMPTS", "5"))
+RETRY_BACKOFF_SEC = int(os.getenv("PRECOMPUTE_RETRY_SEC", "120"))  # doubled after each failed attempt
+FOLLOW_POLL_SEC = int(os.getenv("PRECOMPUTE_FOLLOW_SEC", "5"))    # follower workers re-read the history this often
+HISTORY_FILE = "data/predictions/historical_probs.csv"
+TRIGGER_FILE = "data/.precompute.trigger"                          # touched by followers to request a run
+
+
+# ==============================
+# PRECOMPUTE SCHEDULER
+# ==============================
+class PrecomputeScheduler:
+    """
+    Runs the daily bar-close job on a background thread:
+      1. refresh raw data + features (pipeline run, new manifest)
+      2. score every bar newer than the probability history with the ensemble
+         (window ending at that bar, same as /predict)
+      3. append them to the probability history
+      4. publish the newest bar to the signal feed
+    Failed runs are retried with exponential backoff. /predict and the bot
+    then read `latest` instead of fetching and scoring per request.
+    Scoring uses the registry's active release; after a model swap,
+    invalidate() drops `latest` and the next run re-scores the newest bar.
+    Newly scored bars (probabilities and their feature rows) go to `monitor`.
+
+    With several API worker processes only the leader runs the job; followers
+    reload `latest` from the history file whenever the leader rewrites it
+    and pass the bars it appended to `monitor`.
+    """
+
+    def __init__(self, run_pipeline, feature_store, registry, feed=None, history_file=HISTORY_FILE,
+                 offset_minutes=CLOSE_OFFSET_MIN, max_attempts=MAX_ATTEMPTS, backoff=RETRY_BACKOFF_SEC,
+                 monitor=None):
+        self.run_pipeline = run_pipeline
+        self.feature_store = feature_store
+        self.feed = feed
+        self.monitor = monitor
+        self.history_file = history_file
+        self.offset = timedelta(minutes=offset_minutes)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.registry = registry
+        self.latest = None      # {bar, probability, close, scored_at, model_version}
+        self._stale = False     # newest stored bar was scored by a previous release
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.leader = True
+        self._trigger_mtime = self._mtime(TRIGGER_FILE)
+        self._status = {
+            "state": "idle",
+            "last_run_started": None,
+            "last_run_finished": None,
+            "last_duration_sec": None,
+            "last_success": None,
+            "last_error": None,
+            "attempts": 0,
+            "bars_scored": 0,
+            "next_run": None,
+        }
+
+    @property
+    def engine(self):
+        return self.registry.engine
+
+    # --------------------------
+    # Scheduling
+    # --------------------------
+    def next_run_time(self, now=None):
+        """Next daily close (00:00 UTC) plus the configured offset."""
+        now = now or datetime.now(timezone.utc)
+        run = now.replace(hour=0, minute=0, second=0, microsecond=0) + self.offset
+        return run if run > now else run + timedelta(days=1)
+
+    def start(self, run_now=True, leader=True):
+        """Start the scheduler (leader) or history follower thread; optionally catch up immediately."""
+        if self._thread is None:
+            self.leader = leader
+            self._status["state"] = "idle" if leader else "following"
+            target, args = (self._loop, (run_now,)) if leader else (self._follow, ())
+            self._thread = threading.Thread(target=target, args=args, name="precompute", daemon=True)
+            self._thread.start()
+
+    def trigger(self):
+        """Run as soon as possible (manual trigger). Followers forward it to the leader."""
+        if self.leader:
+            self._wake.set()
+        else:
+            os.makedirs(os.path.dirname(TRIGGER_FILE), exist_ok=True)
+            with open(TRIGGER_FILE, "a"):
+                os.utime(TRIGGER_FILE)
+
+    def invalidate(self, old_version=None, new_version=None):
+        """Model swap listener: forget the cached signal and re-score with the new release."""
+        print(f"[Precompute] Model changed {old_version} -> {new_version}; invalidating latest signal")
+        self.latest = None
+        self._stale = True
+        self._wake.set()
+
+    def _loop(self, run_now):
+        if run_now:
+            self.run_with_retries()
+        while True:
+            next_run = self.next_run_time()
+            self._status["next_run"] = next_run.isoformat()
+            self._sleep_until(next_run)
+            self.run_with_retries()
+
+    def _sleep_until(self, when):
+        """Wait for `when`, a local trigger, or a trigger forwarded by a follower."""
+        while True:
+            wait = (when - datetime.now(timezone.utc)).total_seconds()
+            if wait <= 0 or self._wake.wait(timeout=min(wait, FOLLOW_POLL_SEC)):
+                break
+            mtime = self._mtime(TRIGGER_FILE)
+            if mtime != self._trigger_mtime:
+                self._trigger_mtime = mtime
+                break
+        self._wake.clear()
+
+    def _follow(self):
+        """Follower: mirror the leader's latest bar from the history file."""
+        seen = None
+        while True:
+            mtime = self._mtime(self.history_file)
+            if mtime is not None and (mtime != seen or self.latest is None):
+                try:
+                    self._publish_latest(self._load_history(), self.registry.acquire().version)
+                    seen = mtime
+                    if self.monitor is not None:
+                        self.monitor.seed_from_history(self.history_file)  # bars the leader appended
+                except Exception:
+                    print("[Precompute] Follower refresh failed:", traceback.format_exc())
+            if self._wake.wait(timeout=FOLLOW_POLL_SEC):
+                self._wake.clear()
+
+    def run_with_retries(self):
+        for attempt in range(1, self.max_attempts + 1):
+            self._status["attempts"] = attempt
+            if self.run_once():
+                return True
+            if attempt < self.max_attempts:
+                delay = self.backoff * 2 ** (attempt - 1)
+                print(f"[Precompute] Attempt {attempt} failed, retrying in {delay}s")
+                self._status["state"] = "retrying"
+                if self._wake.wait(timeout=delay):
+                    self._wake.clear()
+        return False
+
+    # --------------------------
+    # Job
+    # --------------------------
+    def run_once(self):
+        """One precompute pass. Returns True on success; status records the outcome."""
+        if not self._lock.acquire(blocking=False):
+            return True  # already running
+
+        started = time.time()
+        stale = False
+        self._status.update(state="running", last_run_started=datetime.now(timezone.utc).isoformat())
+        try:
+            # 1. Fetch new bar + rebuild features (writes a new manifest -> new store snapshot)
+            self.run_pipeline()
+            snap = self.feature_store.snapshot()
+
+            # 2. Score bars not yet in the history (plus the newest bar after a model swap)
+            release = self.registry.acquire()
+            stale, self._stale = self._stale, False
+            history = self._load_history()
+            last_bar = pd.Timestamp(history["timestamp"].iloc[-1]) if len(history) else None
+            seq_len = release.engine.seq_len
+            first = seq_len - 1
+            if last_bar is not None:
+                first = max(first, int(np.searchsorted(snap.timestamps, np.datetime64(last_bar), side="right")))
+            if stale:
+                first = min(first, len(snap) - 1)
+
+            bars_scored = 0
+            if first < len(snap):
+                values = np.asarray(snap.features[first - seq_len + 1:], dtype=np.float32)
+                X = np.lib.stride_tricks.sliding_window_view(values, seq_len, axis=0).transpose(0, 2, 1)
+                probs, arch_probs = release.engine.predict_batch(np.ascontiguousarray(X), return_arch=True)
+
+                new_rows = pd.DataFrame({
+                    "timestamp": snap.dates(first, len(snap)),
+                    "close": snap.close[first:],
+                    "probability": np.round(probs.astype(np.float64), 8)
+                })
+                # Drift sees each bar once: a bar re-scored after a model swap was observed already
+                new = ~new_rows["timestamp"].isin(history["timestamp"].astype(str)).to_numpy()
+                self._observe(probs[new], {name: p[new] for name, p in arch_probs.items()}, values[seq_len - 1:][new],
+                              new_rows["timestamp"].iloc[-1])
+                history = history[~history["timestamp"].astype(str).isin(new_rows["timestamp"])]
+                history = pd.concat([history, new_rows], ignore_index=True)
+                self._write_history(history)
+                bars_scored = len(new_rows)
+
+            # 3. Publish the newest bar
+            self._publish_latest(history, release.version)
+
+            self._status.update(state="idle", last_success=self._status["last_run_started"],
+                                last_error=None, bars_scored=bars_scored)
+            print(f"[Precompute] Scored {bars_scored} new bar(s); latest {self.latest['bar']} -> {self.latest['probability']}")
+            return True
+
+        except Exception as e:
+            print("[Precompute] Run failed:", traceback.format_exc())
+            self._stale = self._stale or stale
+            self._status.update(state="failed", last_error=str(e))
+            return False
+
+        finally:
+            self._status.update(
+                last_run_finished=datetime.now(timezone.utc).isoformat(),
+                last_duration_sec=round(time.time() - started, 3)
+            )
+            self._lock.release()
+
+    def _observe(self, probs, arch_probs, features, until):
+        """Feed newly scored bars to the drift monitor; never fails the run."""
+        if self.monitor is None or len(probs) == 0:
+            return
+        try:
+            self.monitor.observe(probs, arch_probs, features=features, until=until)
+        except Exception:
+            print("[Precompute] Drift monitor update failed:", traceback.format_exc())
+
+    def _publish_latest(self, history, version):
+        last = history.iloc[-1]
+        self.latest = {
+            "bar": str(last["timestamp"]),
+            "probability": round(float(last["probability"]), 4),
+            "close": float(last["close"]),
+            "scored_at": datetime.now(timezone.utc).isoformat(),
+            "model_version": version
+        }
+        if self.feed is not None:
+            self.feed.publish(dict(self.latest, source="precompute"))
+
+    # --------------------------
+    # Probability history
+    # --------------------------
+    @staticmethod
+    def _mtime(path):
+        return os.path.getmtime(path) if os.path.exists(path) else None
+
+    def _load_history(self):
+        if os.path.exists(self.history_file):
+            return pd.read_csv(self.history_file)
+        return pd.DataFrame(columns=["timestamp", "close", "probability"])
+
+    def _write_history(self, history):
+        """Rewrite the history via a temp file + rename (readers never see a partial file)."""
+        os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
+        tmp = f"{self.history_file}.tmp"
+        history.to_csv(tmp, index=False)
+        os.replace(tmp, self.history_file)
+
+    def status(self):
+        return dict(self._status, latest=self.latest, leader=self.leader, pid=os.getpid())
@@ -0,0 +1,187 @@
+import os
+import math
+import time
+import asyncio
+from collections import deque
+from starlette.responses import JSONResponse
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+# Per worker process. concurrency = requests running, queue = requests waiting
+# for a slot, wait = seconds a queued request waits before it is shed.
+LANES = {
+    "backtest": {
+        "concurrency": int(os.getenv("ADMIT_BACKTEST_CONCURRENCY", "2")),
+        "queue": int(os.getenv("ADMIT_BACKTEST_QUEUE", "4")),
+        "wait": float(os.getenv("ADMIT_BACKTEST_WAIT_SEC", "15")),
+    },
+    "predict": {
+        "concurrency": int(os.getenv("ADMIT_PREDICT_CONCURRENCY", "8")),
+        "queue": int(os.getenv("ADMIT_PREDICT_QUEUE", "32")),
+        "wait": float(os.getenv("ADMIT_PREDICT_WAIT_SEC", "10")),
+    },
+}
+PRIORITY_THREADS = int(os.getenv("ADMIT_PRIORITY_THREADS", "8"))  # threads kept free for unlimited endpoints
+RETRY_AFTER_MAX = 60
+SERVICE_EWMA = 0.2  # weight of the newest request in the service-time estimate
+
+
+class Rejected(Exception):
+    """A request shed by a lane: 429 when its queue is full, 503 when it waited too long."""
+
+    def __init__(self, status_code, reason, retry_after):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+# ==============================
+# LANE
+# ==============================
+class Lane:
+    """
+    Concurrency limit with a bounded FIFO wait queue for one class of
+    endpoints. Lives on the worker's event loop; waiting requests hold no
+    thread. A released slot is handed straight to the oldest waiter.
+    """
+
+    def __init__(self, name, concurrency, queue, wait):
+        self.name = name
+        self.concurrency = max(int(concurrency), 1)
+        self.max_queue = max(int(queue), 0)
+        self.max_wait = wait
+        self.active = 0
+        self.waiters = deque()
+        self.service_time = None   # EWMA seconds per admitted request
+
+        # metrics
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self.peak_queue = 0
+
+    def retry_after(self):
+        """Seconds until a slot is likely free: queued work spread over the slots."""
+        per_request = self.service_time if self.service_time is not None else 1.0
+        estimate = per_request * (len(self.waiters) + 1) / self.concurrency
+        return int(min(max(math.ceil(estimate), 1), RETRY_AFTER_MAX))
+
+    async def acquire(self):
+        if self.active < self.concurrency and not self.waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+
+        if len(self.waiters) >= self.max_queue:
+            self.rejected_full += 1
+            raise Rejected(429, f"Too many concurrent {self.name} requests", self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        self.peak_queue = max(self.peak_queue, len(self.waiters))
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except asyncio.TimeoutError:
+            self._drop(waiter)
+            self.rejected_timeout += 1
+            raise Rejected(503, f"{self.name} is overloaded, timed out waiting for a slot", self.retry_after())
+        except BaseException:
+            # Client went away while queued; give back a slot already handed to us
+            self._drop(waiter)
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        self.admitted += 1  # slot handed over by release(); `active` already counts it
+
+    def release(self, elapsed=None):
+        if elapsed is not None:
+            self.service_time = elapsed if self.service_time is None else \
+                (1 - SERVICE_EWMA) * self.service_time + SERVICE_EWMA * elapsed
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def _drop(self, waiter):
+        try:
+            self.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def stats(self):
+        return {
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "max_wait_sec": self.max_wait,
+            "active": self.active,
+            "queued": len(self.waiters),
+            "peak_queue": self.peak_queue,
+            "admitted": self.admitted,
+            "rejected_429": self.rejected_full,
+            "rejected_503": self.rejected_timeout,
+            "service_time_sec": round(self.service_time, 3) if self.service_time is not None else None,
+            "retry_after_sec": self.retry_after()
+        }
+
+
+# ==============================
+# ADMISSION MIDDLEWARE
+# ==============================
+class AdmissionController:
+    """
+    Maps requests to lanes. `classify(path, query)` returns a lane name, or
+    None for the priority lane: cheap endpoints (/health, cached reads) that
+    are never queued or shed.
+    """
+
+    def __init__(self, classify, lanes=LANES, priority_threads=PRIORITY_THREADS):
+        self.classify = classify
+        self.lanes = {name: Lane(name, **config) for name, config in lanes.items()}
+        self.priority_threads = priority_threads
+
+    def lane_for(self, scope):
+        name = self.classify(scope["path"], scope.get("query_string", b"").decode("latin-1"))
+        return self.lanes.get(name) if name is not None else None
+
+    def thread_budget(self):
+        """Worker threads needed so limited lanes can't starve the priority lane."""
+        return sum(lane.concurrency for lane in self.lanes.values()) + self.priority_threads
+
+    def stats(self):
+        return {name: lane.stats() for name, lane in self.lanes.items()}
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware enforcing the controller's lanes. The slot is held until
+    the response body has been sent, so streamed backtests count for their
+    whole duration. Shed requests get a JSON error with Retry-After.
+    """
+
+    def __init__(self, app, controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        lane = self.controller.lane_for(scope) if scope["type"] == "http" else None
+        if lane is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await lane.acquire()
+        except Rejected as e:
+            response = JSONResponse({"detail": e.reason, "lane": lane.name, "retry_after": e.retry_after},
+                                    status_code=e.status_code, headers={"Retry-After": str(e.retry_after)})
+            await response(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lane.release(time.monotonic() - started)
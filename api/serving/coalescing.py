@@ -0,0 +1,186 @@
+import time
+import typing
+import asyncio
+import inspect
+from urllib.parse import parse_qsl
+import pandas as pd
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+TRUE_VALUES = ("1", "true", "yes", "on")
+FALSE_VALUES = ("0", "false", "no", "off")
+COALESCED_HEADER = (b"x-coalesced", b"1")
+
+
+# ==============================
+# KEY NORMALIZATION
+# ==============================
+def _scalar_type(annotation):
+    """The scalar type behind an endpoint annotation (Optional[int] -> int, Literal[...] -> str)."""
+    if typing.get_origin(annotation) is typing.Union:
+        annotation = next(a for a in typing.get_args(annotation) if a is not type(None))
+    if typing.get_origin(annotation) is typing.Literal:
+        return type(typing.get_args(annotation)[0])
+    return annotation
+
+
+def _canonical(name, annotation, value):
+    if value is None:
+        return None
+    kind = _scalar_type(annotation)
+    text = str(value).strip()
+    if kind is bool:
+        if isinstance(value, bool):
+            return value
+        if text.lower() not in TRUE_VALUES + FALSE_VALUES:
+            raise ValueError(f"invalid bool for {name}")
+        return text.lower() in TRUE_VALUES
+    if kind in (int, float):
+        return float(text)
+    if name.endswith("_date"):
+        return pd.Timestamp(text).strftime("%Y-%m-%d")
+    return text
+
+
+def normalized_query(query, endpoint):
+    """
+    Canonical form of a query string for `endpoint`: only its declared query
+    parameters, defaults filled in, values parsed by annotation (0.3 == 0.30,
+    true == 1, dates as YYYY-MM-DD), the last value winning as in FastAPI.
+    Returns None if a value doesn't parse (the request will fail validation
+    on its own).
+    """
+    given = dict(parse_qsl(query, keep_blank_values=True))
+    key = []
+    try:
+        for name, param in inspect.signature(endpoint).parameters.items():
+            default = getattr(param.default, "default", param.default)
+            key.append((name, _canonical(name, param.annotation, given.get(name, default))))
+    except ValueError:
+        return None
+    return tuple(key)
+
+
+# ==============================
+# FLIGHT
+# ==============================
+class _Flight:
+    """One in-flight leader request: followers wait on `done` and replay its ASGI messages."""
+
+    def __init__(self):
+        self.messages = []
+        self.done = asyncio.get_running_loop().create_future()
+        self.followers = 0
+
+
+class RequestCoalescer:
+    """
+    Single-flight for identical concurrent requests. `key_for(path, query)`
+    returns a hashable normalized key, or None for requests that are never
+    coalesced. The first request with a key runs; requests with the same key
+    arriving while it runs wait for it and get a copy of its response (status,
+    headers, body) instead of computing their own. Nothing is cached once the
+    leader finishes. Lives on the worker's event loop.
+    """
+
+    def __init__(self, key_for):
+        self.key_for = key_for
+        self._flights = {}
+
+        # metrics, per path
+        self.requests = {}
+        self.leaders = {}
+        self.coalesced = {}
+        self.failed = {}
+        self.peak_followers = {}
+        self.saved_sec = {}   # leader run time followers didn't spend computing
+
+    def key(self, scope):
+        if scope["method"] != "GET":
+            return None
+        key = self.key_for(scope["path"], scope.get("query_string", b"").decode("latin-1"))
+        return None if key is None else (scope["path"], key)
+
+    def _count(self, counter, path, value=1):
+        counter[path] = counter.get(path, 0) + value
+
+    def stats(self):
+        paths = sorted(self.requests)
+        return {
+            path: {
+                "requests": self.requests.get(path, 0),
+                "leaders": self.leaders.get(path, 0),
+                "coalesced": self.coalesced.get(path, 0),
+                "coalesced_pct": round(self.coalesced.get(path, 0) / self.requests[path] * 100.0, 2),
+                "failed_leaders": self.failed.get(path, 0),
+                "peak_followers": self.peak_followers.get(path, 0),
+                "saved_sec": round(self.saved_sec.get(path, 0.0), 3),
+                "in_flight": sum(1 for (p, _) in self._flights if p == path)
+            }
+            for path in paths
+        }
+
+
+# ==============================
+# COALESCING MIDDLEWARE
+# ==============================
+class CoalescingMiddleware:
+    """
+    ASGI middleware applying a RequestCoalescer. Install it outside
+    AdmissionMiddleware: followers wait here without taking a lane slot, so
+    a burst of identical requests costs one admitted request. Replayed
+    responses carry an `x-coalesced: 1` header.
+    """
+
+    def __init__(self, app, coalescer):
+        self.app = app
+        self.coalescer = coalescer
+
+    async def __call__(self, scope, receive, send):
+        key = self.coalescer.key(scope) if scope["type"] == "http" else None
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        c = self.coalescer
+        path = scope["path"]
+        c._count(c.requests, path)
+        flight = c._flights.get(key)
+        if flight is not None:
+            await self._follow(flight, send, path)
+            return
+
+        flight = c._flights[key] = _Flight()
+        c._count(c.leaders, path)
+        started = time.monotonic()
+
+        async def record(message):
+            flight.messages.append(message)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, record)
+        except BaseException as e:
+            c._count(c.failed, path)
+            flight.done.set_exception(e)
+            flight.done.exception()  # mark retrieved: followers (if any) re-raise it themselves
+            raise
+        else:
+            flight.done.set_result(None)
+            c._count(c.saved_sec, path, (time.monotonic() - started) * flight.followers)
+        finally:
+            c._flights.pop(key, None)
+
+    async def _follow(self, flight, send, path):
+        c = self.coalescer
+        flight.followers += 1
+        c._count(c.coalesced, path)
+        c.peak_followers[path] = max(c.peak_followers.get(path, 0), flight.followers)
+
+        # shield: a follower's client going away must not cancel the shared future
+        await asyncio.shield(flight.done)
+        for message in flight.messages:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [COALESCED_HEADER]}
+            await send(message)
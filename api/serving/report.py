@@ -0,0 +1,84 @@
+import sys
+import json
+import time
+import argparse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+API_BASE = "http://localhost:8000"
+DEFAULT_PATH = "/backtest?start_date=2024-01-01&mode=oof"
+
+
+def fetch(url, timeout=300):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as r:
+            r.read()
+            ok = r.status < 500
+    except Exception:
+        ok = False
+    return time.perf_counter() - started, ok
+
+
+def run_load(url, concurrency, duration):
+    """Hit `url` from `concurrency` threads for `duration` seconds; return (latencies, errors, elapsed)."""
+    latencies, errors = [], 0
+    deadline = time.time() + duration
+
+    def worker():
+        nonlocal errors
+        while time.time() < deadline:
+            sec, ok = fetch(url)
+            latencies.append(sec)
+            errors += 0 if ok else 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    return latencies, errors, time.perf_counter() - started
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(q / 100 * len(values)), len(values) - 1)] if values else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the API and print per-worker memory and latency.")
+    parser.add_argument("--api", default=API_BASE)
+    parser.add_argument("--path", default=DEFAULT_PATH)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=int, default=30)
+    args = parser.parse_args()
+
+    url = args.api + args.path
+    fetch(url)  # warm-up
+    latencies, errors, elapsed = run_load(url, args.concurrency, args.duration)
+
+    time.sleep(3)  # let every worker flush its stats
+    with urllib.request.urlopen(args.api + "/workers") as r:
+        report = json.load(r)
+
+    print(f"\n{url}  concurrency={args.concurrency}  duration={elapsed:.1f}s")
+    print(f"requests={len(latencies)}  errors={errors}  rps={len(latencies) / elapsed:.2f}  "
+          f"p50={percentile(latencies, 50) * 1000:.0f}ms  p95={percentile(latencies, 95) * 1000:.0f}ms  "
+          f"p99={percentile(latencies, 99) * 1000:.0f}ms\n")
+
+    route = args.path.split("?")[0]
+    print(f"{'pid':>8} {'leader':>6} {'rss_mb':>8} {'pss_mb':>8} {'uss_mb':>8} {'cpu_s':>8} {'reqs':>6} {'p50_ms':>8} {'p95_ms':>8}")
+    for w in report["workers"]:
+        mem = w["memory"] or {}
+        r = w["routes"].get(route, {})
+        print(f"{w['pid']:>8} {str(w['leader']):>6} {mem.get('rss_mb', 0):>8} {mem.get('pss_mb', 0):>8} "
+              f"{mem.get('uss_mb', 0):>8} {w['cpu_sec']:>8} {r.get('count', 0):>6} "
+              f"{r.get('p50_ms', 0):>8} {r.get('p95_ms', 0):>8}")
+    print(f"\ntotal rss={report['total_rss_mb']}MB  total pss={report['total_pss_mb']}MB "
+          f"(pss counts shared pages once)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
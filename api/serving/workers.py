@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import fcntl
+import threading
+from collections import deque
+import numpy as np
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+WORKER_STATS_DIR = "data/workers"       # one <pid>.json per serving worker
+STATS_FLUSH_SEC = 2                     # how often a worker writes its stats file
+LATENCY_WINDOW = 2048                   # latencies kept per route
+LEADER_LOCK = "data/.precompute.lock"   # held by the worker that runs the scheduler
+
+_leader_fd = None
+
+
+# ==============================
+# MEMORY
+# ==============================
+def memory_usage(pid="self"):
+    """
+    RSS, PSS, USS and shared memory of a process in MB, from /proc/<pid>/smaps_rollup.
+    PSS splits shared pages (shared libraries, mapped feature snapshots) between
+    the processes mapping them, so sum(PSS) is the real cost of N workers.
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                    fields[parts[0][:-1]] = int(parts[1])  # kB
+    except OSError:
+        return None
+
+    def mb(kb):
+        return round(kb / 1024, 1)
+
+    private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    shared = fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+    return {"rss_mb": mb(fields.get("Rss", 0)), "pss_mb": mb(fields.get("Pss", 0)),
+            "uss_mb": mb(private), "shared_mb": mb(shared)}
+
+
+# ==============================
+# LEADER ELECTION
+# ==============================
+def acquire_leader(lock_file=LEADER_LOCK):
+    """
+    Non-blocking flock: exactly one worker process wins and keeps the lock
+    for its lifetime. Call after fork (a lock taken in the master would be
+    shared by every child).
+    """
+    global _leader_fd
+    if _leader_fd is not None:
+        return True
+
+    os.makedirs(os.path.dirname(lock_file), exist_ok=True)
+    fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+
+    os.ftruncate(fd, 0)
+    os.write(fd, str(os.getpid()).encode())
+    _leader_fd = fd
+    return True
+
+
+# ==============================
+# PRELOAD (worker startup)
+# ==============================
+def preload_snapshots(stores):
+    """
+    Build (or map the already built) feature snapshots and touch their pages.
+    The arrays are np.memmap views of the same files in every worker, so
+    they are shared through the page cache.
+    """
+    for store in stores:
+        snap = store.snapshot()
+        for arr in (snap.timestamps, snap.close, snap.features):
+            np.asarray(arr).reshape(-1).view(np.uint8)[::4096].sum()  # touch every page
+        print(f"[Serving] Preloaded {store.interval} snapshot {snap.version} ({len(snap)} rows)")
+
+
+# ==============================
+# PER-WORKER STATS
+# ==============================
+class WorkerStats:
+    """
+    Request counts and latency percentiles per route for this worker process,
+    plus its memory usage. Each worker flushes its stats to
+    WORKER_STATS_DIR/<pid>.json so any worker can report on all of them.
+    """
+
+    def __init__(self, stats_dir=WORKER_STATS_DIR, window=LATENCY_WINDOW):
+        self.stats_dir = stats_dir
+        self.window = window
+        self.pid = None
+        self.started_at = None
+        self.routes = {}     # { route: {"count", "errors", "latencies": deque} }
+        self.leader = False
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Start fresh in a newly forked worker."""
+        self.pid = os.getpid()
+        self.started_at = time.time()
+        self.routes = {}
+
+    def record(self, route, seconds, status_code):
+        with self._lock:
+            entry = self.routes.get(route)
+            if entry is None:
+                entry = self.routes[route] = {"count": 0, "errors": 0, "latencies": deque(maxlen=self.window)}
+            entry["count"] += 1
+            if status_code >= 500:
+                entry["errors"] += 1
+            entry["latencies"].append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            routes = {}
+            for route, entry in self.routes.items():
+                lat = np.asarray(entry["latencies"]) * 1000
+                routes[route] = {
+                    "count": entry["count"],
+                    "errors": entry["errors"],
+                    "p50_ms": round(float(np.percentile(lat, 50)), 2),
+                    "p95_ms": round(float(np.percentile(lat, 95)), 2),
+                    "p99_ms": round(float(np.percentile(lat, 99)), 2),
+                }
+        return {
+            "pid": self.pid,
+            "leader": self.leader,
+            "started_at": self.started_at,
+            "updated_at": time.time(),
+            "cpu_sec": round(sum(os.times()[:2]), 2),
+            "memory": memory_usage(),
+            "routes": routes
+        }
+
+    # --------------------------
+    # Shared stats directory
+    # --------------------------
+    def flush(self):
+        os.makedirs(self.stats_dir, exist_ok=True)
+        path = os.path.join(self.stats_dir, f"{self.pid}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def remove(self):
+        try:
+            os.remove(os.path.join(self.stats_dir, f"{self.pid}.json"))
+        except OSError:
+            pass
+
+    def collect(self):
+        """Stats of every live worker (stale files from dead pids are skipped)."""
+        workers = []
+        if not os.path.isdir(self.stats_dir):
+            return workers
+        for name in sorted(os.listdir(self.stats_dir)):
+            if not name.endswith(".json"):
+                continue
+            pid = int(name[:-len(".json")])
+            try:
+                os.kill(pid, 0)
+                with open(os.path.join(self.stats_dir, name)) as f:
+                    workers.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return workers
@@ -0,0 +1,149 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+
+from prediction.prediction import TOP_FEATURES
+from pipeline.data_pipeline import INTERVAL, features_path, manifest_path
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+STORE_DIR = "data/store"
+PRICE_COL = "close"
+KEEP_SNAPSHOTS = 2  # previous snapshot stays around for workers still mapping it
+
+
+# ==============================
+# SNAPSHOT
+# ==============================
+class FeatureSnapshot:
+    """
+    Read-only, memory-mapped view of one feature build.
+    Arrays are np.memmap-backed, so every process mapping the same snapshot
+    shares a single page-cached copy and slices are zero-copy views.
+    """
+
+    def __init__(self, path, version, feature_cols):
+        self.path = path
+        self.version = version
+        self.feature_cols = list(feature_cols)
+        self.timestamps = np.load(os.path.join(path, "timestamps.npy"), mmap_mode="r")  # datetime64[ns], sorted
+        self.close = np.load(os.path.join(path, "close.npy"), mmap_mode="r")            # float64
+        self.features = np.load(os.path.join(path, "features.npy"), mmap_mode="r")      # float32 (n, k)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def range(self, start_date=None, end_date=None):
+        """
+        Resolve an inclusive date range to (lo, hi) row bounds by binary search.
+        """
+        lo = 0 if start_date is None else int(np.searchsorted(self.timestamps, np.datetime64(pd.Timestamp(start_date)), side="left"))
+        hi = len(self) if end_date is None else int(np.searchsorted(self.timestamps, np.datetime64(pd.Timestamp(end_date)), side="right"))
+        return lo, max(lo, hi)
+
+    def dates(self, lo, hi):
+        """String dates for rows [lo, hi), formatted the way pandas prints them."""
+        return pd.DatetimeIndex(self.timestamps[lo:hi]).astype(str).tolist()
+
+
+# ==============================
+# FEATURE STORE
+# ==============================
+class FeatureStore:
+    """
+    Projects the labeled feature parquet down to the columns inference and
+    backtest use, persists them as .npy files and serves memory-mapped
+    snapshots. A new snapshot is built (into a temp dir, then renamed into
+    place) whenever the pipeline manifest changes.
+    """
+
+    def __init__(self, interval=INTERVAL, feature_cols=TOP_FEATURES, store_dir=STORE_DIR):
+        self.interval = interval
+        self.feature_cols = list(feature_cols)
+        self.store_dir = os.path.join(store_dir, interval)
+        self.features_file = features_path(interval, labeled=True)
+        self.manifest_file = manifest_path(interval)
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    # --------------------------
+    # Versioning
+    # --------------------------
+    def _signature(self):
+        """Hash of the manifest contents, parquet mtime and projected columns."""
+        if not os.path.exists(self.features_file):
+            raise FileNotFoundError(f"Feature file not found: {self.features_file}")
+
+        h = hashlib.sha1()
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file, "rb") as f:
+                h.update(f.read())
+        h.update(str(os.stat(self.features_file).st_mtime_ns).encode())
+        h.update(",".join(self.feature_cols).encode())
+        return h.hexdigest()[:16]
+
+    # --------------------------
+    # Build a snapshot on disk
+    # --------------------------
+    def _build(self, version):
+        """Write the projected, sorted arrays for `version` and move them into place atomically."""
+        target = os.path.join(self.store_dir, version)
+        if os.path.exists(target):
+            return target
+
+        os.makedirs(self.store_dir, exist_ok=True)
+        df = pd.read_parquet(self.features_file, columns=[PRICE_COL] + self.feature_cols)
+        if "timestamp" in df.columns:
+            df = df.set_index("timestamp")
+        df.index = pd.to_datetime(df.index)
+        df = df[~df.index.duplicated(keep="last")].sort_index()
+
+        tmp = tempfile.mkdtemp(prefix=f".{version}-", dir=self.store_dir)
+        np.save(os.path.join(tmp, "timestamps.npy"), df.index.values.astype("datetime64[ns]"))
+        np.save(os.path.join(tmp, "close.npy"), df[PRICE_COL].to_numpy(dtype=np.float64))
+        np.save(os.path.join(tmp, "features.npy"), np.ascontiguousarray(df[self.feature_cols].to_numpy(dtype=np.float32)))
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump({"version": version, "rows": len(df), "feature_cols": self.feature_cols}, f, indent=4)
+
+        try:
+            os.rename(tmp, target)
+        except OSError:
+            # Another worker published the same version first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        print(f"[FeatureStore] Built snapshot {version} ({len(df)} rows) for {self.interval}")
+        return target
+
+    def _prune(self, keep):
+        """Remove old snapshots, keeping the newest few (mapped files survive unlink on POSIX)."""
+        snapshots = [
+            os.path.join(self.store_dir, d) for d in os.listdir(self.store_dir)
+            if not d.startswith(".")
+        ]
+        snapshots.sort(key=os.path.getmtime, reverse=True)
+        for path in snapshots[KEEP_SNAPSHOTS:]:
+            if path != keep:
+                shutil.rmtree(path, ignore_errors=True)
+
+    # --------------------------
+    # Public API
+    # --------------------------
+    def snapshot(self):
+        """Return the current snapshot, rebuilding it first if the manifest changed."""
+        version = self._signature()
+        current = self._snapshot
+        if current is not None and current.version == version:
+            return current
+
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != version:
+                path = self._build(version)
+                self._snapshot = FeatureSnapshot(path, version, self.feature_cols)
+                self._prune(keep=path)
+            return self._snapshot
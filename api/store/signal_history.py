@@ -0,0 +1,73 @@
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+
+# ==============================
+# SIGNAL HISTORY
+# ==============================
+class SignalHistory:
+    """
+    Read-side index over the precompute's probability history
+    (timestamp, close, probability per daily bar, as each bar was scored at
+    its close). Kept as sorted numpy arrays and rebuilt only when the file
+    changes, so a batch of dates is resolved with one binary search.
+    """
+
+    def __init__(self, history_file):
+        self.history_file = history_file
+        self._arrays = (np.empty(0, dtype="datetime64[ns]"), np.empty(0), np.empty(0))  # timestamps, close, probability
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """Re-read the history if the precompute rewrote it (it is replaced atomically)."""
+        mtime = os.path.getmtime(self.history_file) if os.path.exists(self.history_file) else None
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            if mtime is None:
+                df = pd.DataFrame(columns=["timestamp", "close", "probability"])
+            else:
+                df = pd.read_csv(self.history_file)
+            df["timestamp"] = pd.to_datetime(df["timestamp"]).dt.normalize()
+            df = df.drop_duplicates("timestamp", keep="last").sort_values("timestamp")
+            # one swap: concurrent readers see the old arrays or the new ones
+            self._arrays = (df["timestamp"].to_numpy(dtype="datetime64[ns]"), df["close"].to_numpy(dtype=float),
+                            df["probability"].to_numpy(dtype=float))
+            self._mtime = mtime
+
+    @property
+    def timestamps(self):
+        self._refresh()
+        return self._arrays[0]
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def lookup(self, dates):
+        """
+        (probability, close, found) for each of `dates` (datetime64 days):
+        the bar scored on that exact date, NaN where the history has none.
+        """
+        self._refresh()
+        timestamps, close, probability = self._arrays
+        dates = np.asarray(dates, dtype="datetime64[ns]")
+        if len(timestamps) == 0:
+            missing = np.full(len(dates), np.nan)
+            return missing, missing.copy(), np.zeros(len(dates), dtype=bool)
+
+        idx = np.minimum(np.searchsorted(timestamps, dates, side="left"), len(timestamps) - 1)
+        found = timestamps[idx] == dates
+        return np.where(found, probability[idx], np.nan), np.where(found, close[idx], np.nan), found
+
+    def between(self, start_date=None, end_date=None):
+        """Dates of the history's bars within an inclusive range."""
+        timestamps = self.timestamps
+        lo = 0 if start_date is None else int(np.searchsorted(timestamps, np.datetime64(pd.Timestamp(start_date)), side="left"))
+        hi = len(timestamps) if end_date is None else \
+            int(np.searchsorted(timestamps, np.datetime64(pd.Timestamp(end_date)), side="right"))
+        return timestamps[lo:max(lo, hi)]
@@ -0,0 +1,50 @@
+import json
+from typing import Any, Dict, Iterator, Tuple
+
+from backtest.backtest import prepare_chart_data, trades_to_records
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+STREAM_CHUNK = 500  # equity points / trades per emitted event
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+# ==============================
+# ENCODING
+# ==============================
+def encode_event(event: str, data: Any, fmt: str = "ndjson") -> str:
+    """
+    Serialize one event.
+      - ndjson: {"event": ..., "data": ...}\\n
+      - sse:    event: ...\\ndata: ...\\n\\n
+    """
+    if fmt == "sse":
+        return f"event: {event}\ndata: {json.dumps(data, default=float)}\n\n"
+    return json.dumps({"event": event, "data": data}, default=float) + "\n"
+
+
+# ==============================
+# BACKTEST EVENTS
+# ==============================
+def iter_backtest_events(sim: Dict[str, Any], metrics: Dict[str, Any], chunk_size: int = STREAM_CHUNK) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield (event, data) pairs for a simulate_from_probabilities result:
+    metrics first, then the equity curve and the trade list in chunks.
+    Chart and trade dicts are only built for the chunk being sent.
+    """
+    yield "metrics", {"metrics": metrics, "config": sim["config"], "raw": sim["raw"]}
+
+    equity, bh, dates = sim["equity_curve"], sim["buy_and_hold_curve"], sim["dates"]
+    for start in range(0, len(equity), chunk_size):
+        end = start + chunk_size
+        yield "equity", prepare_chart_data(dates[start:end], equity[start:end], bh[start:end])
+
+    trades = sim["trades"]
+    for start in range(0, len(trades), chunk_size):
+        yield "trades", trades_to_records(trades[start:start + chunk_size])
+
+    yield "end", {"points": int(len(equity)), "trades": len(trades)}
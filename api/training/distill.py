@@ -0,0 +1,179 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from prediction.prediction import PredictionEngine, MODEL_PATH, STUDENT_ARCH, STUDENT_PATH, SEQ_LEN, THRESHOLD, TOP_FEATURES
+from prediction.fidelity import LABELED_FILE, load_labels, agreement, time_passes, add_savings
+from backtest.backtest import oof_end_date
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+REPORT_NAME = "distill_report.json"
+TEACHER_NAME = "teacher_probs.npy"   # cached ensemble probabilities, one per window
+HOLDOUT_FRACTION = 0.2               # most recent labeled windows kept out of training
+BATCH_SIZE = 64
+EPOCHS = 60
+PATIENCE = 8
+SEED = 42
+
+
+# ==============================
+# STUDENT MODEL
+# ==============================
+def build_student(seq_len, num_features, filters=16, units=16):
+    """
+    Compact student: one causal Conv1D for local patterns, one small GRU for
+    the sequence, a sigmoid output. A few thousand weights, against 21 fold
+    models in the teacher.
+    """
+    model = tf.keras.Sequential()
+    model.add(tf.keras.layers.Input(shape=(seq_len, num_features)))
+    model.add(tf.keras.layers.Conv1D(filters=filters, kernel_size=3, padding="causal", activation="relu"))
+    model.add(tf.keras.layers.GRU(units))
+    model.add(tf.keras.layers.Dense(1, activation="sigmoid"))
+
+    # Soft targets: binary cross-entropy against the teacher's probabilities
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=1e-3),
+        loss="binary_crossentropy"
+    )
+    return model
+
+
+# ==============================
+# DATA
+# ==============================
+def windows(values, seq_len):
+    """Every window the engine scores over `values` (same order as predict_arrays)."""
+    values = np.asarray(values, dtype=np.float32)
+    view = np.lib.stride_tricks.sliding_window_view(values, seq_len, axis=0).transpose(0, 2, 1)
+    return np.ascontiguousarray(view[:len(values) - seq_len])
+
+
+def teacher_probabilities(df, teacher_path, cache_file=None):
+    """The full ensemble's probability for every window of `df` (cached in `cache_file` if given)."""
+    if cache_file and os.path.exists(cache_file):
+        probs = np.load(cache_file)
+        if len(probs) == len(df) - SEQ_LEN:
+            print(f"[Distill] Reusing teacher probabilities from {cache_file}")
+            return probs
+
+    started = time.time()
+    teacher = PredictionEngine(model_path=teacher_path)
+    probs = teacher.predict_arrays(df[TOP_FEATURES].values, df["timestamp"].values, df["close"].values)
+    probs = probs["probability"].to_numpy(dtype=np.float32)
+    print(f"[Distill] Scored {len(probs)} windows with the teacher in {time.time() - started:.1f}s")
+    if cache_file:
+        np.save(cache_file, probs)
+    return probs
+
+
+# ==============================
+# DISTILL
+# ==============================
+def distill(teacher_path=MODEL_PATH, out_dir=STUDENT_PATH, labeled_file=LABELED_FILE, threshold=THRESHOLD,
+            epochs=EPOCHS, reuse_teacher=True):
+    """
+    Train the student on the teacher's soft probabilities and package it as
+    <out_dir>/student/student_fold1.h5, which PredictionEngine serves like
+    any release. Returns the fidelity / latency report.
+    """
+    tf.keras.utils.set_random_seed(SEED)
+    model_dir = os.path.join(out_dir, STUDENT_ARCH)
+    os.makedirs(model_dir, exist_ok=True)
+
+    # 1. Windows and soft targets over the whole labeled history
+    df = load_labels(labeled_file)
+    X = windows(df[TOP_FEATURES].values, SEQ_LEN)
+    soft = teacher_probabilities(df, teacher_path, os.path.join(out_dir, TEACHER_NAME) if reuse_teacher else None)
+    bar_times = df["timestamp"].to_numpy()[SEQ_LEN:]
+    labels = df["target"].to_numpy()[SEQ_LEN:].astype(int)
+
+    # 2. Chronological split: train on the oldest labeled windows, hold out the most recent
+    end_date = oof_end_date(teacher_path)
+    labeled = int(np.searchsorted(bar_times, np.datetime64(pd.Timestamp(end_date)), side="right"))
+    split = int(labeled * (1 - HOLDOUT_FRACTION))
+    print(f"[Distill] {split} training windows, {labeled - split} held out (to {end_date})")
+
+    # 3. Train (early stopping on the held-out soft loss)
+    student = build_student(SEQ_LEN, len(TOP_FEATURES))
+    started = time.time()
+    history = student.fit(
+        X[:split], soft[:split],
+        validation_data=(X[split:labeled], soft[split:labeled]),
+        batch_size=BATCH_SIZE,
+        epochs=epochs,
+        shuffle=True,
+        callbacks=[tf.keras.callbacks.EarlyStopping(monitor="val_loss", patience=PATIENCE, restore_best_weights=True)],
+        verbose=2
+    )
+    train_sec = time.time() - started
+    student.save(os.path.join(model_dir, f"{STUDENT_ARCH}_fold1.h5"))
+
+    # 4. Fidelity against the teacher, scored through the engine like any release
+    engine = PredictionEngine(model_path=out_dir)
+    probs = engine.predict_arrays(df[TOP_FEATURES].values, df["timestamp"].values, df["close"].values)
+    probs = probs["probability"].to_numpy()
+
+    # 5. Latency: the student vs the full ensemble on identical inputs
+    timings = {"ensemble": time_passes(PredictionEngine(model_path=teacher_path)), "student": time_passes(engine)}
+
+    report = {
+        "teacher_path": teacher_path,
+        "student_path": out_dir,
+        "generated_at": pd.Timestamp.utcnow().isoformat(),
+        "threshold": threshold,
+        "student": {
+            "params": int(student.count_params()),
+            "epochs": len(history.history["loss"]),
+            "train_sec": round(train_sec, 1),
+            "train_windows": split,
+            "holdout_windows": labeled - split
+        },
+        # Held out: bars the student never fit (used only for early stopping; the teacher's folds saw most)
+        "holdout": agreement(probs[split:labeled], soft[split:labeled], labels[split:labeled], threshold),
+        "all": agreement(probs[:labeled], soft[:labeled], labels[:labeled], threshold),
+        "latency": add_savings(timings, timings["ensemble"])
+    }
+    with open(os.path.join(out_dir, REPORT_NAME), "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def print_report(report):
+    s = report["student"]
+    print(f"\nstudent: {s['params']} params, {s['epochs']} epochs in {s['train_sec']}s "
+          f"({s['train_windows']} train / {s['holdout_windows']} held-out windows)")
+    print(f"{'bars':<8} {'n':>6} {'auc':>7} {'auc_full':>9} {'dAUC':>8} {'flip%':>7} {'mean_abs_diff':>14}")
+    for name in ("holdout", "all"):
+        r = report[name]
+        print(f"{name:<8} {r['bars']:>6} {r['auc']:>7} {r['auc_full']:>9} {r['auc_delta']:>8} "
+              f"{r['flip_rate_pct']:>7} {r['mean_abs_diff']:>14}")
+    print(f"\n{'backend':<9} {'single_ms':>10} {'saving%':>8} {'bulk_ms/1k':>11} {'saving%':>8}")
+    for name, t in report["latency"].items():
+        print(f"{name:<9} {t['single_ms']:>10} {t['single_saving_pct']:>8} {t['bulk_ms_per_1k']:>11} {t['bulk_saving_pct']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the fold-model ensemble into one compact student model.")
+    parser.add_argument("--teacher", default=MODEL_PATH, help="ensemble to distill (models/final layout)")
+    parser.add_argument("--out", default=STUDENT_PATH, help="where to package the student")
+    parser.add_argument("--labels", default=LABELED_FILE)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--rescore", action="store_true", help="re-run the teacher instead of reusing cached probabilities")
+    args = parser.parse_args()
+
+    report = distill(args.teacher, args.out, args.labels, args.threshold, args.epochs, reuse_teacher=not args.rescore)
+    print_report(report)
+    print(f"\nSaved {os.path.join(args.out, STUDENT_ARCH)} and {os.path.join(args.out, REPORT_NAME)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.utils.class_weight import compute_class_weight
+from sklearn.metrics import roc_auc_score
+
+from prediction.prediction import ARCHITECTURES, SEQ_LEN, TOP_FEATURES
+from prediction.fidelity import LABELED_FILE, load_labels
+from training.distill import windows
+from backtest.backtest import OOF_KIND, TRAIN_REPORT, load_oof_probabilities
+
+# ==============================
+# CONFIG CONSTANTS
+# ==============================
+OUT_DIR = "models/candidate"     # same layout as models/final; publish with prediction.registry
+REPORT_NAME = TRAIN_REPORT          # read back by backtest.oof_end_date / load_oof_probabilities
+N_SPLITS = 7                     # TimeSeriesSplit folds (fold k trains on everything before its validation block)
+BATCH_SIZE = 32
+EPOCHS = 30
+PATIENCE = 5
+MODEL_CONFIG = "medium"
+UNLABELED_TAIL = 3               # last bars whose target looks past the data (pipeline LOOK_AHEAD), not trained on
+THREADS_PER_JOB = int(os.getenv("TRAIN_THREADS_PER_JOB", "2"))
+SEED = 42
+
+
+# ==============================
+# MODELS (model development/model_improvement.ipynb)
+# ==============================
+def _compile(model):
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=1e-3),
+        loss="binary_crossentropy",
+        metrics=["accuracy"]
+    )
+    return model
+
+
+def build_lstm(seq_len, num_features, config=MODEL_CONFIG):
+    lstm_units, dense_units, dropout_rate = {
+        "small": ([64], [32], 0.3),
+        "medium": ([64, 32], [32], 0.3),
+        "large": ([128, 64], [64, 32], 0.4)
+    }[config]
+
+    model = tf.keras.Sequential()
+    model.add(tf.keras.layers.Input(shape=(seq_len, num_features)))
+    for i, units in enumerate(lstm_units):
+        model.add(tf.keras.layers.LSTM(units, return_sequences=i < len(lstm_units) - 1))
+        model.add(tf.keras.layers.Dropout(dropout_rate))
+    for units in dense_units:
+        model.add(tf.keras.layers.Dense(units, activation="relu"))
+        model.add(tf.keras.layers.Dropout(dropout_rate))
+    model.add(tf.keras.layers.Dense(1, activation="sigmoid"))
+    return _compile(model)
+
+
+def build_gru(seq_len, num_features, config=MODEL_CONFIG):
+    gru_units, dense_units, dropout_rate = {
+        "small": ([64], [32], 0.3),
+        "medium": ([64, 32], [32], 0.3),
+        "large": ([128, 64], [64, 32], 0.4)
+    }[config]
+
+    model = tf.keras.Sequential()
+    model.add(tf.keras.layers.Input(shape=(seq_len, num_features)))
+    for i, units in enumerate(gru_units):
+        model.add(tf.keras.layers.GRU(units, return_sequences=i < len(gru_units) - 1))
+        model.add(tf.keras.layers.Dropout(dropout_rate))
+    for units in dense_units:
+        model.add(tf.keras.layers.Dense(units, activation="relu"))
+        model.add(tf.keras.layers.Dropout(dropout_rate))
+    model.add(tf.keras.layers.Dense(1, activation="sigmoid"))
+    return _compile(model)
+
+
+def build_conv1d(seq_len, num_features, config=MODEL_CONFIG):
+    filters, kernel_size, dense_units, dropout_rate = {
+        "small": ([32], 3, [32], 0.3),
+        "medium": ([64, 32], 3, [64, 32], 0.3),
+        "large": ([128, 64], 5, [128, 64, 32], 0.4)
+    }[config]
+
+    model = tf.keras.Sequential()
+    model.add(tf.keras.layers.Input(shape=(seq_len, num_features)))
+    for f in filters:
+        model.add(tf.keras.layers.Conv1D(filters=f, kernel_size=kernel_size, activation="relu"))
+        model.add(tf.keras.layers.Dropout(dropout_rate))
+    model.add(tf.keras.layers.Flatten())
+    for units in dense_units:
+        model.add(tf.keras.layers.Dense(units, activation="relu"))
+        model.add(tf.keras.layers.Dropout(dropout_rate))
+    model.add(tf.keras.layers.Dense(1, activation="sigmoid"))
+    return _compile(model)
+
+
+BUILDERS = {"lstm": build_lstm, "gru": build_gru, "conv1d": build_conv1d}
+
+
+# ==============================
+# WORKER PROCESS
+# ==============================
+_DATA = {}
+
+
+def _init_worker(X, y, threads):
+    """Per-process setup: cap TensorFlow's thread pools before its runtime starts, keep the data."""
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    _DATA["X"], _DATA["y"] = X, y
+
+
+def train_fold(arch, fold, train_idx, val_idx, out_dir, epochs=EPOCHS, config=MODEL_CONFIG):
+    """
+    Train one architecture x fold job (notebook recipe: balanced class weights,
+    early stopping and LR decay on the fold's validation block), save
+    <out_dir>/<arch>/<arch>_fold<k>.h5 and return its out-of-fold predictions.
+    """
+    started = time.time()
+    X, y = _DATA["X"], _DATA["y"]
+    tf.keras.utils.set_random_seed(SEED + 100 * ARCHITECTURES.index(arch) + fold)
+
+    X_tr, y_tr, X_val, y_val = X[train_idx], y[train_idx], X[val_idx], y[val_idx]
+    classes = np.unique(y_tr)
+    class_weight = dict(zip(classes.tolist(), compute_class_weight("balanced", classes=classes, y=y_tr)))
+
+    model = BUILDERS[arch](X.shape[1], X.shape[2], config=config)
+    history = model.fit(
+        tf.data.Dataset.from_tensor_slices((X_tr, y_tr)).shuffle(1000, seed=SEED).batch(BATCH_SIZE),
+        validation_data=tf.data.Dataset.from_tensor_slices((X_val, y_val)).batch(BATCH_SIZE),
+        epochs=epochs,
+        class_weight=class_weight,
+        callbacks=[
+            tf.keras.callbacks.EarlyStopping(monitor="val_loss", patience=PATIENCE, restore_best_weights=True),
+            tf.keras.callbacks.ReduceLROnPlateau(monitor="val_loss", factor=0.5, patience=3, min_lr=1e-6)
+        ],
+        verbose=0
+    )
+    preds = model.predict(X_val, batch_size=256, verbose=0).ravel()
+
+    model_dir = os.path.join(out_dir, arch)
+    os.makedirs(model_dir, exist_ok=True)
+    model.save(os.path.join(model_dir, f"{arch}_fold{fold}.h5"))
+
+    return {
+        "arch": arch,
+        "fold": fold,
+        "val_idx": val_idx,
+        "preds": preds,
+        "train_windows": int(len(train_idx)),
+        "val_windows": int(len(val_idx)),
+        "epochs": len(history.history["loss"]),
+        "val_auc": round(float(roc_auc_score(y_val, preds)), 4) if len(np.unique(y_val)) > 1 else None,
+        "wall_sec": round(time.time() - started, 1),
+        "pid": os.getpid()
+    }
+
+
+# ==============================
+# PIPELINE
+# ==============================
+def load_training_data(labeled_file=LABELED_FILE, end_date=None):
+    """Windows X (n, SEQ_LEN, n_features), targets y and each window's bar timestamp, oldest first."""
+    df = load_labels(labeled_file)
+    if end_date is not None:
+        df = df[df["timestamp"] <= pd.Timestamp(end_date)]
+    df = df.iloc[:len(df) - UNLABELED_TAIL].reset_index(drop=True)
+
+    X = windows(df[TOP_FEATURES].values, SEQ_LEN)
+    y = df["target"].to_numpy()[SEQ_LEN:].astype(int)
+    return X, y, df["timestamp"].to_numpy()[SEQ_LEN:]
+
+
+def train(labeled_file=LABELED_FILE, out_dir=OUT_DIR, architectures=ARCHITECTURES, workers=None,
+          threads_per_job=THREADS_PER_JOB, epochs=EPOCHS, end_date=None, config=MODEL_CONFIG):
+    """
+    Train every architecture x fold job on a process pool and write the
+    models/final layout to `out_dir`: <arch>/<arch>_fold<k>.h5 and
+    <arch>/<arch>_oof.npy (one probability per window, 0 where no fold
+    validated it), plus a report with per-job wall times.
+    """
+    X, y, bar_times = load_training_data(labeled_file, end_date)
+    folds = list(enumerate(TimeSeriesSplit(n_splits=N_SPLITS).split(X), start=1))
+    workers = workers or max(1, (os.cpu_count() or 1) // threads_per_job)
+    print(f"[Train] {len(X)} windows to {pd.Timestamp(bar_times[-1]).date()}, "
+          f"{len(architectures)}x{N_SPLITS} jobs on {workers} process(es) x {threads_per_job} TF thread(s)")
+
+    # Largest training sets first, so the longest jobs don't start last
+    jobs = sorted(((arch, fold, tr, val) for arch in architectures for fold, (tr, val) in folds),
+                  key=lambda job: -len(job[2]))
+    oof = {arch: np.zeros(len(X)) for arch in architectures}
+    results = []
+
+    started = time.time()
+    # spawn: TensorFlow is not fork-safe once initialized
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(X, y, threads_per_job)) as pool:
+        futures = [pool.submit(train_fold, arch, fold, tr, val, out_dir, epochs, config)
+                   for arch, fold, tr, val in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            oof[result["arch"]][result.pop("val_idx")] = result.pop("preds")
+            results.append(result)
+            print(f"[Train] {result['arch']} fold {result['fold']}: {result['epochs']} epochs, "
+                  f"val_auc={result['val_auc']}, {result['wall_sec']}s (pid {result['pid']})")
+    wall_sec = time.time() - started
+
+    # Written under the name every OOF consumer reads (backtest, fidelity, drift); a legacy
+    # *_oof.npy left in a reused output dir would predate these models, so it goes
+    for arch in architectures:
+        np.save(os.path.join(out_dir, arch, f"{arch}_{OOF_KIND}.npy"), oof[arch])
+        legacy = os.path.join(out_dir, arch, f"{arch}_oof.npy")
+        if OOF_KIND != "oof" and os.path.exists(legacy):
+            os.remove(legacy)
+
+    covered = np.all(np.vstack([oof[arch] for arch in architectures]) != 0.0, axis=0)
+    job_sec = sum(r["wall_sec"] for r in results)
+    report = {
+        "labeled_file": labeled_file,
+        "out_dir": out_dir,
+        "generated_at": pd.Timestamp.utcnow().isoformat(),
+        "oof_end_date": str(pd.Timestamp(bar_times[-1]).date()),   # read back by backtest.oof_end_date
+        "windows": int(len(X)),
+        "config": {"model": config, "n_splits": N_SPLITS, "epochs": epochs, "batch_size": BATCH_SIZE,
+                   "patience": PATIENCE, "seq_len": SEQ_LEN, "features": list(TOP_FEATURES)},
+        "parallel": {"workers": workers, "threads_per_job": threads_per_job, "wall_sec": round(wall_sec, 1),
+                     "job_sec": round(job_sec, 1), "speedup": round(job_sec / wall_sec, 2) if wall_sec else None},
+        "oof_auc": {arch: round(float(roc_auc_score(y[covered], oof[arch][covered])), 4) for arch in architectures},
+        "jobs": sorted(results, key=lambda r: (architectures.index(r["arch"]), r["fold"]))
+    }
+    with open(os.path.join(out_dir, REPORT_NAME), "w") as f:
+        json.dump(report, f, indent=2)
+
+    # The arrays must load the way the API reads them (file name, length against the report)
+    if len(load_oof_probabilities(out_dir, architectures)) != int(covered.sum()):
+        raise RuntimeError(f"OOF arrays in {out_dir} don't read back as written")
+    return report
+
+
+def print_report(report):
+    p = report["parallel"]
+    print(f"\n{report['windows']} windows to {report['oof_end_date']}: {len(report['jobs'])} jobs in {p['wall_sec']}s wall "
+          f"({p['job_sec']}s of job time, {p['speedup']}x on {p['workers']} x {p['threads_per_job']} threads)")
+    print(f"{'arch':<8} {'fold':>4} {'train':>6} {'val':>5} {'epochs':>6} {'val_auc':>8} {'wall_sec':>9}")
+    for job in report["jobs"]:
+        print(f"{job['arch']:<8} {job['fold']:>4} {job['train_windows']:>6} {job['val_windows']:>5} "
+              f"{job['epochs']:>6} {str(job['val_auc']):>8} {job['wall_sec']:>9}")
+    print("OOF AUC: " + ", ".join(f"{arch}={auc}" for arch, auc in report["oof_auc"].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the fold-model ensemble (architecture x fold jobs on a process pool).")
+    parser.add_argument("--labels", default=LABELED_FILE)
+    parser.add_argument("--out", default=OUT_DIR, help="output directory (models/final layout)")
+    parser.add_argument("--architectures", nargs="+", default=ARCHITECTURES, choices=list(BUILDERS))
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPUs / threads per job)")
+    parser.add_argument("--threads-per-job", type=int, default=THREADS_PER_JOB, help="TensorFlow intra-op threads per process")
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--end-date", default=None, help="train on bars up to this date (default: all labeled bars)")
+    parser.add_argument("--config", default=MODEL_CONFIG, choices=["small", "medium", "large"])
+    args = parser.parse_args()
+
+    report = train(args.labels, args.out, args.architectures, args.workers, args.threads_per_job, args.epochs,
+                   args.end_date, args.config)
+    print_report(report)
+    print(f"\nSaved {args.out} and {os.path.join(args.out, REPORT_NAME)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,10 @@ from telegram.ext import (
 import requests
 import pytz
 import os
+from signal_listener import SignalListener, signal_from_probability
+from subscriber_store import SubscriberStore
+from delivery import DeliveryQueue
+from response_cache import ResponseCache
 
 # URLs
 LIVE_API = "https://chase-btc.onrender.com"
@@ -25,23 +29,22 @@ def get_api_base():
     return LOCAL_API
 
 # API_BASE = get_api_base()
-API_BASE = LOCAL_API
+API_BASE = os.getenv("API_BASE", LOCAL_API)
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
+TELEGRAM_BASE_URL = os.getenv("TELEGRAM_BASE_URL")  # e.g. a local fake Bot API for load tests
 
 if TELEGRAM_TOKEN is None:
     raise RuntimeError("Missing TELEGRAM_TOKEN — set it in .env or docker-compose")
 
-subscribed_users = set()
-# Keep configs per user
-user_configs = {}
+# Latest signal pushed by the API (/signal/stream); started in telegram_bot()
+signal_listener = SignalListener(API_BASE)
 
-# Default values
-DEFAULT_CONFIG = {
-    "threshold": 0.27,
-    "sl": 0.05,
-    "tp": 0.3,
-    "position_size": 1.0
-}
+# API answers reused until the next bar / new signal
+response_cache = ResponseCache(bar_source=lambda: (signal_listener.latest or {}).get("bar"))
+signal_listener.on_signal(response_cache.invalidate)
+
+# Subscribers and per-user configs (SQLite, survives restarts)
+store = SubscriberStore()
 
 # Enable logging
 logging.basicConfig(
@@ -49,17 +52,52 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Store user configs {user_id: {...}}
-user_configs = {}
-
 # --- CONFIG conversation states ---
 THRESHOLD, STOP_LOSS, TAKE_PROFIT, POSITION_SIZE = range(4)
 
 
+def latest_prediction(threshold):
+    """
+    Prediction for a threshold from the pushed signal feed, falling back to
+    polling /predict while the feed has no snapshot yet.
+    """
+    snapshot = signal_listener.latest
+    if snapshot is not None:
+        signal, confidence = signal_from_probability(snapshot["probability"], threshold)
+        return {"signal": signal, "confidence": confidence, "probability": snapshot["probability"]}
+
+    def fetch():
+        r = requests.get(f"{API_BASE}/predict", params={"threshold": threshold})
+        r.raise_for_status()
+        return r.json()
+
+    return response_cache.get_or_compute("predict", {"threshold": threshold}, fetch)
+
+
+def fetch_backtest(config, start_date="2020-01-01"):
+    """/backtest for a user config, cached per (config, bar date)."""
+    params = {
+        "start_date": start_date,
+        "end_date": datetime.today().strftime("%Y-%m-%d"),
+        "threshold": config["threshold"],
+        "sl": config["sl"],
+        "tp": config["tp"],
+        "initial_capital": 1000,
+        "position_size": config["position_size"]
+    }
+
+    def fetch():
+        r = requests.get(f"{API_BASE}/backtest", params=params)
+        r.raise_for_status()
+        return r.json()
+
+    return response_cache.get_or_compute("backtest", params, fetch)
+
+
 # ---- /start ----
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    subscribed_users.add(user_id)  # auto-subscribe
+    store.subscribe(user_id)  # auto-subscribe
 
     await update.message.reply_text(
         "👋 Welcome to ChaseBTC Bot!\n\n"
@@ -74,12 +112,10 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # ---- /signal ----
 async def signal(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    config = user_configs.get(user_id, {"threshold": 0.27})
+    config = store.get_config(user_id)
 
     try:
-        r = requests.get(f"{API_BASE}/predict", params={"threshold": config["threshold"]})
-        r.raise_for_status()
-        prediction = r.json()
+        prediction = latest_prediction(config["threshold"])
     except Exception as e:
         await update.message.reply_text(f"⚠️ Error fetching prediction: {e}")
         return
@@ -99,36 +135,21 @@ async def signal(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # ---- Daily Signal ----
 async def daily_signal_job(context: ContextTypes.DEFAULT_TYPE):
-    for user_id in subscribed_users:
+    # Subscribers grouped by config: one prediction/backtest per distinct config
+    messages = []
+    for (threshold, sl, tp, position_size), user_ids in store.subscribers_by_config().items():
         try:
-            # get config for this user or fallback
-            config = user_configs.get(user_id, DEFAULT_CONFIG)
+            config = {"threshold": threshold, "sl": sl, "tp": tp, "position_size": position_size}
 
-            # fetch prediction with user’s threshold
-            r = requests.get(
-                f"{API_BASE}/predict", 
-                params={"threshold": config["threshold"]}
-            )
-            r.raise_for_status()
-            prediction = r.json()
+            # prediction with user’s threshold (from the pushed feed)
+            prediction = latest_prediction(config["threshold"])
 
             signal = prediction["signal"]
             prob = prediction["confidence"]
             confidence = prob if signal == "🟢BUY" else 100 - prob
 
-            # fetch backtest with full user config
-            params = {
-                "start_date": "2020-01-01",  # could let them set later
-                "end_date": datetime.today().strftime("%Y-%m-%d"),
-                "threshold": config["threshold"],
-                "sl": config["sl"],
-                "tp": config["tp"],
-                "initial_capital": 1000,
-                "position_size": config["position_size"]
-            }
-            r = requests.get(f"{API_BASE}/backtest", params=params)
-            r.raise_for_status()
-            backtest = r.json()
+            # fetch backtest with full user config (also warms the cache for /backtest)
+            backtest = fetch_backtest(config)  # start date could be user-set later
             metrics = backtest["metrics"]
 
             text = (
@@ -143,34 +164,26 @@ async def daily_signal_job(context: ContextTypes.DEFAULT_TYPE):
                 f"• Sharpe Ratio: {metrics['sharpe']:.2f}\n"
                 f"• Max Drawdown: {metrics['max_drawdown']*100:.1f}%"
             )
-
-            await context.bot.send_message(
-                chat_id=user_id, text=text, parse_mode="Markdown"
-            )
+            messages.extend((user_id, text) for user_id in user_ids)
         except Exception as e:
-            logger.error(f"Failed to send daily signal to {user_id}: {e}")
+            logger.error(f"Failed to build daily signal for config {config} ({len(user_ids)} users): {e}")
+
+    if not messages:
+        logger.info("Daily signal broadcast: nothing to send (no subscribers or every config failed)")
+        return
+
+    # Rate-limited delivery (token buckets, flood-wait retries, per-send latency)
+    delivery: DeliveryQueue = context.application.bot_data["delivery"]
+    stats = await delivery.broadcast(messages, parse_mode="Markdown")
+    logger.info(f"Daily signal broadcast: {stats}; response cache: {response_cache.stats()}")
 
 # ---- /backtest ----
 async def backtest(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    config = user_configs.get(user_id, {
-        "threshold": 0.27,
-        "sl": 0.05,
-        "tp": 0.3,
-        "position_size": 1.0
-    })
-
-    params = {
-        "start_date": "2020-01-01",
-        "end_date": datetime.today().strftime("%Y-%m-%d"),
-        **config,
-        "initial_capital": 1000
-    }
+    config = store.get_config(user_id)
 
     try:
-        r = requests.get(f"{API_BASE}/backtest", params=params)
-        r.raise_for_status()
-        bt = r.json()
+        bt = fetch_backtest(config)
     except Exception as e:
         await update.message.reply_text(f"⚠️ Error running backtest: {e}")
         return
@@ -252,7 +265,7 @@ async def set_threshold(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     user_id = update.effective_user.id
     threshold = float(query.data)
-    user_configs[user_id] = {"threshold": threshold}
+    store.set_config(user_id, threshold=threshold)
 
     await query.edit_message_text(f"✅ Threshold set to {threshold}\n\nStep 2️⃣: Enter Stop Loss % (e.g., 0.05 for 5%).")
     return STOP_LOSS
@@ -262,7 +275,7 @@ async def set_stop_loss(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     try:
         sl = float(update.message.text)
-        user_configs[user_id]["sl"] = sl
+        store.set_config(user_id, sl=sl)
         await update.message.reply_text("✅ Stop Loss set.\n\nStep 3️⃣: Enter Take Profit % (e.g., 0.3 for 30%).")
         return TAKE_PROFIT
     except:
@@ -274,7 +287,7 @@ async def set_take_profit(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     try:
         tp = float(update.message.text)
-        user_configs[user_id]["tp"] = tp
+        store.set_config(user_id, tp=tp)
         await update.message.reply_text("✅ Take Profit set.\n\nStep 4️⃣: Enter Position Size % (e.g., 1.0 for 100%).")
         return POSITION_SIZE
     except:
@@ -286,8 +299,8 @@ async def set_position_size(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     try:
         ps = float(update.message.text)
-        user_configs[user_id]["position_size"] = ps
-        config = user_configs[user_id]
+        store.set_config(user_id, position_size=ps)
+        config = store.get_config(user_id)
 
         text = (
             f"🎉 Your config has been saved:\n"
@@ -312,7 +325,12 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # Main
 # ---------------------------
 def telegram_bot():
-    app = Application.builder().token(TELEGRAM_TOKEN).job_queue(JobQueue()).build()
+    signal_listener.start()
+    builder = Application.builder().token(TELEGRAM_TOKEN).job_queue(JobQueue())
+    if TELEGRAM_BASE_URL:
+        builder = builder.base_url(TELEGRAM_BASE_URL)
+    app = builder.build()
+    app.bot_data["delivery"] = DeliveryQueue(app.bot, store=store, on_forbidden=store.unsubscribe)
 
     # Commands
     app.add_handler(CommandHandler("start", start))
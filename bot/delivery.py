@@ -0,0 +1,220 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+import statistics
+from telegram.error import RetryAfter, TimedOut, NetworkError, Forbidden, BadRequest
+
+logger = logging.getLogger(__name__)
+
+# Telegram: ~30 messages/s overall, ~1 message/s per chat
+GLOBAL_RATE = float(os.getenv("TG_GLOBAL_RATE", "30"))
+PER_CHAT_RATE = float(os.getenv("TG_PER_CHAT_RATE", "1"))
+SENDERS = int(os.getenv("TG_SENDERS", "16"))          # concurrent in-flight sends
+MAX_ATTEMPTS = int(os.getenv("TG_MAX_ATTEMPTS", "5"))
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens/s, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def full(self):
+        """True once refilled to capacity: indistinguishable from a new bucket."""
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class _Delivery:
+    def __init__(self, batch, chat_id, text, kwargs):
+        self.batch = batch
+        self.chat_id = chat_id
+        self.text = text
+        self.kwargs = kwargs
+        self.attempts = 0
+        self.queued_at = time.time()
+
+
+class DeliveryQueue:
+    """
+    Sends bot messages as fast as Telegram allows. A global token bucket
+    caps overall throughput and one bucket per chat caps each chat. SENDERS
+    sender tasks keep several requests in flight. A RetryAfter (flood wait)
+    pauses all senders for the requested time before the message is
+    retried. Timeouts and network errors are retried with backoff. Chats that
+    blocked the bot are reported to `on_forbidden` and their bucket dropped;
+    per-chat buckets that have refilled are evicted after each broadcast, so
+    only chats sent to within the last second keep one. Each send's latency
+    is recorded, and a batch's records can be saved through the subscriber store.
+    """
+
+    def __init__(self, bot, store=None, global_rate=GLOBAL_RATE, per_chat_rate=PER_CHAT_RATE,
+                 senders=SENDERS, max_attempts=MAX_ATTEMPTS, on_forbidden=None):
+        self.bot = bot
+        self.store = store
+        self.global_bucket = TokenBucket(global_rate, capacity=1)  # smooth pacing, no burst over the limit
+        self.per_chat_rate = per_chat_rate
+        self.chat_buckets = {}
+        self.senders = senders
+        self.max_attempts = max_attempts
+        self.on_forbidden = on_forbidden
+        self.queue = None
+        self.paused_until = 0.0
+        self.records = {}      # {batch: [record, ...]}
+        self._tasks = []
+
+    # --------------------------
+    # Lifecycle
+    # --------------------------
+    def start(self):
+        """Start sender tasks on the running event loop (idempotent)."""
+        if self.queue is None:
+            self.queue = asyncio.Queue()
+            self._tasks = [asyncio.create_task(self._sender()) for _ in range(self.senders)]
+
+    def enqueue(self, chat_id, text, batch=None, **kwargs):
+        self.start()
+        self.queue.put_nowait(_Delivery(batch, chat_id, text, kwargs))
+
+    async def broadcast(self, messages, **kwargs):
+        """
+        Queue [(chat_id, text), ...] and wait until every message is sent or has
+        failed. Returns the batch's summary statistics (empty for no messages).
+        """
+        self.start()  # the queue must exist even when nothing is enqueued
+        batch = uuid.uuid4().hex[:12]
+        self.records[batch] = []
+        started = time.time()
+        for chat_id, text in messages:
+            self.enqueue(chat_id, text, batch=batch, **kwargs)
+        await self.queue.join()
+
+        self.evict_idle_buckets()
+
+        records = self.records.pop(batch)
+        if self.store is not None and records:
+            self.store.record_deliveries(batch, records)
+        return self.summary(records, time.time() - started, batch)
+
+    # --------------------------
+    # Sending
+    # --------------------------
+    def _chat_bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, capacity=1)
+        return bucket
+
+    def forget(self, chat_id):
+        """Drop a chat's bucket (the chat blocked the bot or unsubscribed)."""
+        self.chat_buckets.pop(chat_id, None)
+
+    def evict_idle_buckets(self):
+        """Remove buckets back at capacity; a chat sent to again gets a fresh, equivalent one."""
+        for chat_id in [c for c, b in self.chat_buckets.items() if b.full()]:
+            del self.chat_buckets[chat_id]
+        return len(self.chat_buckets)
+
+    async def _sender(self):
+        while True:
+            item = await self.queue.get()
+            try:
+                await self._deliver(item)
+            finally:
+                self.queue.task_done()
+
+    async def _deliver(self, item):
+        error = None
+        while item.attempts < self.max_attempts:
+            item.attempts += 1
+            await self._chat_bucket(item.chat_id).acquire()
+            wait = self.paused_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self.global_bucket.acquire()
+
+            sent = time.perf_counter()
+            try:
+                await self.bot.send_message(chat_id=item.chat_id, text=item.text, **item.kwargs)
+                self._record(item, "sent", (time.perf_counter() - sent) * 1000)
+                return
+            except RetryAfter as e:
+                delay = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else float(e.retry_after)
+                logger.warning(f"Flood wait {delay:.0f}s (chat {item.chat_id}), pausing delivery")
+                self.paused_until = max(self.paused_until, time.monotonic() + delay)
+                error = f"RetryAfter {delay:.0f}s"
+            except BadRequest as e:
+                error = str(e)
+                break  # malformed message or unknown chat: retrying won't help
+            except (TimedOut, NetworkError) as e:
+                error = str(e)
+                await asyncio.sleep(min(2 ** item.attempts, 30))
+            except Forbidden as e:
+                error = str(e)
+                self.forget(item.chat_id)
+                if self.on_forbidden is not None:
+                    self.on_forbidden(item.chat_id)
+                break
+            except Exception as e:
+                error = str(e)
+                break
+
+        logger.error(f"Delivery to {item.chat_id} failed after {item.attempts} attempt(s): {error}")
+        self._record(item, "failed", None, error)
+
+    def _record(self, item, status, send_ms, error=None):
+        if item.batch not in self.records:
+            return
+        now = time.time()
+        self.records[item.batch].append({
+            "user_id": item.chat_id,
+            "status": status,
+            "attempts": item.attempts,
+            "queued_at": item.queued_at,
+            "sent_at": now if status == "sent" else None,
+            "send_ms": round(send_ms, 2) if send_ms is not None else None,
+            "latency_ms": round((now - item.queued_at) * 1000, 2),
+            "error": error
+        })
+
+    # --------------------------
+    # Stats
+    # --------------------------
+    @staticmethod
+    def summary(records, elapsed, batch=None):
+        sent = [r for r in records if r["status"] == "sent"]
+        send_ms = sorted(r["send_ms"] for r in sent)
+
+        def pct(values, q):
+            return values[min(int(q / 100 * len(values)), len(values) - 1)] if values else None
+
+        return {
+            "batch": batch,
+            "messages": len(records),
+            "sent": len(sent),
+            "failed": len(records) - len(sent),
+            "retries": sum(r["attempts"] - 1 for r in records),
+            "elapsed_sec": round(elapsed, 3),
+            "msgs_per_sec": round(len(sent) / elapsed, 2) if elapsed > 0 else None,
+            "send_ms_p50": pct(send_ms, 50),
+            "send_ms_p95": pct(send_ms, 95),
+            "latency_ms_mean": round(statistics.mean(r["latency_ms"] for r in records), 2) if records else None
+        }
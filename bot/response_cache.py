@@ -0,0 +1,95 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL = int(os.getenv("BOT_CACHE_TTL", "3600"))         # seconds an answer is reused
+CACHE_MAX_ENTRIES = int(os.getenv("BOT_CACHE_MAX", "1024"))
+
+
+class ResponseCache:
+    """
+    Bot-side cache of API answers (/predict fallback, /backtest), keyed by
+    (kind, parameters, bar date). Answers change once per bar, so the bar date
+    from the signal feed is part of the key. invalidate() drops everything
+    when the feed publishes a new signal (a new bar, or the same bar
+    re-scored by another model). Entries also expire after `ttl` seconds and
+    the least recently used are evicted beyond `max_entries`. Concurrent
+    misses on one key compute it once.
+    """
+
+    def __init__(self, bar_source=None, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES):
+        self.bar_source = bar_source   # callable -> current bar date (str) or None
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()   # {key: (expires_at, value)}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.generation = 0            # bumped by invalidate(); stale computes are not stored
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def current_bar(self):
+        bar = self.bar_source() if self.bar_source is not None else None
+        return bar or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def get_or_compute(self, kind, params, compute):
+        """Cached compute() for (kind, params) on the current bar."""
+        key = (kind, tuple(sorted(params.items())), self.current_bar())
+        value = self._get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                value = self._get(key, count=False)  # filled while we waited
+                if value is not None:
+                    return value
+                generation = self.generation
+                value = compute()
+                self._put(key, value, generation)
+                return value
+        finally:
+            with self._lock:
+                self._key_locks.pop(key, None)
+
+    def _get(self, key, count=True):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self.entries[key]
+            if count:
+                self.misses += 1
+            return None
+
+    def _put(self, key, value, generation):
+        with self._lock:
+            if generation != self.generation:
+                return  # invalidated while computing
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, *_):
+        """Drop all entries (signal-feed listener: fn(event, data))."""
+        with self._lock:
+            self.entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+        logger.info("Response cache invalidated by new signal")
+
+    def stats(self):
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses,
+                "invalidations": self.invalidations}
@@ -0,0 +1,70 @@
+import json
+import time
+import logging
+import threading
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class SignalListener:
+    """
+    Subscribes to the API's /signal/stream (Server-Sent Events) on a daemon
+    thread and keeps the latest scored bar in memory, so commands render from
+    local state instead of calling /predict. Reconnects with backoff.
+    """
+
+    def __init__(self, api_base, retry_sec=5, read_timeout=60):
+        self.url = f"{api_base}/signal/stream"
+        self.retry_sec = retry_sec
+        self.read_timeout = read_timeout  # > server heartbeat interval
+        self.latest = None
+        self.connected = False
+        self.listeners = []  # callbacks fn(event, data) for new `signal` events
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="signal-listener", daemon=True)
+            self._thread.start()
+        return self
+
+    def on_signal(self, fn):
+        self.listeners.append(fn)
+
+    def _run(self):
+        while True:
+            try:
+                with requests.get(self.url, stream=True, timeout=(5, self.read_timeout)) as r:
+                    r.raise_for_status()
+                    self.connected = True
+                    event, data = None, []
+                    for line in r.iter_lines(decode_unicode=True):
+                        if line.startswith("event:"):
+                            event = line[len("event:"):].strip()
+                        elif line.startswith("data:"):
+                            data.append(line[len("data:"):].strip())
+                        elif not line and event:
+                            self._dispatch(event, json.loads("\n".join(data)) if data else None)
+                            event, data = None, []
+            except Exception as e:
+                logger.warning(f"Signal feed disconnected: {e}")
+            self.connected = False
+            time.sleep(self.retry_sec)
+
+    def _dispatch(self, event, data):
+        if event in ("snapshot", "signal") and data is not None:
+            self.latest = data
+        if event == "signal":
+            for fn in self.listeners:
+                try:
+                    fn(event, data)
+                except Exception as e:
+                    logger.error(f"Signal listener callback failed: {e}")
+
+
+def signal_from_probability(prob, threshold):
+    """Same rule and confidence scaling as the API's /predict."""
+    signal = "🟢BUY" if prob > threshold else "🔴HOLD"
+    confidence = min((prob / 0.7) * 100, 100.0)
+    return signal, round(confidence, 2)
@@ -0,0 +1,149 @@
+import os
+import time
+import sqlite3
+import threading
+
+BOT_DB = os.getenv("BOT_DB", "data/bot.db")
+
+DEFAULT_CONFIG = {
+    "threshold": 0.27,
+    "sl": 0.05,
+    "tp": 0.3,
+    "position_size": 1.0
+}
+CONFIG_FIELDS = list(DEFAULT_CONFIG)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscribers (
+    user_id     INTEGER PRIMARY KEY,
+    subscribed  INTEGER NOT NULL DEFAULT 1,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_subscribers_active ON subscribers(user_id) WHERE subscribed = 1;
+
+CREATE TABLE IF NOT EXISTS configs (
+    user_id        INTEGER PRIMARY KEY,
+    threshold      REAL,
+    sl             REAL,
+    tp             REAL,
+    position_size  REAL,
+    updated_at     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_configs_params ON configs(threshold, sl, tp, position_size);
+
+CREATE TABLE IF NOT EXISTS deliveries (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch       TEXT,
+    user_id     INTEGER NOT NULL,
+    status      TEXT NOT NULL,
+    attempts    INTEGER NOT NULL,
+    queued_at   REAL NOT NULL,
+    sent_at     REAL,
+    send_ms     REAL,
+    latency_ms  REAL,
+    error       TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_deliveries_batch ON deliveries(batch);
+"""
+
+
+class SubscriberStore:
+    """
+    SQLite-backed subscribers, per-user configs and delivery records, so they
+    survive bot restarts. Missing config fields fall back to DEFAULT_CONFIG.
+    """
+
+    def __init__(self, path=BOT_DB):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params)
+
+    # --------------------------
+    # Subscribers
+    # --------------------------
+    def subscribe(self, user_id):
+        now = time.time()
+        self._execute(
+            "INSERT INTO subscribers (user_id, subscribed, created_at, updated_at) VALUES (?, 1, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET subscribed = 1, updated_at = excluded.updated_at",
+            (user_id, now, now)
+        )
+
+    def unsubscribe(self, user_id):
+        self._execute("UPDATE subscribers SET subscribed = 0, updated_at = ? WHERE user_id = ?", (time.time(), user_id))
+
+    def is_subscribed(self, user_id):
+        row = self._execute("SELECT subscribed FROM subscribers WHERE user_id = ?", (user_id,)).fetchone()
+        return bool(row and row["subscribed"])
+
+    def subscriber_count(self):
+        return self._execute("SELECT COUNT(*) FROM subscribers WHERE subscribed = 1").fetchone()[0]
+
+    # --------------------------
+    # Configs
+    # --------------------------
+    def get_config(self, user_id):
+        row = self._execute(f"SELECT {', '.join(CONFIG_FIELDS)} FROM configs WHERE user_id = ?", (user_id,)).fetchone()
+        config = dict(DEFAULT_CONFIG)
+        if row is not None:
+            config.update({k: row[k] for k in CONFIG_FIELDS if row[k] is not None})
+        return config
+
+    def set_config(self, user_id, **fields):
+        """Upsert some config fields; the others keep their stored (or default) values."""
+        fields = {k: float(v) for k, v in fields.items() if k in DEFAULT_CONFIG}
+        if not fields:
+            return
+        cols = ", ".join(fields)
+        marks = ", ".join("?" for _ in fields)
+        updates = ", ".join(f"{k} = excluded.{k}" for k in fields)
+        self._execute(
+            f"INSERT INTO configs (user_id, {cols}, updated_at) VALUES (?, {marks}, ?) "
+            f"ON CONFLICT(user_id) DO UPDATE SET {updates}, updated_at = excluded.updated_at",
+            (user_id, *fields.values(), time.time())
+        )
+
+    def reset_config(self, user_id):
+        self._execute("DELETE FROM configs WHERE user_id = ?", (user_id,))
+
+    def subscribers_by_config(self):
+        """
+        {config tuple (threshold, sl, tp, position_size): [user_id, ...]} for all
+        active subscribers, so broadcasts compute each distinct config once.
+        """
+        defaults = [DEFAULT_CONFIG[k] for k in CONFIG_FIELDS]
+        cols = ", ".join(f"COALESCE(c.{k}, ?) AS {k}" for k in CONFIG_FIELDS)
+        rows = self._execute(
+            f"SELECT s.user_id, {cols} FROM subscribers s "
+            f"LEFT JOIN configs c ON c.user_id = s.user_id WHERE s.subscribed = 1",
+            defaults
+        ).fetchall()
+
+        groups = {}
+        for row in rows:
+            groups.setdefault(tuple(row[k] for k in CONFIG_FIELDS), []).append(row["user_id"])
+        return groups
+
+    # --------------------------
+    # Delivery records
+    # --------------------------
+    def record_deliveries(self, batch, records):
+        """records: dicts with user_id, status, attempts, queued_at, sent_at, send_ms, latency_ms, error."""
+        with self._lock:
+            self.conn.execute("BEGIN")
+            self.conn.executemany(
+                "INSERT INTO deliveries (batch, user_id, status, attempts, queued_at, sent_at, send_ms, latency_ms, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(batch, r["user_id"], r["status"], r["attempts"], r["queued_at"], r["sent_at"],
+                  r["send_ms"], r["latency_ms"], r["error"]) for r in records]
+            )
+            self.conn.execute("COMMIT")
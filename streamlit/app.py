@@ -1,6 +1,11 @@
 # app.py
 import sys, os
 sys.path.append(os.path.dirname(__file__))
+# Shared with the other services instead of copied: the API's backtest module
+# (simulation.py) and the bot's signal feed client (live_signal.py)
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.append(os.path.join(REPO_ROOT, "api"))
+sys.path.append(os.path.join(REPO_ROOT, "bot"))
 import streamlit as st
 from live_signal import display_prediction_card, fetch_prediction
 from backtest_tab import show_backtest_tab
@@ -1,6 +1,7 @@
 # live_signal.py
 import requests
 import streamlit as st
+from signal_listener import SignalListener, signal_from_probability
 
 # URLs
 LIVE_API = "https://chase-btc.onrender.com"
@@ -20,8 +21,24 @@ def get_api_base():
 # API_BASE = get_api_base()
 API_BASE = "https://murmurlessly-unrequitable-tanna.ngrok-free.dev"
 
-@st.cache_data(ttl=60*60*24)
+@st.cache_resource
+def get_signal_listener():
+    """One /signal/stream subscription shared by every dashboard session."""
+    return SignalListener(API_BASE).start()
+
 def fetch_prediction(threshold: float = 0.27):
+    """
+    Latest prediction for a threshold, rendered from the pushed signal feed.
+    Falls back to polling /predict until the feed has delivered a snapshot.
+    """
+    snapshot = get_signal_listener().latest
+    if snapshot is not None:
+        signal, confidence = signal_from_probability(snapshot["probability"], threshold)
+        return {"signal": signal, "confidence": confidence, "probability": snapshot["probability"]}
+    return fetch_prediction_api(threshold)
+
+@st.cache_data(ttl=60*60*24)
+def fetch_prediction_api(threshold: float = 0.27):
     """
     Fetch prediction from the API with a given threshold.
     Returns a dict with 'signal' and 'probability'.
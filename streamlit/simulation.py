@@ -0,0 +1,46 @@
+# simulation.py
+#
+# Client-side scenario runs on the API's own trade simulation. The dashboard
+# fetches the probability/price series once per date range from
+# /backtest/series and re-runs only this part when threshold, SL, TP,
+# position size or capital change. It imports api/backtest/backtest.py
+# (numpy/pandas only, put on sys.path by app.py) instead of keeping a copy,
+# so both give the same numbers and trade ledger by construction.
+
+import pandas as pd
+from backtest.backtest import simulate_from_probabilities, prepare_chart_data, trades_to_records
+
+
+def run_scenario(series, threshold, sl, tp, initial_capital, position_size):
+    """
+    Backtest a /backtest/series payload locally. Returns (metrics, equity_points,
+    trades) shaped like the /backtest response's metrics, equity_curve and trades.
+    """
+    sim = simulate_from_probabilities(
+        prices=series["close"],
+        y_prob=pd.DataFrame({"probability": series["probability"]}),
+        dates=series["dates"],
+        threshold=threshold,
+        stop_loss=sl,
+        take_profit=tp,
+        initial_capital=initial_capital,
+        fee=series["fee"],
+        slippage=series["slippage"],
+        position_size=position_size,
+        interval=series["interval"]
+    )
+
+    # Same mapping as the API's format_metrics
+    m = sim["metrics"]
+    metrics = {
+        "sharpe": m["sharpe_ratio"],
+        "max_drawdown": m["max_drawdown_pct"],
+        "cumulative_return": m["cumulative_return"],
+        "final_equity": m["final_equity"],
+        "total_trades": m["total_trades"],
+        "win_rate_pct": m["win_rate_pct"],
+        "avg_profit_per_closed_trade": m["avg_profit_per_closed_trade"],
+        "avg_holding_bars": m["avg_holding_bars"],
+    }
+    equity_points = prepare_chart_data(sim["dates"], sim["equity_curve"], sim["buy_and_hold_curve"])
+    return metrics, equity_points, trades_to_records(sim["trades"])